@@ -0,0 +1,20 @@
+from django.db import connections
+from django.db.models.signals import pre_migrate
+from django.dispatch import receiver
+
+
+@receiver(pre_migrate)
+def create_directory_tables(using, **kwargs):
+    """Таблицы организаций, сотрудников и ответственных в рабочей БД
+    существуют до миграций (в миграциях они не управляются). В тестовой
+    БД они создаются перед миграциями по текущим моделям."""
+
+    from tenders.models import (Employee, Organization,
+                                OrganizationResponsible)
+
+    connection = connections[using]
+    existing = connection.introspection.table_names()
+    with connection.schema_editor() as editor:
+        for model in (Organization, Employee, OrganizationResponsible):
+            if model._meta.db_table not in existing:
+                editor.create_model(model)
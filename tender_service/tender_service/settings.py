@@ -1,3 +1,4 @@
+from importlib.util import find_spec
 from pathlib import Path
 import os
 # from dotenv import load_dotenv
@@ -34,6 +35,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tenders.middleware.metrics_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -41,6 +43,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'tenders.middleware.replica_pinning_middleware',
 ]
 
 ROOT_URLCONF = 'tender_service.urls'
@@ -71,9 +74,53 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('POSTGRES_HOST'),
         'PORT': os.getenv('POSTGRES_PORT'),
+        # Перед выдачей соединение проверяется, разорванное заменяется.
+        'CONN_HEALTH_CHECKS': True,
+        'CONN_MAX_AGE': int(os.getenv('POSTGRES_CONN_MAX_AGE', '60')),
     }
 }
 
+# Пул соединений psycopg 3. Без пакета psycopg_pool (например, с psycopg2)
+# используются постоянные соединения с CONN_MAX_AGE.
+POSTGRES_POOL = (
+    os.getenv('POSTGRES_POOL', '1').lower() in ('1', 'true', 'yes')
+    and find_spec('psycopg_pool') is not None
+)
+if POSTGRES_POOL:
+    from psycopg_pool import ConnectionPool
+
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('POSTGRES_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('POSTGRES_POOL_MAX_SIZE', '10')),
+            'timeout': float(os.getenv('POSTGRES_POOL_TIMEOUT', '10')),
+            'max_idle': float(os.getenv('POSTGRES_POOL_MAX_IDLE', '600')),
+            'check': ConnectionPool.check_connection,
+        },
+    }
+
+# Реплики для чтения: список host[:port][/database] через запятую.
+# Учетные данные и параметры соединения те же, что у основной БД.
+for number, replica in enumerate(
+        filter(None, os.getenv('POSTGRES_REPLICAS', '').split(',')), 1):
+    address, _, name = replica.strip().partition('/')
+    host, _, port = address.partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'NAME': name or DATABASES['default']['NAME'],
+        'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {})),
+        'TEST': {'MIRROR': 'default'},
+    }
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+if REPLICA_DATABASES:
+    DATABASE_ROUTERS = ['tenders.routers.ReplicaRouter']
+
+# Сколько секунд после записи чтения клиента идут в основную БД.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -101,6 +148,63 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Кэш сотрудников по username, общий для всех запросов процесса.
+EMPLOYEE_CACHE_SIZE = int(os.getenv('EMPLOYEE_CACHE_SIZE', '10000'))
+EMPLOYEE_CACHE_TTL = float(os.getenv('EMPLOYEE_CACHE_TTL', '60'))
+
+# Период полного перестроения индекса ответственных за организации.
+# Без общего кэша процессы узнают об изменениях только при перестроении,
+# поэтому по умолчанию он короче.
+MEMBERSHIP_INDEX_TTL = float(os.getenv(
+    'MEMBERSHIP_INDEX_TTL',
+    '300' if os.getenv('SHARED_CACHE_BACKEND') else '30'))
+
+# Как часто процесс сверяет поколение справочников в общем кэше, чтобы
+# сбросить кэши после массовой синхронизации (sync_directory).
+DIRECTORY_CHECK_INTERVAL = float(os.getenv('DIRECTORY_CHECK_INTERVAL', '5'))
+
+# Как часто в истории версий сохраняется полный снимок записи.
+VERSION_CHECKPOINT_INTERVAL = int(os.getenv('VERSION_CHECKPOINT_INTERVAL', '10'))
+
+# Кэш тендеров и предложений: локальный уровень в памяти процесса и
+# необязательный общий уровень (любой бэкенд кэша Django).
+ENTITY_CACHE_LOCAL_TTL = float(os.getenv('ENTITY_CACHE_LOCAL_TTL', '5'))
+ENTITY_CACHE_TTL = float(os.getenv('ENTITY_CACHE_TTL', '300'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tender-service',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('ENTITY_CACHE_SIZE', '10000')),
+        },
+    },
+}
+if os.getenv('SHARED_CACHE_BACKEND'):
+    CACHES['shared'] = {
+        'BACKEND': os.getenv('SHARED_CACHE_BACKEND'),
+        'LOCATION': os.getenv('SHARED_CACHE_LOCATION', ''),
+    }
+
+# Объединение одинаковых одновременных чтений: сколько потоков ждут
+# один запрос и сколько секунд ждут, прежде чем выполнить его сами.
+SINGLE_FLIGHT_MAX_WAITERS = int(os.getenv('SINGLE_FLIGHT_MAX_WAITERS', '100'))
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv('SINGLE_FLIGHT_TIMEOUT', '5'))
+
+# Обслуживать чтения (списки, тендер, статус, предложения, отзывы)
+# async-представлениями. Имеет смысл при запуске под ASGI-сервером.
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', '').lower() in ('1', 'true', 'yes')
+
+# Максимальное число элементов в пакетных запросах.
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', '10000'))
+
+# Сколько строк выгрузки читается из серверного курсора за раз.
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination'
+    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_RENDERER_CLASSES': (
+        'tenders.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
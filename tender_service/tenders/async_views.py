@@ -0,0 +1,252 @@
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+
+from .cache import aget_tender
+from .conditional import (alist_validators, detail_validators,
+                          fingerprint_validators, not_modified,
+                          set_validators)
+from .facets import facet_rows, summarize
+from .filters import INVALID_PARAMS, filter_list
+from .identity import USER_ERROR, employee_cache
+from .membership import membership
+from .models import Bid, Employee, Review, Tender
+from .pagination import MyPagination
+from .renderers import FastJSONRenderer
+from .serializers import (BidProjection, ReviewSerializer, TenderProjection,
+                          TenderSerializer)
+from .views import BidViewSet, TenderViewSet
+from . import visibility
+
+FORBIDDEN = {'error': 'Недостаточно прав для выполнения действия.'}
+TENDER_NOT_FOUND = {'error': 'Тендер не найден.'}
+
+
+def render(data, status=200):
+    """Ответ в том же виде, что и Response DRF с FastJSONRenderer."""
+
+    return HttpResponse(
+        FastJSONRenderer().render(data), status=status,
+        content_type='application/json')
+
+
+async def get_employee(username):
+    try:
+        return await employee_cache.aget(username)
+    except Employee.DoesNotExist:
+        return None
+
+
+async def conditional_list(request, queryset, projection_class, view,
+                           fingerprint=None):
+    """Асинхронный вариант PaginatedActionsMixin.conditional_list:
+    ETag по агрегату выборки, 304 без сериализации, страница через
+    MyPagination. Фильтры и порядок - из filterset_class вьюсета view.
+    Объединение одинаковых запросов здесь не нужно: ожидание в
+    async-представлении не занимает поток."""
+
+    queryset = filter_list(view.filterset_class, request.GET, queryset)
+    if queryset is None:
+        return render(INVALID_PARAMS, 400)
+    if fingerprint is None:
+        etag, last_modified = await alist_validators(request, queryset)
+    else:
+        etag, last_modified = fingerprint_validators(request, fingerprint)
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        queryset = projection_class.project(queryset)
+        paginator = MyPagination()
+        try:
+            page = await paginator.apaginate_queryset(
+                queryset, Request(request), view)
+        except ValidationError as error:
+            return render(error.detail, 400)
+        if page is None:
+            page = [row async for row in queryset]
+            data = projection_class(page, many=True).data
+        else:
+            data = paginator.get_paginated_response(
+                projection_class(page, many=True).data).data
+        response = render(data)
+    return set_validators(response, etag, last_modified)
+
+
+def conditional_detail(request, instance, data):
+    etag, last_modified = detail_validators(instance)
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        response = render(data)
+    return set_validators(response, etag, last_modified)
+
+
+async def visible_tenders(request):
+    """Тендеры, доступные пользователю, как в TenderViewSet.get_queryset.
+    Возвращает None для неизвестного username."""
+
+    username = request.GET.get('username')
+    creator = None
+    if username:
+        creator = await get_employee(username)
+        if creator is None:
+            return None
+    return visibility.tenders_for(creator)
+
+
+async def tender_list(request):
+    """GET tenders: список доступных пользователю тендеров."""
+
+    queryset = await visible_tenders(request)
+    if queryset is None:
+        return render(USER_ERROR, 401)
+    return await conditional_list(
+        request, queryset, TenderProjection, TenderViewSet)
+
+
+async def tender_detail(request, pk):
+    """GET tenders/{id}: тендер, если он доступен пользователю."""
+
+    queryset = await visible_tenders(request)
+    if queryset is None:
+        return render(USER_ERROR, 401)
+    queryset = filter_list(
+        TenderViewSet.filterset_class, request.GET, queryset)
+    if queryset is None:
+        return render(INVALID_PARAMS, 400)
+    tender = await queryset.filter(pk=pk).afirst()
+    if tender is None:
+        return render({'detail': 'No Tender matches the given query.'}, 404)
+    return conditional_detail(request, tender, TenderSerializer(tender).data)
+
+
+async def tender_my(request):
+    """GET tenders/my: тендеры, созданные пользователем."""
+
+    username = await get_employee(request.GET.get('username'))
+    if username is None:
+        return render(USER_ERROR, 401)
+    tenders = Tender.objects.filter(creator=username)
+    if not await tenders.aexists():
+        return render({'error': 'Пользователь не создал тендеры.'}, 401)
+    return await conditional_list(
+        request, tenders, TenderProjection, TenderViewSet)
+
+
+async def tender_facets(request):
+    """GET tenders/facets: счетчики доступных пользователю тендеров."""
+
+    user = None
+    username = request.GET.get('username')
+    if username:
+        user = await get_employee(username)
+        if user is None:
+            return render(USER_ERROR, 401)
+    return render(summarize([row async for row in facet_rows(user)]))
+
+
+async def tender_status(request, pk):
+    """GET tenders/{id}/status: статус тендера."""
+
+    try:
+        tender = await aget_tender(pk)
+    except Tender.DoesNotExist:
+        return render(TENDER_NOT_FOUND, 404)
+    username = await get_employee(request.GET.get('username'))
+    if username is None:
+        return render(USER_ERROR, 401)
+    if visibility.can_view_tender(tender, username):
+        return conditional_detail(request, tender, {'status': tender.status})
+    return render(FORBIDDEN, 403)
+
+
+async def bid_list(request, pk):
+    """GET bids/{tenderId}/list: предложения по тендеру."""
+
+    username = await get_employee(request.GET.get('username'))
+    if username is None:
+        return render(USER_ERROR, 401)
+    try:
+        pk = uuid.UUID(pk)
+    except ValueError:
+        return render(TENDER_NOT_FOUND, 404)
+    bids, aggregates = visibility.tender_bids_summary(pk, username)
+    summary = await bids.aaggregate(**aggregates)
+    if not summary['total']:
+        return render({'error': 'Предложений не найдено.'}, 404)
+    if not summary['count']:
+        return render(FORBIDDEN, 403)
+    return await conditional_list(
+        request, visibility.tender_bids(pk, username), BidProjection,
+        BidViewSet, fingerprint=summary)
+
+
+async def bid_my(request):
+    """GET bids/my: предложения, созданные пользователем."""
+
+    username = await get_employee(request.GET.get('username'))
+    if username is None:
+        return render(USER_ERROR, 401)
+    return await conditional_list(
+        request, Bid.objects.filter(creator=username), BidProjection,
+        BidViewSet)
+
+
+async def bid_reviews(request, pk):
+    """GET bids/{tenderId}/reviews: отзывы на предложения автора."""
+
+    try:
+        tender = await aget_tender(pk)
+    except Tender.DoesNotExist:
+        return render(TENDER_NOT_FOUND, 404)
+    requester = await get_employee(request.GET.get('requesterUsername'))
+    if requester is None:
+        return render(USER_ERROR, 401)
+    author = await get_employee(request.GET.get('authorUsername'))
+    if author is None:
+        return render(USER_ERROR, 403)
+    if not await membership.ais_member(tender.organization_id, requester.pk):
+        return render(FORBIDDEN, 403)
+    try:
+        bid = await Bid.objects.aget(tender=tender)
+    except (Bid.DoesNotExist, Bid.MultipleObjectsReturned):
+        return render(
+            {'error': 'Пользователь не делал предложений '
+                      'по указанному тендеру.'}, 404)
+    if not visibility.owns(author, bid):
+        return render(USER_ERROR, 401)
+    reviews = [
+        review async for review in Review.objects.filter(bid__tender=pk)]
+    return render(ReviewSerializer(reviews, many=True).data)
+
+
+def with_sync_fallback(view, sync_view):
+    """Чтения (GET, HEAD) обслуживает async-представление, остальные
+    методы того же адреса - синхронный вьюсет DRF."""
+
+    sync_view = sync_to_async(sync_view)
+
+    @csrf_exempt
+    async def dispatch(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await view(request, *args, **kwargs)
+        return await sync_view(request, *args, **kwargs)
+
+    return dispatch
+
+
+UUID_PK = r'(?P<pk>[0-9a-fA-F-]{36})'
+
+# Адрес, async-представление и имя маршрута синхронного вьюсета.
+routes = (
+    (r'^tenders$', tender_list, 'tender-list'),
+    (r'^tenders/my$', tender_my, 'tender-my'),
+    (r'^tenders/facets$', tender_facets, 'tender-facets'),
+    (rf'^tenders/{UUID_PK}$', tender_detail, 'tender-detail'),
+    (rf'^tenders/{UUID_PK}/status$', tender_status, 'tender-status'),
+    (r'^bids/my$', bid_my, 'bid-my'),
+    (rf'^bids/{UUID_PK}/list$', bid_list, 'bid-lists'),
+    (rf'^bids/{UUID_PK}/reviews$', bid_reviews, 'bid-reviews'),
+)
@@ -0,0 +1,172 @@
+import copy
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Bid, Tender
+from .singleflight import single_flight
+
+
+def freshness(instance):
+    """Порядок версий записи в кэше. Смена статуса не увеличивает
+    version, поэтому учитывается и время изменения."""
+
+    return instance.version, instance.updatedAt
+
+
+class EntityCache:
+    """Двухуровневый кэш тендеров и предложений по первичному ключу.
+    Первый уровень - локальный кэш процесса (LocMemCache, алиас default)
+    с коротким временем жизни, второй - общий для процессов кэш (алиас
+    shared), если он настроен. Кэш заполняется при чтении, а после
+    записи в БД новое, перечитанное из БД состояние записывается в кэш
+    (или ключ удаляется, если запись сохранялась из экземпляра, который
+    мог быть взят из кэша, либо менялась одним UPDATE по множеству
+    строк).
+    При заполнении более свежая версия в кэше не перезаписывается
+    устаревшей, прочитанной параллельным запросом. Одновременные промахи
+    по одному ключу выполняют один запрос к БД."""
+
+    def __init__(self, prefix='entity'):
+        self.prefix = prefix
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def tiers(self):
+        tiers = [(caches['default'], settings.ENTITY_CACHE_LOCAL_TTL)]
+        if 'shared' in settings.CACHES:
+            tiers.append((caches['shared'], settings.ENTITY_CACHE_TTL))
+        return tiers
+
+    def key(self, model, pk):
+        return '%s:%s:%s' % (self.prefix, model._meta.label_lower, pk)
+
+    def count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, model, pk):
+        """Возвращает запись по первичному ключу либо выбрасывает
+        model.DoesNotExist, как model.objects.get(pk=pk)."""
+
+        try:
+            pk = uuid.UUID(str(pk))
+        except ValueError:
+            raise model.DoesNotExist
+        key = self.key(model, pk)
+        (local, _), *shared = self.tiers()
+        instance = local.get(key)
+        if instance is not None:
+            self.count('hits')
+            return instance
+        for tier, _ in shared:
+            instance = tier.get(key)
+            if instance is not None:
+                self.count('shared_hits')
+                local.set(key, instance, settings.ENTITY_CACHE_LOCAL_TTL)
+                return instance
+        self.count('misses')
+        instance, shared = single_flight.do(
+            key, lambda: model.objects.get(pk=pk))
+        if shared:
+            return copy.copy(instance)
+        self.fill(instance)
+        return instance
+
+    async def aget(self, model, pk):
+        """Асинхронный вариант get. Локальный уровень читается напрямую,
+        он в памяти процесса, общий - через асинхронный API кэша."""
+
+        try:
+            pk = uuid.UUID(str(pk))
+        except ValueError:
+            raise model.DoesNotExist
+        key = self.key(model, pk)
+        (local, _), *shared = self.tiers()
+        instance = local.get(key)
+        if instance is not None:
+            self.count('hits')
+            return instance
+        for tier, _ in shared:
+            instance = await tier.aget(key)
+            if instance is not None:
+                self.count('shared_hits')
+                local.set(key, instance, settings.ENTITY_CACHE_LOCAL_TTL)
+                return instance
+        self.count('misses')
+        instance = await model.objects.aget(pk=pk)
+        # add не перезаписывает значение, записанное за время запроса.
+        local.add(key, instance, settings.ENTITY_CACHE_LOCAL_TTL)
+        for tier, timeout in shared:
+            await tier.aadd(key, instance, timeout)
+        return instance
+
+    def fill(self, instance):
+        key = self.key(type(instance), instance.pk)
+        for tier, timeout in self.tiers():
+            current = tier.get(key)
+            if current is None or freshness(current) < freshness(instance):
+                tier.set(key, instance, timeout)
+
+    def put(self, instance):
+        """Записывает новое состояние после фиксации транзакции. Более
+        свежая версия, уже записанная в кэш другим запросом, не
+        перезаписывается."""
+
+        key = self.key(type(instance), instance.pk)
+
+        def write():
+            for tier, timeout in self.tiers():
+                current = tier.get(key)
+                if (current is None
+                        or freshness(current) <= freshness(instance)):
+                    tier.set(key, instance, timeout)
+
+        transaction.on_commit(write)
+
+    def invalidate(self, model, pks):
+        """Удаляет записи из кэша сразу и еще раз после фиксации
+        транзакции, чтобы не осталось значений, прочитанных до нее."""
+
+        keys = [self.key(model, pk) for pk in pks]
+        if not keys:
+            return
+
+        def delete():
+            for tier, _ in self.tiers():
+                tier.delete_many(keys)
+
+        delete()
+        transaction.on_commit(delete)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+            }
+
+
+entity_cache = EntityCache()
+
+
+def get_tender(pk):
+    return entity_cache.get(Tender, pk)
+
+
+def get_bid(pk):
+    """Предложение из кэша вместе с его тендером, тоже из кэша."""
+
+    bid = entity_cache.get(Bid, pk)
+    bid.tender = get_tender(bid.tender_id)
+    return bid
+
+
+async def aget_tender(pk):
+    return await entity_cache.aget(Tender, pk)
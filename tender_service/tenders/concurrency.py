@@ -0,0 +1,90 @@
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import entity_cache
+
+
+class VersionConflict(Exception):
+    """Запись изменена другим запросом: версия в БД не совпала
+    с ожидаемой."""
+
+
+def make_etag(instance):
+    """ETag записи по номеру версии и времени последнего изменения."""
+
+    return '"%s-%s"' % (
+        instance.version, int(instance.updatedAt.timestamp() * 1000000))
+
+
+def parse_if_match(request):
+    """Возвращает номер версии из заголовка If-Match или None, если
+    заголовок не передан либо равен '*'. Для сравнения используется
+    только версия, поэтому подходит ETag любого ответа этой версии."""
+
+    header = request.headers.get('If-Match', '').strip()
+    if not header or header == '*':
+        return None
+    etag = header.split(',')[0].strip()
+    if etag.startswith('W/'):
+        etag = etag[2:]
+    return int(etag.strip('"').split('-')[0])
+
+
+def update_values(validated_data):
+    """Приводит validated_data сериализатора к аргументам update():
+    версия меняется только сервером, связанные объекты передаются
+    первичными ключами."""
+
+    values = {}
+    for name, value in validated_data.items():
+        if name == 'version':
+            continue
+        if name.endswith('_id') and isinstance(value, models.Model):
+            value = value.pk
+        values[name] = value
+    return values
+
+
+def conditional_update(instance, values, expected_version=None, attempts=3):
+    """Одним запросом UPDATE ... WHERE version = N применяет значения и
+    увеличивает версию. Если клиент передал ожидаемую версию, она
+    проверяется только в WHERE, а не по экземпляру: экземпляр может быть
+    взят из кэша и отставать от БД. После обновления запись целиком
+    перечитывается в той же транзакции, пока строка заблокирована
+    UPDATE: поля, измененные без смены версии (статус), в экземпляре
+    могут быть устаревшими, а он попадает в кэш и в историю версий.
+    Если строка не обновилась, удаленная запись дает model.DoesNotExist,
+    измененная - VersionConflict. Без ожидаемой версии попытка
+    повторяется с версией из БД, так что две параллельные правки никогда
+    не получают одинаковый номер версии."""
+
+    model = type(instance)
+    for _ in range(attempts):
+        version = instance.version
+        if expected_version is not None:
+            version = expected_version
+        with transaction.atomic():
+            updated = model.objects.filter(
+                pk=instance.pk, version=version).update(
+                version=F('version') + 1, updatedAt=timezone.now(), **values)
+            try:
+                instance.refresh_from_db()
+            except model.DoesNotExist:
+                entity_cache.invalidate(model, [instance.pk])
+                raise
+            if updated:
+                entity_cache.put(instance)
+                return instance
+        if expected_version is not None:
+            raise VersionConflict
+    raise VersionConflict
+
+
+def versioned_update(instance, values, store, expected_version=None):
+    """Обновляет запись и сохраняет новую версию в одной транзакции."""
+
+    with transaction.atomic():
+        conditional_update(instance, values, expected_version)
+        store.record(instance)
+    return instance
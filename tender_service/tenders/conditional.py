@@ -0,0 +1,67 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .concurrency import make_etag
+
+
+def detail_validators(instance):
+    """ETag и время изменения записи: по версии и updatedAt."""
+
+    return make_etag(instance), int(instance.updatedAt.timestamp())
+
+
+def fingerprint_query(queryset):
+    return queryset.order_by(), {
+        'count': Count('pk'), 'last': Max('updatedAt')}
+
+
+def fingerprint_validators(request, fingerprint):
+    """ETag списка. Last-Modified у списков нет: максимальное updatedAt
+    не меняется, когда запись уходит из выборки, и If-Modified-Since
+    вернул бы 304 для изменившегося списка. Число записей в ETag такое
+    удаление учитывает."""
+
+    last = fingerprint['last']
+    stamp = int(last.timestamp() * 1000000) if last else 0
+    digest = hashlib.blake2b(
+        request.get_full_path().encode(), digest_size=8).hexdigest()
+    etag = 'W/"%s-%s-%s"' % (fingerprint['count'], stamp, digest)
+    return etag, None
+
+
+def list_validators(request, queryset):
+    """ETag списка по агрегату одним запросом: число записей и время
+    последнего изменения. Добавление и удаление меняют число записей,
+    любое изменение записи - ее updatedAt.
+    Параметры запроса (фильтры, пользователь, страница) входят в ETag
+    через хэш, поэтому разные выборки не совпадают по ETag."""
+
+    queryset, aggregates = fingerprint_query(queryset)
+    return fingerprint_validators(
+        request, queryset.aggregate(**aggregates))
+
+
+async def alist_validators(request, queryset):
+    """Асинхронный вариант list_validators."""
+
+    queryset, aggregates = fingerprint_query(queryset)
+    return fingerprint_validators(
+        request, await queryset.aaggregate(**aggregates))
+
+
+def not_modified(request, etag, last_modified):
+    """Ответ 304 (или 412 для If-Match), если по заголовкам запроса
+    у клиента актуальные данные, иначе None."""
+
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class DirectoryGeneration:
+    """Поколение справочников (организации, сотрудники, ответственные),
+    общее для процессов через кэш shared. Массовая синхронизация меняет
+    таблицы без сигналов моделей и увеличивает поколение, а каждый
+    процесс не чаще раза в interval секунд сверяет его и, если оно
+    изменилось, сбрасывает кэш сотрудников и индекс ответственных.
+    Без общего кэша изменения видны процессам по истечении TTL кэшей."""
+
+    key = 'directory:generation'
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._callbacks = []
+        self._seen = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """Регистрирует сброс кэша процесса, зависящего от справочников."""
+
+        self._callbacks.append(callback)
+        return callback
+
+    def shared(self):
+        return caches['shared'] if 'shared' in settings.CACHES else None
+
+    def notify(self):
+        for callback in self._callbacks:
+            callback()
+
+    def due(self):
+        """Пора ли сверить поколение: не чаще раза в interval секунд
+        и только при настроенном общем кэше."""
+
+        checked_at = self._checked_at
+        now = time.monotonic()
+        if checked_at is not None and now - checked_at < self.interval:
+            return False
+        with self._lock:
+            if self._checked_at != checked_at:
+                return False
+            self._checked_at = now
+        return self.shared() is not None
+
+    def update(self, current):
+        changed = self._seen is not None and current != self._seen
+        self._seen = current
+        if changed:
+            self.notify()
+
+    def check(self):
+        if self.due():
+            self.update(self.shared().get(self.key, 0))
+
+    async def acheck(self):
+        """Асинхронный вариант check для async-представлений: общий кэш
+        читается через асинхронный API и не блокирует цикл событий."""
+
+        if self.due():
+            self.update(await self.shared().aget(self.key, 0))
+
+    def bump(self):
+        """Сообщает процессам об изменении справочников и сразу сбрасывает
+        кэши текущего процесса."""
+
+        cache = self.shared()
+        if cache is not None:
+            cache.add(self.key, 0, timeout=None)
+            self._seen = cache.incr(self.key)
+        self.notify()
+
+
+directory = DirectoryGeneration(
+    interval=getattr(settings, 'DIRECTORY_CHECK_INTERVAL', 5))
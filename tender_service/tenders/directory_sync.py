@@ -0,0 +1,305 @@
+import csv
+import itertools
+import json
+import uuid
+
+from django.db import connection, transaction
+
+from .directory import directory
+from .models import Employee, Organization, OrganizationResponsible
+from .seeding import copy_into
+
+# Строк снимка в одном COPY: память не растет с размером файла.
+COPY_BATCH = 50000
+
+
+class SnapshotError(ValueError):
+    """Ошибка в файле снимка или отказ применять его."""
+
+
+def as_uuid(value):
+    return str(uuid.UUID(str(value)))
+
+
+def as_text(value):
+    return '' if value is None else str(value)
+
+
+def as_required(value):
+    value = as_text(value).strip()
+    if not value:
+        raise ValueError('пустое значение')
+    return value
+
+
+def as_choice(choices):
+    allowed = {value for value, _ in choices}
+
+    def convert(value):
+        if value not in allowed:
+            raise ValueError(f'недопустимое значение {value!r}')
+        return value
+    return convert
+
+
+def as_optional_uuid(value):
+    return as_uuid(value) if value else str(uuid.uuid4())
+
+
+def read_snapshot(path):
+    """Записи снимка как словари: NDJSON для файлов .ndjson и .jsonl,
+    иначе CSV с заголовком. Файл читается построчно."""
+
+    if path.endswith(('.ndjson', '.jsonl')):
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, newline='', encoding='utf-8') as file:
+            yield from csv.DictReader(file)
+
+
+class Table:
+    """Справочник, синхронизируемый из снимка. fields - пары (столбец,
+    преобразование значения из файла), первым идет ключ. Снимок
+    загружается через COPY во временную таблицу, затем изменения
+    применяются несколькими запросами над всем набором сразу."""
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+
+    @property
+    def name(self):
+        return self.model._meta.db_table
+
+    @property
+    def columns(self):
+        return [column for column, _ in self.fields]
+
+    def quote(self, name):
+        return connection.ops.quote_name(name)
+
+    @property
+    def target(self):
+        return self.quote(self.name)
+
+    @property
+    def staging(self):
+        return self.quote(f'sync_{self.name}')
+
+    def rows(self, path):
+        for number, record in enumerate(read_snapshot(path), 1):
+            try:
+                yield tuple(convert(record.get(column))
+                            for column, convert in self.fields)
+            except (ValueError, TypeError, AttributeError) as error:
+                raise SnapshotError(f'{path}, запись {number}: {error}')
+
+    def load(self, cursor, path):
+        """Загружает снимок во временную таблицу с типами столбцов
+        целевой таблицы. Возвращает число записей."""
+
+        columns = ', '.join(self.quote(column) for column in self.columns)
+        cursor.execute(
+            f'CREATE TEMP TABLE {self.staging} ON COMMIT DROP AS '
+            f'SELECT {columns} FROM {self.target} WITH NO DATA')
+        rows = self.rows(path)
+        total = 0
+        while True:
+            batch = list(itertools.islice(rows, COPY_BATCH))
+            if not batch:
+                break
+            total += copy_into(
+                cursor, f'sync_{self.name}', self.columns, batch)
+        # Временные таблицы не анализируются автоматически, без
+        # статистики планировщик считает их пустыми.
+        cursor.execute(f'ANALYZE {self.staging}')
+        return total
+
+    def references(self):
+        """Таблицы и столбцы, ссылающиеся на справочник."""
+
+        for field in self.model._meta.get_fields(include_hidden=True):
+            if field.auto_created and not field.concrete and (
+                    field.one_to_many or field.one_to_one):
+                yield (field.related_model._meta.db_table,
+                       field.field.column)
+
+    def delete(self, cursor, max_ratio):
+        """Удаляет записи, которых нет в снимке. Записи, на которые
+        ссылаются другие таблицы (тендеры, предложения, отзывы), не
+        удаляются и возвращаются как kept. Если удалить нужно больше
+        max_ratio записей таблицы, снимок считается неполным."""
+
+        missing = (f'NOT EXISTS (SELECT 1 FROM {self.staging} s '
+                   f'WHERE {self.match("s", "t")})')
+        cursor.execute(f'SELECT count(*), count(*) FILTER (WHERE {missing}) '
+                       f'FROM {self.target} t')
+        total, candidates = cursor.fetchone()
+        if candidates > total * max_ratio:
+            raise SnapshotError(
+                f'{self.name}: снимок удаляет {candidates} из {total} '
+                f'записей, больше допустимой доли {max_ratio}.')
+        guards = ''.join(
+            f' AND NOT EXISTS (SELECT 1 FROM {self.quote(table)} r '
+            f'WHERE r.{self.quote(column)} = t.{self.quote("id")})'
+            for table, column in self.references())
+        cursor.execute(
+            f'DELETE FROM {self.target} t WHERE {missing}{guards}')
+        return {'deleted': cursor.rowcount,
+                'kept': candidates - cursor.rowcount}
+
+    def match(self, source, target):
+        key = self.quote(self.columns[0])
+        return f'{source}.{key} = {target}.{key}'
+
+
+class UpsertTable(Table):
+    """Справочник с ключом id: новые записи вставляются, изменившиеся
+    обновляются, совпадающие не трогаются. unique - уникальные столбцы
+    кроме ключа: записи снимка, нарушающие их уникальность, не
+    применяются и возвращаются как rejected."""
+
+    timestamps = ('created_at', 'updated_at')
+
+    def __init__(self, model, fields, unique=()):
+        super().__init__(model, fields)
+        self.unique = unique
+
+    def reject(self, cursor):
+        """Убирает из временной таблицы записи, значение уникального
+        столбца которых занято в БД записью с другим ключом или
+        повторяется в снимке у разных ключей (кроме записи, у которой
+        это значение уже есть в БД). Иначе ON CONFLICT по ключу завершился
+        бы ошибкой уникальности и откатил весь снимок. Вызывается после
+        удалений, поэтому значение удаленной записи может достаться
+        новой. Возвращает число убранных записей."""
+
+        if not self.unique:
+            return 0
+        key = self.quote(self.columns[0])
+        conditions = []
+        for column in (self.quote(column) for column in self.unique):
+            same = f'WHERE t.{column} = s.{column} AND t.{key}'
+            conditions.append(
+                f'EXISTS (SELECT 1 FROM {self.target} t {same} <> s.{key}) '
+                f'OR (EXISTS (SELECT 1 FROM {self.staging} t '
+                f'{same} <> s.{key}) AND NOT EXISTS (SELECT 1 '
+                f'FROM {self.target} t {same} = s.{key}))')
+        cursor.execute(
+            f'DELETE FROM {self.staging} s WHERE {" OR ".join(conditions)}')
+        return cursor.rowcount
+
+    def apply(self, cursor):
+        rejected = self.reject(cursor)
+        key, *values = [self.quote(column) for column in self.columns]
+        created, updated = [self.quote(column) for column in self.timestamps]
+        current = ', '.join(f'{self.target}.{column}' for column in values)
+        incoming = ', '.join(f'EXCLUDED.{column}' for column in values)
+        assignments = ', '.join(
+            f'{column} = EXCLUDED.{column}' for column in values + [updated])
+        cursor.execute(
+            f'WITH changed AS ('
+            f'INSERT INTO {self.target} ({key}, {", ".join(values)}, '
+            f'{created}, {updated}) '
+            f'SELECT DISTINCT ON ({key}) {key}, {", ".join(values)}, '
+            f'now(), now() FROM {self.staging} ORDER BY {key} '
+            f'ON CONFLICT ({key}) DO UPDATE SET {assignments} '
+            f'WHERE ({current}) IS DISTINCT FROM ({incoming}) '
+            f'RETURNING xmax = 0 AS inserted) '
+            f'SELECT count(*) FILTER (WHERE inserted), '
+            f'count(*) FILTER (WHERE NOT inserted) FROM changed')
+        inserted, updated = cursor.fetchone()
+        report = {'inserted': inserted, 'updated': updated}
+        if self.unique:
+            report['rejected'] = rejected
+        return report
+
+
+class LinkTable(Table):
+    """Связи организация - ответственный. Ключ - пара столбцов, id из
+    снимка используется только для новых связей. Связи с организацией
+    или сотрудником, которых нет в БД, пропускаются (skipped)."""
+
+    def match(self, source, target):
+        return ' AND '.join(
+            f'{source}.{self.quote(column)} = {target}.{self.quote(column)}'
+            for column in self.columns[1:])
+
+    def apply(self, cursor):
+        key, organization, user = [
+            self.quote(column) for column in self.columns]
+        pk = self.quote('id')
+        known = (f'EXISTS (SELECT 1 FROM {ORGANIZATIONS.target} o '
+                 f'WHERE o.{pk} = s.{organization}) AND EXISTS (SELECT 1 '
+                 f'FROM {EMPLOYEES.target} e WHERE e.{pk} = s.{user})')
+        cursor.execute(
+            f'WITH added AS ('
+            f'INSERT INTO {self.target} ({key}, {organization}, {user}) '
+            f'SELECT DISTINCT ON (s.{organization}, s.{user}) s.{key}, '
+            f's.{organization}, s.{user} FROM {self.staging} s '
+            f'WHERE {known} AND NOT EXISTS (SELECT 1 FROM {self.target} t '
+            f'WHERE {self.match("s", "t")}) '
+            f'ORDER BY s.{organization}, s.{user} RETURNING 1) '
+            f'SELECT (SELECT count(*) FROM added), '
+            f'(SELECT count(*) FROM {self.staging} s WHERE NOT ({known}))')
+        inserted, skipped = cursor.fetchone()
+        return {'inserted': inserted, 'skipped': skipped}
+
+
+ORGANIZATIONS = UpsertTable(Organization, (
+    ('id', as_uuid),
+    ('name', as_required),
+    ('description', as_text),
+    ('type', as_choice(Organization.ORGANIZATION_TYPE_CHOICES)),
+))
+EMPLOYEES = UpsertTable(Employee, (
+    ('id', as_uuid),
+    ('username', as_required),
+    ('first_name', as_text),
+    ('last_name', as_text),
+), unique=('username',))
+RESPONSIBLES = LinkTable(OrganizationResponsible, (
+    ('id', as_optional_uuid),
+    ('organization_id', as_uuid),
+    ('user_id', as_uuid),
+))
+# Порядок вставки и обновления: связи после организаций и сотрудников.
+# Удаления идут раньше и в обратном порядке: сначала лишние связи, затем
+# сотрудники и организации, чтобы username удаленного сотрудника мог
+# достаться новому.
+TABLES = (ORGANIZATIONS, EMPLOYEES, RESPONSIBLES)
+
+
+def sync(snapshots, delete=True, max_delete_ratio=0.1, dry_run=False):
+    """Синхронизирует справочники со снимками. snapshots - словарь
+    таблица -> путь к файлу, таблицы без файла не меняются. Все
+    изменения выполняются в одной транзакции. Возвращает отчет
+    {имя таблицы: {loaded, inserted, updated, deleted, ...}}.
+    После фиксации изменений сбрасывает кэши справочников во всех
+    процессах."""
+
+    if connection.vendor != 'postgresql':
+        raise SnapshotError('Синхронизация через COPY поддерживается '
+                            'только для PostgreSQL.')
+    tables = [table for table in TABLES if table in snapshots]
+    report = {table.name: {} for table in tables}
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in tables:
+            report[table.name]['loaded'] = table.load(
+                cursor, snapshots[table])
+        if delete:
+            for table in reversed(tables):
+                report[table.name].update(
+                    table.delete(cursor, max_delete_ratio))
+        for table in tables:
+            report[table.name].update(table.apply(cursor))
+        if dry_run:
+            transaction.set_rollback(True)
+        elif any(count for counts in report.values()
+                 for name, count in counts.items()
+                 if name in ('inserted', 'updated', 'deleted')):
+            transaction.on_commit(directory.bump)
+    return report
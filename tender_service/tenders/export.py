@@ -0,0 +1,179 @@
+import csv
+import json
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Bid, BidVersion, Tender, TenderVersion
+from .serializers import (BidProjection, BidVersionProjection,
+                          TenderProjection, TenderVersionProjection)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+# Строки отдаются клиенту пакетами примерно такого размера в байтах.
+BUFFER_SIZE = 64 * 1024
+
+
+class Export:
+    """Потоковая выгрузка тендеров, предложений или их истории версий.
+    Строки читаются итератором по серверному курсору пакетами по
+    chunk_size и сразу сериализуются, поэтому память не зависит от
+    размера выгрузки. Для истории (owner - поле владельца в модели
+    версий) фильтры по статусу и организации применяются к владельцу,
+    а updatedSince - к времени создания версии."""
+
+    def __init__(self, name, model, projection, organization, owner=None):
+        self.name = name
+        self.model = model
+        self.projection = projection
+        self.organization = organization
+        self.owner = owner
+
+    @property
+    def statuses(self):
+        owner = (self.model if self.owner is None
+                 else self.model._meta.get_field(self.owner).related_model)
+        return {value for value, _ in owner.STATUS_CHOICES}
+
+    def parse(self, status=None, organization=None, updated_since=None):
+        """Проверяет значения фильтров, ValueError при неверном формате.
+        status - один статус или несколько через запятую."""
+
+        statuses = [value for value in (status or '').split(',') if value]
+        if not set(statuses) <= self.statuses:
+            raise ValueError('status')
+        if organization:
+            organization = uuid.UUID(organization)
+        since = None
+        if updated_since:
+            since = parse_datetime(updated_since)
+            if since is None:
+                raise ValueError('updatedSince')
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+        return {'statuses': statuses, 'organization': organization,
+                'since': since}
+
+    def rows(self, owners, statuses=(), organization=None, since=None):
+        """Строки выгрузки. owners - кверисет доступных тендеров или
+        предложений, для истории выгружаются их версии. Порядок не
+        задается: сортировка всей таблицы на стороне БД не нужна."""
+
+        if statuses:
+            owners = owners.filter(status__in=statuses)
+        if organization:
+            owners = owners.filter(**{self.organization: organization})
+        if self.owner is None:
+            queryset = owners
+            if since:
+                queryset = queryset.filter(updatedAt__gte=since)
+        else:
+            queryset = self.model.objects.filter(
+                **{f'{self.owner}__in': owners.values('pk')})
+            if since:
+                queryset = queryset.filter(createdAt__gte=since)
+        return self.projection.project(queryset.order_by())
+
+
+TENDERS = Export('tenders', Tender, TenderProjection, 'organization_id')
+TENDER_HISTORY = Export('tender_versions', TenderVersion,
+                        TenderVersionProjection, 'organization_id',
+                        owner='tender')
+# Организация предложения - организация тендера, на который оно подано.
+BIDS = Export('bids', Bid, BidProjection, 'tender__organization_id')
+BID_HISTORY = Export('bid_versions', BidVersion, BidVersionProjection,
+                     'tender__organization_id', owner='bid')
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(
+        data, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def ndjson_lines(projection, rows):
+    convert = projection().to_representation
+    for row in rows:
+        yield dumps(convert(row)) + b'\n'
+
+
+class Echo:
+    """Файл для csv.writer, который возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def csv_cell(value):
+    if isinstance(value, (dict, list, bool)):
+        return dumps(value).decode()
+    return value
+
+
+def csv_lines(projection, rows):
+    writer = csv.writer(Echo())
+    convert = projection().to_representation
+    yield writer.writerow([name for name, _, _ in projection.fields]).encode()
+    for row in rows:
+        yield writer.writerow(
+            [csv_cell(value) for value in convert(row).values()]).encode()
+
+
+def buffered(lines, size=BUFFER_SIZE):
+    chunk, length = [], 0
+    for line in lines:
+        chunk.append(line)
+        length += len(line)
+        if length >= size:
+            yield b''.join(chunk)
+            chunk, length = [], 0
+    if chunk:
+        yield b''.join(chunk)
+
+
+def stream(queryset, projection, output, chunk_size=None):
+    """Байты выгрузки в формате output пакетами по BUFFER_SIZE."""
+
+    rows = queryset.iterator(
+        chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE)
+    lines = {'ndjson': ndjson_lines, 'csv': csv_lines}[output]
+    return buffered(lines(projection, rows))
+
+
+async def iterate_in_thread(chunks):
+    """Отдает синхронный генератор async-ответу по одному пакету.
+    Без этого Django под ASGI сначала читает весь генератор в список.
+    Пакеты читаются в потоке запроса, где открыт серверный курсор."""
+
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def streaming_response(request, export, queryset, output):
+    chunks = stream(queryset, export.projection, output)
+    if isinstance(request, ASGIRequest):
+        chunks = iterate_in_thread(chunks)
+    response = StreamingHttpResponse(chunks, content_type=FORMATS[output])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{export.name}.{output}"')
+    return response
@@ -0,0 +1,105 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, UUIDField, Value, When
+
+from .models import Tender, TenderFacet
+from .visibility import PUBLISHED, tender_facets_for
+
+# Поля ответа и столбцы счетчиков.
+DIMENSIONS = (
+    ('serviceType', 'service_type'),
+    ('status', 'status'),
+    ('organizationId', 'organization_id'),
+)
+KEY = ('creator_id', 'service_type', 'status', 'organization_id')
+
+
+def summarize(rows):
+    """Ответ эндпоинта tenders/facets из строк счетчиков: общее число
+    тендеров и число по каждому значению поля, по убыванию."""
+
+    counters = {name: Counter() for name, _ in DIMENSIONS}
+    total = 0
+    for row in rows:
+        total += row['count']
+        for name, column in DIMENSIONS:
+            counters[name][str(row[column])] += row['count']
+    data = {'total': total}
+    for name, counter in counters.items():
+        data[name] = [
+            {'value': value, 'count': count}
+            for value, count in sorted(
+                counter.items(), key=lambda item: (-item[1], item[0]))]
+    return data
+
+
+def facet_rows(user):
+    """Строки счетчиков тендеров, доступных пользователю. Читается
+    только таблица счетчиков, а не таблица тендеров."""
+
+    return tender_facets_for(user).filter(count__gt=0).values(
+        *(column for _, column in DIMENSIONS), 'count')
+
+
+def facets_for(user):
+    return summarize(facet_rows(user))
+
+
+def expected():
+    """Счетчики, посчитанные по таблице тендеров: {ключ: число}."""
+
+    owner = Case(When(status=PUBLISHED, then=Value(None)),
+                 default=F('creator_id'), output_field=UUIDField())
+    rows = Tender.objects.order_by().annotate(owner=owner).values(
+        'owner', 'service_type', 'status', 'organization_id').annotate(
+        total=Count('pk'))
+    return {
+        (row['owner'], row['service_type'], row['status'],
+         row['organization_id']): row['total']
+        for row in rows}
+
+
+def stored():
+    return {
+        tuple(row[:-1]): row[-1] for row in
+        TenderFacet.objects.filter(count__gt=0).values_list(*KEY, 'count')}
+
+
+def lock_tenders():
+    """Запрещает изменения тендеров до конца транзакции, чтение
+    не блокируется."""
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'LOCK TABLE %s IN SHARE MODE'
+                % connection.ops.quote_name(Tender._meta.db_table))
+
+
+def differences():
+    """Ключи, у которых счетчик расходится с таблицей тендеров:
+    {ключ: (в счетчиках, по тендерам)}."""
+
+    with transaction.atomic():
+        lock_tenders()
+        actual, target = stored(), expected()
+    return {
+        key: (actual.get(key, 0), target.get(key, 0))
+        for key in actual.keys() | target.keys()
+        if actual.get(key, 0) != target.get(key, 0)}
+
+
+def rebuild():
+    """Пересчитывает счетчики по таблице тендеров. Нужен после
+    изменений в обход триггеров (TRUNCATE, отключенные триггеры).
+    Возвращает число строк счетчиков."""
+
+    with transaction.atomic():
+        lock_tenders()
+        TenderFacet.objects.all().delete()
+        facets = TenderFacet.objects.bulk_create(
+            [TenderFacet(**dict(zip(KEY, key)), count=count)
+             for key, count in expected().items()],
+            batch_size=1000)
+    return len(facets)
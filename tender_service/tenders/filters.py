@@ -0,0 +1,121 @@
+from django import forms
+from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+
+from .models import Bid, Tender
+from .pagination import ordering_keys
+
+INVALID_PARAMS = {'error': 'Неверный формат запроса или его параметры.'}
+# Поля параметра ordering. Для каждого есть индексы по (поле, id) для
+# опубликованных записей и по (автор, поле, id), см. модели.
+ORDERING_FIELDS = ('createdAt', 'name', 'updatedAt')
+
+
+class MultiValueWidget(forms.TextInput):
+    """Несколько значений параметра: повтором (?status=A&status=B)
+    или через запятую (?status=A,B)."""
+
+    def value_from_datadict(self, data, files, name):
+        values = (data.getlist(name) if hasattr(data, 'getlist')
+                  else [data.get(name)])
+        return [part.strip() for value in values if value
+                for part in value.split(',') if part.strip()]
+
+
+class MultiValueField(forms.Field):
+    """Список значений, каждое проверяется полем child."""
+
+    widget = MultiValueWidget
+
+    def __init__(self, *args, child=None, **kwargs):
+        self.child = child or forms.CharField()
+        super().__init__(*args, **kwargs)
+
+    def clean(self, value):
+        return super().clean(
+            list(dict.fromkeys(self.child.clean(item) for item in value)))
+
+
+class InFilter(filters.Filter):
+    """Фильтр по одному или нескольким значениям: равенство для одного
+    значения и одно условие IN для нескольких."""
+
+    field_class = MultiValueField
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('lookup_expr', 'in')
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if len(value or ()) == 1:
+            return qs.filter(**{self.field_name: value[0]})
+        return super().filter(qs, value)
+
+
+def ordering_choices(fields):
+    return [(value, value) for field in fields
+            for value in (field, '-' + field)]
+
+
+class ListFilterSet(filters.FilterSet):
+    """Общие фильтры списков: статус, диапазоны createdAt и version и
+    порядок из белого списка ORDERING_FIELDS. Порядок дополняется id,
+    поэтому он однозначен и совпадает с ключом курсорной пагинации."""
+
+    ordering_fields = ORDERING_FIELDS
+
+    createdAt = filters.IsoDateTimeFromToRangeFilter(field_name='createdAt')
+    version = InFilter(child=forms.IntegerField(min_value=1))
+    version_min = filters.NumberFilter(
+        field_name='version', lookup_expr='gte')
+    version_max = filters.NumberFilter(
+        field_name='version', lookup_expr='lte')
+    ordering = filters.ChoiceFilter(
+        choices=ordering_choices(ORDERING_FIELDS), method='order')
+
+    def order(self, queryset, name, value):
+        return queryset.order_by(*ordering_keys(value, self.ordering_fields))
+
+
+class TenderFilter(ListFilterSet):
+    service_type = InFilter(child=forms.CharField(max_length=50))
+    status = InFilter(child=forms.ChoiceField(choices=Tender.STATUS_CHOICES))
+    organizationId = InFilter(
+        field_name='organization_id', child=forms.UUIDField())
+
+    class Meta:
+        model = Tender
+        fields = ()
+
+
+class BidFilter(ListFilterSet):
+    status = InFilter(child=forms.ChoiceField(choices=Bid.STATUS_CHOICES))
+    tenderId = InFilter(field_name='tender_id', child=forms.UUIDField())
+    organizationId = InFilter(
+        field_name='organization_id', child=forms.UUIDField())
+    authorType = InFilter(
+        child=forms.ChoiceField(choices=Bid.AUTHOR_TYPE_CHOICES))
+
+    class Meta:
+        model = Bid
+        fields = ()
+
+
+class FilterBackend(filters.DjangoFilterBackend):
+    """DjangoFilterBackend с ошибкой в формате остальных ответов API."""
+
+    def filter_queryset(self, request, queryset, view):
+        try:
+            return super().filter_queryset(request, queryset, view)
+        except ValidationError:
+            raise ValidationError(INVALID_PARAMS)
+
+
+def filter_list(filterset_class, params, queryset):
+    """Фильтры и порядок для async-представлений. Возвращает None,
+    если параметры неверны."""
+
+    filterset = filterset_class(params, queryset=queryset)
+    if not filterset.is_valid():
+        return None
+    return filterset.qs
@@ -0,0 +1,67 @@
+import time
+
+from django.db import DatabaseError, connections
+
+from .routers import PRIMARY, routing_stats
+
+
+def pool_stats(connection):
+    """Состояние пула соединений psycopg 3 или None, если пул не
+    используется."""
+
+    pool = getattr(connection, 'pool', None)
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    size = stats.get('pool_size', 0)
+    idle = stats.get('pool_available', 0)
+    return {
+        'min': stats.get('pool_min'),
+        'max': stats.get('pool_max'),
+        'size': size,
+        'inUse': size - idle,
+        'idle': idle,
+        'waiting': stats.get('requests_waiting', 0),
+        'requests': stats.get('requests_num', 0),
+        'waitMs': stats.get('requests_wait_ms', 0),
+        'timeouts': stats.get('requests_errors', 0),
+        'connectionErrors': stats.get('connections_errors', 0),
+        'connectionsLost': stats.get('connections_lost', 0),
+    }
+
+
+def database_status(alias='default'):
+    """Проверяет соединение с БД запросом SELECT 1 и возвращает время
+    ответа и состояние пула."""
+
+    connection = connections[alias]
+    report = {
+        'alias': alias,
+        'role': 'primary' if alias == PRIMARY else 'replica',
+        'vendor': connection.vendor,
+    }
+    start = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except DatabaseError as error:
+        report.update(status='error', error=str(error).strip())
+    else:
+        report['status'] = 'ok'
+    report['latencyMs'] = round((time.perf_counter() - start) * 1000, 2)
+    report['pool'] = pool_stats(connection)
+    if report['pool'] is None:
+        report['connMaxAge'] = connection.settings_dict['CONN_MAX_AGE']
+    return report
+
+
+def health_report():
+    databases = [database_status(alias) for alias in connections]
+    status = 'ok' if all(
+        database['status'] == 'ok' for database in databases) else 'error'
+    return {
+        'status': status,
+        'databases': databases,
+        'routing': routing_stats.snapshot(),
+    }
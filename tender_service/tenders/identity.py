@@ -0,0 +1,141 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .directory import directory
+from .models import Employee
+from .singleflight import single_flight
+
+
+class EmployeeCache:
+    """Общий для процесса LRU-кэш сотрудников по username.
+    Запись живет не дольше ttl секунд, размер ограничен maxsize.
+    Кэшируется и отсутствие сотрудника, поэтому повторные запросы
+    с несуществующим username тоже не ходят в БД. Записи сбрасываются
+    сигналами сохранения и удаления модели Employee, а после массовой
+    синхронизации справочников весь кэш сбрасывается (см. directory)."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def lookup(self, username):
+        """Ищет сотрудника в кэше. Возвращает (найден ли, сотрудник или
+        None, поколение кэша на момент поиска). Поколение справочников
+        сверяет вызывающий метод."""
+
+        with self._lock:
+            entry = self._data.get(username)
+            if entry is not None and entry[0] > time.monotonic():
+                self._data.move_to_end(username)
+                self.hits += 1
+                return True, entry[1], self._generation
+            self.misses += 1
+            return False, None, self._generation
+
+    def store(self, username, employee, generation):
+        with self._lock:
+            # Если пока шел запрос сработала инвалидация, результат
+            # мог устареть и в кэш не попадает.
+            if generation == self._generation:
+                self._data[username] = (time.monotonic() + self.ttl, employee)
+                self._data.move_to_end(username)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+    def get(self, username):
+        """Возвращает копию сотрудника либо выбрасывает
+        Employee.DoesNotExist, как Employee.objects.get."""
+
+        if not username:
+            raise Employee.DoesNotExist
+        directory.check()
+        found, employee, generation = self.lookup(username)
+        if not found:
+            employee, _ = single_flight.do(
+                ('employee', username),
+                lambda: Employee.objects.filter(username=username).first())
+            self.store(username, employee, generation)
+        if employee is None:
+            raise Employee.DoesNotExist
+        return copy.copy(employee)
+
+    async def aget(self, username):
+        """Асинхронный вариант get для async-представлений."""
+
+        if not username:
+            raise Employee.DoesNotExist
+        await directory.acheck()
+        found, employee, generation = self.lookup(username)
+        if not found:
+            employee = await Employee.objects.filter(
+                username=username).afirst()
+            self.store(username, employee, generation)
+        if employee is None:
+            raise Employee.DoesNotExist
+        return copy.copy(employee)
+
+    def invalidate(self, employee):
+        with self._lock:
+            self._generation += 1
+            self._data.pop(employee.username, None)
+            stale = [
+                username for username, (_, cached) in self._data.items()
+                if cached is not None and cached.pk == employee.pk
+            ]
+            for username in stale:
+                del self._data[username]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+
+employee_cache = EmployeeCache(
+    maxsize=getattr(settings, 'EMPLOYEE_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'EMPLOYEE_CACHE_TTL', 60),
+)
+directory.subscribe(employee_cache.clear)
+
+
+USER_ERROR = {'error': 'Пользователь не существует или некорректен.'}
+
+
+class UnknownEmployee(APIException):
+    """Сотрудник с переданным username не найден. Не перехваченная
+    во вьюсете, дает ответ 401 в формате ошибок API."""
+
+    status_code = status.HTTP_401_UNAUTHORIZED
+    default_detail = USER_ERROR
+
+
+class EmployeeResolverMixin:
+    """Примесь для вьюсетов: определяет сотрудника по username один раз
+    за запрос, повторные обращения в рамках запроса берутся из памяти,
+    а между запросами из общего кэша процесса. Неизвестный сотрудник
+    дает UnknownEmployee, то есть 401 и там, где исключение не
+    перехвачено, например в get_queryset списка и карточки."""
+
+    def get_employee(self, username):
+        resolved = getattr(self.request, '_resolved_employees', None)
+        if resolved is None:
+            resolved = self.request._resolved_employees = {}
+        if username not in resolved:
+            try:
+                resolved[username] = employee_cache.get(username)
+            except Employee.DoesNotExist:
+                resolved[username] = None
+        if resolved[username] is None:
+            raise UnknownEmployee
+        return resolved[username]
@@ -0,0 +1,281 @@
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tenders.seeding import Layout
+
+# Смесь эндпоинтов по умолчанию: имя, вес и шаблон пути. Подстановки
+# берутся из раскладки seed_data, см. Endpoint.path.
+DEFAULT_MIX = (
+    ('tenders', 30, '/api/tenders?username={username}&limit=20'),
+    ('tenders_by_service_type', 10,
+     '/api/tenders?service_type={service_type}&limit=20'),
+    ('tenders_my', 10, '/api/tenders/my?username={tender_creator}&limit=20'),
+    ('tender_status', 15,
+     '/api/tenders/{tender}/status?username={tender_creator}'),
+    ('bids_list', 15, '/api/bids/{tender}/list?username={tender_creator}'),
+    ('bids_my', 10, '/api/bids/my?username={bid_author}&limit=20'),
+    ('bid_status', 10, '/api/bids/{bid}/status?username={bid_author}'),
+)
+SERVICE_TYPES = ('Construction', 'Delivery', 'Manufacture')
+
+
+def percentile(values, q):
+    """Перцентиль q (0..100) по отсортированному списку."""
+
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))
+    return values[index]
+
+
+class Mix:
+    """Взвешенная смесь эндпоинтов. Пути строятся по раскладке тестовых
+    данных seed_data: {tender} и {tender_creator} - случайный тендер и его
+    автор, {bid} и {bid_author} - предложение и его автор, {username} -
+    случайный сотрудник, {organization}, {service_type}."""
+
+    def __init__(self, endpoints, layout, seed=0):
+        self.names = [name for name, _, _ in endpoints]
+        self.weights = [weight for _, weight, _ in endpoints]
+        self.templates = dict(
+            (name, template) for name, _, template in endpoints)
+        self.layout = layout
+        self.random = random.Random(seed)
+
+    def values(self):
+        layout, rng = self.layout, self.random
+        tender = rng.randrange(max(layout.tenders, 1))
+        bid = rng.randrange(max(layout.bids, 1))
+        return {
+            'username': layout.username(rng.randrange(layout.employees)),
+            'tender': layout.uuid('tender', tender),
+            'tender_creator': layout.username(layout.creator_of(tender)),
+            'bid': layout.uuid('bid', bid),
+            'bid_author': layout.username(layout.author_of(bid)),
+            'organization': layout.uuid(
+                'organization', rng.randrange(layout.organizations)),
+            'service_type': rng.choice(SERVICE_TYPES),
+        }
+
+    def next(self):
+        name = self.random.choices(self.names, self.weights)[0]
+        return name, self.templates[name].format(**self.values())
+
+
+def parse_endpoint(value):
+    """Эндпоинт из аргумента NAME=WEIGHT:PATH."""
+
+    name, _, rest = value.partition('=')
+    weight, _, template = rest.partition(':')
+    try:
+        weight = float(weight)
+    except ValueError:
+        weight = 0
+    if not name or weight <= 0 or not template.startswith('/'):
+        raise CommandError(
+            f'Эндпоинт задается как имя=вес:/путь, получено: {value}')
+    return name, weight, template
+
+
+def summary(latencies, statuses):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'p50': percentile(latencies, 50) * 1000,
+        'p95': percentile(latencies, 95) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+        'statuses': {
+            str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+class Connection:
+    """Минимальный HTTP/1.1 клиент с keep-alive поверх asyncio, чтобы
+    нагрузочный тест не зависел от сторонних библиотек."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def request(self, path):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port)
+        self.writer.write(
+            f'GET {path} HTTP/1.1\r\nHost: {self.host}\r\n'
+            f'Accept: application/json\r\n\r\n'.encode())
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('Сервер закрыл соединение.')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get('connection', '').lower() != 'close'
+        if status in (204, 304) or 100 <= status < 200:
+            pass
+        elif 'content-length' in headers:
+            await self.reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            await self.reader.read()
+            keep_alive = False
+        if not keep_alive:
+            await self.close()
+        return status
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест запущенного сервера смесью эндпоинтов API '
+            'на данных seed_data: пропускная способность и задержки '
+            '(p50, p95, p99) в целом и по эндпоинтам при заданном числе '
+            'одновременных соединений. Несколько --url позволяют сравнить '
+            'серверы, например WSGI и ASGI профили.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', action='append', required=True,
+            help='Адрес сервера, например http://localhost:8080. '
+                 'Можно указать несколько раз.')
+        parser.add_argument(
+            '--path',
+            help='Один путь запроса с параметрами вместо смеси эндпоинтов.')
+        parser.add_argument(
+            '--endpoint', action='append', type=parse_endpoint,
+            help='Эндпоинт смеси в виде имя=вес:/путь, можно указать '
+                 'несколько раз. По умолчанию - смесь чтений тендеров '
+                 'и предложений.')
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Seed выбора эндпоинтов и записей для повторяемости.')
+        for name, default in (('organizations', 100), ('employees', 1000),
+                              ('tenders', 10000), ('bids-per-tender', 3),
+                              ('responsibles', 3)):
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help='Параметры раскладки, как у seed_data.')
+        parser.add_argument(
+            '--json', metavar='FILE',
+            help='Записать результаты в JSON-файл, "-" - в stdout.')
+        parser.add_argument(
+            '--concurrency', type=int, default=100,
+            help='Число одновременных соединений.')
+        parser.add_argument(
+            '--requests', type=int, default=5000,
+            help='Общее число запросов к каждому серверу.')
+
+    async def run(self, url, mix, concurrency, total):
+        parts = urlsplit(url)
+        if parts.scheme != 'http' or not parts.hostname:
+            raise CommandError(f'Поддерживаются только http-адреса: {url}')
+        port = parts.port or 80
+        latencies = defaultdict(list)
+        statuses = defaultdict(Counter)
+        errors = Counter()
+        remaining = total
+
+        async def worker():
+            nonlocal remaining
+            connection = Connection(parts.hostname, port)
+            while remaining > 0:
+                remaining -= 1
+                name, path = mix.next()
+                start = time.perf_counter()
+                try:
+                    status = await connection.request(path)
+                except (OSError, ValueError, IndexError,
+                        asyncio.IncompleteReadError) as error:
+                    errors[type(error).__name__] += 1
+                    await connection.close()
+                    continue
+                latencies[name].append(time.perf_counter() - start)
+                statuses[name][status] += 1
+            await connection.close()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        result = summary(
+            [value for values in latencies.values() for value in values],
+            sum(statuses.values(), Counter()))
+        return {
+            'url': url,
+            'concurrency': concurrency,
+            **result,
+            'elapsed': elapsed,
+            'rps': result['requests'] / elapsed if elapsed else 0.0,
+            'errors': dict(errors),
+            'endpoints': {
+                name: summary(latencies[name], statuses[name])
+                for name in mix.names if name in statuses},
+        }
+
+    def handle(self, *args, **options):
+        if options['path']:
+            endpoints = [('path', 1, options['path'])]
+        else:
+            endpoints = options['endpoint'] or DEFAULT_MIX
+        layout = Layout(
+            organizations=options['organizations'],
+            employees=options['employees'],
+            tenders=options['tenders'],
+            bids_per_tender=options['bids_per_tender'],
+            responsibles=options['responsibles'])
+        # При выводе JSON в stdout сводка печатается в stderr.
+        out = self.stderr if options['json'] == '-' else self.stdout
+        results = []
+        for url in options['url']:
+            # Для каждого сервера одна и та же последовательность запросов.
+            mix = Mix(endpoints, layout, options['seed'])
+            result = asyncio.run(self.run(
+                url, mix, options['concurrency'], options['requests']))
+            results.append(result)
+            out.write(
+                f"{url}: {result['requests']} запросов "
+                f"за {result['elapsed']:.1f} с, {result['rps']:.0f} rps, "
+                f"p50 {result['p50']:.1f} мс, p95 {result['p95']:.1f} мс, "
+                f"p99 {result['p99']:.1f} мс, статусы {result['statuses']}, "
+                f"ошибки {result['errors'] or 'нет'}")
+            for name, endpoint in result['endpoints'].items():
+                out.write(
+                    f"  {name}: {endpoint['requests']} запросов, "
+                    f"p50 {endpoint['p50']:.1f} мс, "
+                    f"p95 {endpoint['p95']:.1f} мс, "
+                    f"p99 {endpoint['p99']:.1f} мс, "
+                    f"статусы {endpoint['statuses']}")
+        if options['json']:
+            report = json.dumps({
+                'seed': options['seed'],
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'mix': [{'name': name, 'weight': weight, 'path': template}
+                        for name, weight, template in endpoints],
+                'results': results,
+            }, ensure_ascii=False, indent=2)
+            if options['json'] == '-':
+                self.stdout.write(report)
+            else:
+                with open(options['json'], 'w', encoding='utf-8') as file:
+                    file.write(report + '\n')
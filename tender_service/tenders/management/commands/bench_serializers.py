@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from tenders.models import Bid, Tender
+from tenders.renderers import FastJSONRenderer
+from tenders.serializers import (BidProjection, BidSerializer,
+                                 TenderProjection, TenderSerializer)
+
+
+def serializer_path(queryset, serializer_class):
+    data = serializer_class(list(queryset), many=True).data
+    return JSONRenderer().render(data)
+
+
+def projection_path(queryset, projection_class):
+    data = projection_class(
+        list(projection_class.project(queryset)), many=True).data
+    return FastJSONRenderer().render(data)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает сериализацию списков тендеров и предложений '
+            'через ModelSerializer и через проекции values() с быстрым '
+            'JSON-рендерером. Завершается с ошибкой, если ответы '
+            'различаются хотя бы в одном байте.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=1000,
+            help='Число записей в одном списке.')
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Число повторов, берется лучшее время.')
+
+    def measure(self, path, queryset, serializer_class, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            content = path(queryset.all(), serializer_class)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return content, best
+
+    def handle(self, *args, **options):
+        limit, repeat = options['limit'], options['repeat']
+        cases = (
+            ('tenders', Tender.objects.order_by('name', 'id')[:limit],
+             TenderSerializer, TenderProjection),
+            ('bids', Bid.objects.order_by('createdAt', 'id')[:limit],
+             BidSerializer, BidProjection),
+        )
+        for name, queryset, serializer_class, projection_class in cases:
+            expected, slow = self.measure(
+                serializer_path, queryset, serializer_class, repeat)
+            content, fast = self.measure(
+                projection_path, queryset, projection_class, repeat)
+            if content != expected:
+                raise CommandError(
+                    f'{name}: ответ проекции отличается от ответа '
+                    f'{serializer_class.__name__}.')
+            rows = max(queryset.count(), 1)
+            self.stdout.write(
+                f'{name}: {rows} записей, '
+                f'{serializer_class.__name__} {slow * 1000:.1f} мс '
+                f'({slow / rows * 1e6:.1f} мкс/запись), '
+                f'{projection_class.__name__} {fast * 1000:.1f} мс '
+                f'({fast / rows * 1e6:.1f} мкс/запись), '
+                f'ускорение x{slow / fast:.1f}')
+        self.stdout.write(self.style.SUCCESS('Ответы совпадают.'))
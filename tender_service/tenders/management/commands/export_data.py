@@ -0,0 +1,71 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tenders.export import (BID_HISTORY, BIDS, FORMATS, TENDER_HISTORY,
+                            TENDERS, stream)
+from tenders.models import Bid, Tender
+
+# Вид записей: выгрузка записей, выгрузка истории и модель владельца.
+SOURCES = {
+    'tenders': (TENDERS, TENDER_HISTORY, Tender),
+    'bids': (BIDS, BID_HISTORY, Bid),
+}
+
+
+class Command(BaseCommand):
+    help = ('Выгружает все тендеры или предложения (или их историю '
+            'версий) в NDJSON или CSV так же, как /api/tenders/export и '
+            '/api/bids/export, но без ограничений видимости. Строки '
+            'читаются серверным курсором, память не растет с размером '
+            'выгрузки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', choices=sorted(SOURCES))
+        parser.add_argument(
+            '--history', action='store_true',
+            help='Выгрузить историю версий вместо текущих записей.')
+        parser.add_argument(
+            '--output', choices=sorted(FORMATS), default='ndjson')
+        parser.add_argument(
+            '--status', help='Статус или несколько через запятую.')
+        parser.add_argument('--organization', help='id организации.')
+        parser.add_argument(
+            '--updated-since',
+            help='Только записи, измененные начиная с этого момента '
+                 '(ISO 8601), для истории - версии, созданные с него.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help='Строк из курсора за раз (по умолчанию EXPORT_CHUNK_SIZE).')
+        parser.add_argument(
+            '--file', help='Файл для выгрузки, по умолчанию stdout.')
+
+    def handle(self, *args, **options):
+        records, history, model = SOURCES[options['source']]
+        source = history if options['history'] else records
+        try:
+            filters = source.parse(
+                options['status'], options['organization'],
+                options['updated_since'])
+        except ValueError as error:
+            raise CommandError(f'Неверное значение фильтра: {error}')
+        chunks = stream(source.rows(model.objects.all(), **filters),
+                        source.projection, options['output'],
+                        options['chunk_size'])
+        started = time.perf_counter()
+        size = 0
+        target = (open(options['file'], 'wb') if options['file']
+                  else sys.stdout.buffer)
+        try:
+            for chunk in chunks:
+                target.write(chunk)
+                size += len(chunk)
+        finally:
+            if options['file']:
+                target.close()
+            else:
+                target.flush()
+        self.stderr.write(
+            f'{source.name}: {size} байт за '
+            f'{time.perf_counter() - started:.1f} с')
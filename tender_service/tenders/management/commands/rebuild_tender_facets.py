@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tenders.facets import differences, rebuild
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счетчики тендеров для эндпоинта tenders/facets '
+            'по таблице тендеров. Обычно счетчики ведут триггеры БД, '
+            'пересчет нужен после изменений в обход триггеров. На время '
+            'пересчета изменения тендеров блокируются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только сравнить счетчики с таблицей тендеров и '
+                 'завершиться с ошибкой, если они расходятся.')
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            rows = rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f'Счетчики пересчитаны, строк: {rows}.'))
+            return
+        found = differences()
+        for key, (actual, target) in sorted(found.items(), key=str):
+            self.stdout.write(self.style.ERROR(
+                '%s: %s вместо %s' % (
+                    ', '.join(str(part) for part in key), actual, target)))
+        if found:
+            raise CommandError(
+                f'Счетчики расходятся с тендерами: {len(found)}.')
+        self.stdout.write(self.style.SUCCESS('Счетчики совпадают.'))
@@ -0,0 +1,96 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from tenders.models import Employee
+from tenders.seeding import BLOCK, TABLES, Generator, Layout, copy_rows
+
+
+def load_batch(generator, table, start, stop):
+    """Загружает записи [start, stop) таблицы TABLES[table].
+    Выполняется в отдельном процессе со своим соединением с БД."""
+
+    model, columns, method, _ = TABLES[table]
+    with connection.cursor() as cursor:
+        return copy_rows(cursor, model, columns,
+                         getattr(generator, method)(start, stop))
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу тестовыми данными заданного масштаба через '
+            'COPY: организации, сотрудники, ответственные, тендеры, '
+            'предложения, история версий и отзывы. Данные детерминированы: '
+            'одинаковые параметры дают одинаковую базу, а bench_http с теми '
+            'же параметрами строит запросы к существующим записям.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organizations', type=int, default=100)
+        parser.add_argument('--employees', type=int, default=1000)
+        parser.add_argument(
+            '--responsibles', type=int, default=3,
+            help='Ответственных на организацию.')
+        parser.add_argument('--tenders', type=int, default=10000)
+        parser.add_argument(
+            '--bids-per-tender', type=int, default=3)
+        parser.add_argument(
+            '--versions', type=int, default=3,
+            help='Максимальное число версий тендера и предложения.')
+        parser.add_argument(
+            '--reviews-per-bid', type=float, default=0.1,
+            help='Доля предложений с отзывом.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size', type=int, default=100000,
+            help=f'Записей в одном COPY, округляется до кратного {BLOCK}.')
+        parser.add_argument(
+            '--jobs', type=int, default=1,
+            help='Число процессов, загружающих пакеты одной таблицы '
+                 'параллельно. Таблицы загружаются по очереди, чтобы '
+                 'внешние ключи ссылались на уже загруженные строки.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Загрузка через COPY поддерживается только '
+                               'для PostgreSQL.')
+        layout = Layout(
+            organizations=options['organizations'],
+            employees=options['employees'],
+            tenders=options['tenders'],
+            bids_per_tender=options['bids_per_tender'],
+            responsibles=options['responsibles'])
+        if Employee.objects.filter(username=layout.username(0)).exists():
+            raise CommandError('Тестовые данные уже загружены.')
+        generator = Generator(
+            layout, seed=options['seed'], versions=options['versions'],
+            reviews_per_bid=options['reviews_per_bid'])
+        batch = -(-max(options['batch_size'], 1) // BLOCK) * BLOCK
+        started = time.perf_counter()
+        # Процессы запускаются заново (spawn), а не копией текущего:
+        # соединения и пул соединений нельзя разделять между процессами.
+        with ProcessPoolExecutor(
+                max_workers=max(options['jobs'], 1),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup) as pool:
+            for table, (model, _, _, source) in enumerate(TABLES):
+                total = getattr(layout, source)
+                table_started = time.perf_counter()
+                batches = [
+                    pool.submit(load_batch, generator, table, start,
+                                min(start + batch, total))
+                    for start in range(0, total, batch)]
+                rows = sum(future.result() for future in batches)
+                elapsed = time.perf_counter() - table_started
+                self.stdout.write(
+                    f'{model._meta.db_table}: {rows} строк за '
+                    f'{elapsed:.1f} с')
+        with connection.cursor() as cursor:
+            tables = ', '.join(
+                connection.ops.quote_name(model._meta.db_table)
+                for model, *_ in TABLES)
+            cursor.execute(f'ANALYZE {tables}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - started:.1f} с.'))
@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from tenders.directory_sync import (EMPLOYEES, ORGANIZATIONS, RESPONSIBLES,
+                                    SnapshotError, sync)
+
+
+class Command(BaseCommand):
+    help = ('Синхронизирует организации, сотрудников и ответственных со '
+            'снимками из внешних систем (CSV с заголовком или NDJSON). '
+            'Снимок загружается через COPY во временную таблицу, в БД '
+            'применяются только изменения: вставки и обновления одним '
+            'INSERT ... ON CONFLICT, удаления одним DELETE. Таблицы без '
+            'файла не меняются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--organizations',
+            help='Снимок организаций: id, name, description, type.')
+        parser.add_argument(
+            '--employees',
+            help='Снимок сотрудников: id, username, first_name, last_name.')
+        parser.add_argument(
+            '--responsibles',
+            help='Снимок ответственных: organization_id, user_id и '
+                 'необязательный id.')
+        parser.add_argument(
+            '--no-delete', action='store_true',
+            help='Не удалять записи, которых нет в снимке.')
+        parser.add_argument(
+            '--max-delete-ratio', type=float, default=0.1,
+            help='Максимальная доля записей таблицы, которую может удалить '
+                 'снимок. Больше - снимок считается неполным и не '
+                 'применяется (по умолчанию 0.1).')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Посчитать изменения и откатить их.')
+
+    def handle(self, *args, **options):
+        snapshots = {
+            table: options[option] for table, option in (
+                (ORGANIZATIONS, 'organizations'),
+                (EMPLOYEES, 'employees'),
+                (RESPONSIBLES, 'responsibles'))
+            if options[option]}
+        if not snapshots:
+            raise CommandError('Не передано ни одного снимка.')
+        started = time.perf_counter()
+        try:
+            report = sync(
+                snapshots, delete=not options['no_delete'],
+                max_delete_ratio=options['max_delete_ratio'],
+                dry_run=options['dry_run'])
+        except (SnapshotError, DatabaseError, OSError) as error:
+            raise CommandError(str(error))
+        for table, counts in report.items():
+            self.stdout.write(f'{table}: ' + ', '.join(
+                f'{name} {count}' for name, count in counts.items()))
+        elapsed = time.perf_counter() - started
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f'Изменения откачены (--dry-run), {elapsed:.1f} с.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Готово за {elapsed:.1f} с.'))
@@ -0,0 +1,189 @@
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .directory import directory
+from .models import OrganizationResponsible
+
+
+def _as_uuid(value):
+    if isinstance(value, uuid.UUID):
+        return value
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+class MembershipIndex:
+    """Индекс ответственных за организации в памяти процесса.
+    Хранит отображения организация -> сотрудники и сотрудник -> организации,
+    поэтому проверка прав и подсчет кворума не обращаются к БД.
+    Индекс целиком перестраивается раз в ttl секунд, вызовом rebuild()
+    или при смене поколения справочников: сигналы модели
+    OrganizationResponsible увеличивают его после каждого изменения.
+    Отрицательный ответ перепроверяется в БД, чтобы сотрудник,
+    добавленный другим процессом, не получал отказ до перестроения.
+    Положительный ответ в другом процессе может отставать на время
+    сверки поколения, а без общего кэша - до перестроения индекса.
+    Поэтому запросы на запись передают confirm=True: права проверяются
+    в БД, а устаревшие пары удаляются из индекса. Голосование проверяет
+    права и число ответственных в БД само."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._members = {}
+        self._organizations = {}
+        self._built_at = None
+
+    def rebuild(self):
+        members = defaultdict(set)
+        organizations = defaultdict(set)
+        rows = OrganizationResponsible.objects.values_list(
+            'organization_id', 'user_id').iterator(chunk_size=10000)
+        for organization_id, user_id in rows:
+            members[organization_id].add(user_id)
+            organizations[user_id].add(organization_id)
+        with self._lock:
+            self._members = dict(members)
+            self._organizations = dict(organizations)
+            self._built_at = time.monotonic()
+
+    def invalidate(self):
+        """Помечает индекс устаревшим, он перестроится при обращении."""
+
+        with self._lock:
+            self._built_at = None
+
+    def _ensure_built(self):
+        directory.check()
+        built_at = self._built_at
+        if built_at is not None and time.monotonic() - built_at < self.ttl:
+            return
+        # Пока один поток перестраивает индекс, остальные работают
+        # со старой версией; ждут только при самом первом построении.
+        if self._rebuild_lock.acquire(blocking=built_at is None):
+            try:
+                if self._built_at == built_at:
+                    self.rebuild()
+            finally:
+                self._rebuild_lock.release()
+
+    def add(self, organization_id, user_id):
+        with self._lock:
+            self._members.setdefault(organization_id, set()).add(user_id)
+            self._organizations.setdefault(user_id, set()).add(
+                organization_id)
+
+    def discard(self, organization_id, user_id):
+        with self._lock:
+            self._members.get(organization_id, set()).discard(user_id)
+            self._organizations.get(user_id, set()).discard(organization_id)
+
+    def is_member(self, organization_id, user_id, confirm=False):
+        """confirm=True - ответ только по БД, для запросов на запись."""
+
+        organization_id = _as_uuid(organization_id)
+        user_id = _as_uuid(user_id)
+        if organization_id is None or user_id is None:
+            return False
+        self._ensure_built()
+        if not confirm:
+            with self._lock:
+                if user_id in self._members.get(organization_id, ()):
+                    return True
+        if OrganizationResponsible.objects.filter(
+                organization=organization_id, user=user_id).exists():
+            self.add(organization_id, user_id)
+            return True
+        self.discard(organization_id, user_id)
+        return False
+
+    async def ais_member(self, organization_id, user_id):
+        """Асинхронный вариант is_member. Построение индекса, если оно
+        нужно, выполняется в отдельном потоке."""
+
+        organization_id = _as_uuid(organization_id)
+        user_id = _as_uuid(user_id)
+        if organization_id is None or user_id is None:
+            return False
+        await directory.acheck()
+        built_at = self._built_at
+        if built_at is None or time.monotonic() - built_at >= self.ttl:
+            await sync_to_async(self._ensure_built)()
+        with self._lock:
+            if user_id in self._members.get(organization_id, ()):
+                return True
+        if await OrganizationResponsible.objects.filter(
+                organization=organization_id, user=user_id).aexists():
+            self.add(organization_id, user_id)
+            return True
+        return False
+
+    def members(self, pairs, confirm=False):
+        """Проверка прав сразу для многих пар (организация, сотрудник).
+        Возвращает множество пар, в которых сотрудник ответственный.
+        Пары, не найденные в индексе, перепроверяются одним запросом,
+        а при confirm=True - все пары."""
+
+        pairs = {
+            (_as_uuid(organization_id), _as_uuid(user_id))
+            for organization_id, user_id in pairs
+        }
+        pairs = {pair for pair in pairs if None not in pair}
+        self._ensure_built()
+        found = set()
+        if not confirm:
+            with self._lock:
+                found = {
+                    (organization_id, user_id)
+                    for organization_id, user_id in pairs
+                    if user_id in self._members.get(organization_id, ())
+                }
+        missing = pairs - found
+        if missing:
+            rows = OrganizationResponsible.objects.filter(
+                organization__in={pair[0] for pair in missing},
+                user__in={pair[1] for pair in missing},
+            ).values_list('organization_id', 'user_id')
+            for pair in rows:
+                if pair in missing:
+                    self.add(*pair)
+                    found.add(pair)
+            for pair in missing - found:
+                self.discard(*pair)
+        return found
+
+    def organizations_of(self, user_id, confirm=False):
+        user_id = _as_uuid(user_id)
+        if user_id is None:
+            return frozenset()
+        self._ensure_built()
+        with self._lock:
+            cached = frozenset(self._organizations.get(user_id, ()))
+        if cached and not confirm:
+            return cached
+        organizations = frozenset(OrganizationResponsible.objects.filter(
+            user=user_id).values_list('organization_id', flat=True))
+        for organization_id in organizations:
+            self.add(organization_id, user_id)
+        for organization_id in cached - organizations:
+            self.discard(organization_id, user_id)
+        return organizations
+
+    def member_count(self, organization_id):
+        organization_id = _as_uuid(organization_id)
+        self._ensure_built()
+        with self._lock:
+            return len(self._members.get(organization_id, ()))
+
+
+membership = MembershipIndex(
+    ttl=getattr(settings, 'MEMBERSHIP_INDEX_TTL', 300))
+directory.subscribe(membership.invalidate)
@@ -0,0 +1,234 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .cache import entity_cache
+from .health import pool_stats
+from .identity import employee_cache
+from .routers import routing_stats
+from .singleflight import single_flight
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Поле pool_stats: имя метрики, тип и описание.
+POOL_METRICS = {
+    'size': ('tender_db_pool_size', 'gauge', 'Открытые соединения пула.'),
+    'inUse': ('tender_db_pool_in_use', 'gauge', 'Занятые соединения.'),
+    'idle': ('tender_db_pool_idle', 'gauge', 'Свободные соединения.'),
+    'waiting': ('tender_db_pool_waiting', 'gauge',
+                'Запросы, ожидающие соединение.'),
+    'requests': ('tender_db_pool_requests_total', 'counter',
+                 'Запросы соединения из пула.'),
+    'waitMs': ('tender_db_pool_wait_milliseconds_total', 'counter',
+               'Суммарное время ожидания соединения.'),
+    'timeouts': ('tender_db_pool_timeouts_total', 'counter',
+                 'Запросы, не дождавшиеся соединения.'),
+    'connectionErrors': ('tender_db_pool_connection_errors_total', 'counter',
+                         'Ошибки установки соединения.'),
+    'connectionsLost': ('tender_db_pool_connections_lost_total', 'counter',
+                        'Соединения, оказавшиеся разорванными.'),
+}
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus: счетчики по корзинам (не
+    накопительные, суммируются при выводе), число наблюдений и сумма."""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield (f'{name}_bucket', {**labels, 'le': format_value(bound)},
+                   cumulative)
+        yield f'{name}_bucket', {**labels, 'le': '+Inf'}, self.count
+        yield f'{name}_sum', labels, self.sum
+        yield f'{name}_count', labels, self.count
+
+
+class RouteMetrics:
+    __slots__ = ('latency', 'queries', 'size', 'db_seconds')
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.db_seconds = 0.0
+
+
+class QueryTimer:
+    """Число SQL-запросов и время в БД в рамках одного HTTP-запроса."""
+
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Счетчик текущего HTTP-запроса. Контекст копируется в поток
+# sync_to_async, поэтому запросы async-представлений тоже учитываются.
+current_timer = ContextVar('current_query_timer', default=None)
+
+
+def observe_query(execute, sql, params, many, context):
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.seconds += time.perf_counter() - start
+        timer.count += 1
+
+
+@receiver(connection_created)
+def install_query_observer(sender, connection, **kwargs):
+    """Подключает observe_query к каждому соединению один раз: обертка
+    execute_wrapper на все время жизни соединения дешевле, чем
+    подключение на каждый запрос во всех потоках и для всех БД."""
+
+    if observe_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(observe_query)
+
+
+class Registry:
+    """Метрики HTTP-запросов по маршруту, методу и статусу ответа."""
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route, method, status, seconds, timer, size):
+        key = (route, method, str(status))
+        with self._lock:
+            metrics = self._routes.get(key)
+            if metrics is None:
+                metrics = self._routes[key] = RouteMetrics()
+            metrics.latency.observe(seconds)
+            metrics.queries.observe(timer.count)
+            metrics.size.observe(size)
+            metrics.db_seconds += timer.seconds
+
+    def samples(self):
+        with self._lock:
+            routes = [
+                (dict(zip(('route', 'method', 'status'), key)), metrics)
+                for key, metrics in sorted(self._routes.items())]
+            families = {
+                'tender_http_request_duration_seconds': (
+                    'histogram', 'Время обработки запроса.', []),
+                'tender_http_request_queries': (
+                    'histogram', 'Число SQL-запросов на HTTP-запрос.', []),
+                'tender_http_request_db_seconds_total': (
+                    'counter', 'Суммарное время SQL-запросов.', []),
+                'tender_http_response_size_bytes': (
+                    'histogram', 'Размер тела ответа.', []),
+            }
+            for labels, metrics in routes:
+                families['tender_http_request_duration_seconds'][2].extend(
+                    metrics.latency.samples(
+                        'tender_http_request_duration_seconds', labels))
+                families['tender_http_request_queries'][2].extend(
+                    metrics.queries.samples(
+                        'tender_http_request_queries', labels))
+                families['tender_http_request_db_seconds_total'][2].append(
+                    ('tender_http_request_db_seconds_total', labels,
+                     metrics.db_seconds))
+                families['tender_http_response_size_bytes'][2].extend(
+                    metrics.size.samples(
+                        'tender_http_response_size_bytes', labels))
+        return families
+
+
+registry = Registry()
+
+
+def process_samples():
+    """Счетчики кэшей, объединения запросов, маршрутизатора реплик
+    и пулов соединений процесса."""
+
+    families = {}
+    pools = [(alias, pool_stats(connections[alias])) for alias in connections]
+    pools = [(alias, stats) for alias, stats in pools if stats is not None]
+
+    def add(name, kind, help_text, samples):
+        families[name] = (kind, help_text, list(samples))
+
+    add('tender_employee_cache_requests_total', 'counter',
+        'Обращения к кэшу сотрудников.', [
+            ('tender_employee_cache_requests_total', {'result': 'hit'},
+             employee_cache.hits),
+            ('tender_employee_cache_requests_total', {'result': 'miss'},
+             employee_cache.misses)])
+    add('tender_entity_cache_requests_total', 'counter',
+        'Обращения к кэшу тендеров и предложений.', [
+            ('tender_entity_cache_requests_total', {'result': result}, value)
+            for result, value in entity_cache.stats().items()])
+    flights = single_flight.stats()
+    in_flight = flights.pop('in_flight')
+    add('tender_single_flight_total', 'counter',
+        'Объединение одинаковых одновременных чтений.', [
+            ('tender_single_flight_total', {'result': result}, value)
+            for result, value in flights.items()])
+    add('tender_single_flight_in_flight', 'gauge',
+        'Чтения, выполняемые в данный момент.', [
+            ('tender_single_flight_in_flight', {}, in_flight)])
+    add('tender_db_routing_total', 'counter',
+        'Решения маршрутизатора чтений.', [
+            ('tender_db_routing_total', {'target': target}, value)
+            for target, value in sorted(routing_stats.snapshot().items())])
+    for field, (name, kind, help_text) in POOL_METRICS.items():
+        add(name, kind, help_text, [
+            (name, {'alias': alias}, stats[field])
+            for alias, stats in pools if stats.get(field) is not None])
+    return families
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def escape(value):
+    return (str(value).replace('\\', '\\\\').replace('\n', '\\n')
+            .replace('"', '\\"'))
+
+
+def render():
+    """Все метрики в текстовом формате Prometheus."""
+
+    lines = []
+    families = {**registry.samples(), **process_samples()}
+    for name, (kind, help_text, samples) in families.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for sample, labels, value in samples:
+            if labels:
+                label_text = ','.join(
+                    f'{key}="{escape(label)}"' for key, label in labels.items())
+                sample = f'{sample}{{{label_text}}}'
+            lines.append(f'{sample} {format_value(value)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,114 @@
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.decorators import sync_and_async_middleware
+
+from .metrics import QueryTimer, current_timer, registry
+from .routers import (aremember_write, ais_pinned, is_pinned,
+                      pinned_to_primary, remember_write)
+
+
+def written_usernames(response):
+    """Пользователи, определенные представлением DRF при обработке
+    запроса (например, creatorUsername при создании тендера)."""
+
+    request = getattr(response, 'renderer_context', {}).get('request')
+    resolved = getattr(request, '_resolved_employees', {})
+    return [username for username, employee in resolved.items()
+            if employee is not None]
+
+
+def begin_request(request):
+    return pinned_to_primary.set(is_pinned(request))
+
+
+def is_write(request, response):
+    return (request.method not in ('GET', 'HEAD', 'OPTIONS')
+            and response.status_code < 400)
+
+
+def finish_request(request, response):
+    if is_write(request, response):
+        remember_write(request, response, written_usernames(response))
+    return response
+
+
+async def abegin_request(request):
+    return pinned_to_primary.set(await ais_pinned(request))
+
+
+async def afinish_request(request, response):
+    if is_write(request, response):
+        await aremember_write(
+            request, response, written_usernames(response))
+    return response
+
+
+@sync_and_async_middleware
+def replica_pinning_middleware(get_response):
+    """Чтение своих записей при работе с репликами: запросы на запись и
+    чтения клиента, недавно выполнявшего запись, обслуживает основная БД.
+    В async-цепочке отметки читаются и пишутся асинхронным API кэша."""
+
+    if not settings.REPLICA_DATABASES:
+        raise MiddlewareNotUsed
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = await abegin_request(request)
+            try:
+                response = await get_response(request)
+            finally:
+                pinned_to_primary.reset(token)
+            return await afinish_request(request, response)
+    else:
+        def middleware(request):
+            token = begin_request(request)
+            try:
+                response = get_response(request)
+            finally:
+                pinned_to_primary.reset(token)
+            return finish_request(request, response)
+
+    return middleware
+
+
+def record_metrics(request, response, start, timer):
+    match = request.resolver_match
+    route = (match.url_name or match.view_name) if match else 'unmatched'
+    size = 0 if response.streaming else len(response.content)
+    registry.observe(
+        route, request.method, response.status_code,
+        time.perf_counter() - start, timer, size)
+    return response
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Время ответа, число и время SQL-запросов и размер ответа по
+    маршруту и статусу, см. /api/metrics."""
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            timer = QueryTimer()
+            token = current_timer.set(timer)
+            start = time.perf_counter()
+            try:
+                response = await get_response(request)
+            finally:
+                current_timer.reset(token)
+            return record_metrics(request, response, start, timer)
+    else:
+        def middleware(request):
+            timer = QueryTimer()
+            token = current_timer.set(timer)
+            start = time.perf_counter()
+            try:
+                response = get_response(request)
+            finally:
+                current_timer.reset(token)
+            return record_metrics(request, response, start, timer)
+
+    return middleware
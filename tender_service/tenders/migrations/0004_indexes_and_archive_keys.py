@@ -0,0 +1,147 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:54
+
+import logging
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+
+def delete_duplicates(table, columns):
+    """Удаляет повторы строк по columns, оставляя строку с меньшим id.
+    Удаленные строки выводятся в журнал, чтобы их можно было сверить
+    или восстановить из резервной копии."""
+
+    condition = ' AND '.join(f'a.{column} = b.{column}' for column in columns)
+    returning = ', '.join(f'a.{column}' for column in ('id',) + columns)
+
+    def run(apps, schema_editor):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} a USING {table} b '
+                f'WHERE {condition} AND a.id > b.id RETURNING {returning}')
+            rows = cursor.fetchall()
+        if rows:
+            logger.warning(
+                '%s: удалено повторяющихся строк: %d', table, len(rows))
+        for row in rows:
+            logger.warning(
+                '%s: удалена строка %s', table,
+                ', '.join(f'{name}={value}' for name, value in zip(
+                    ('id',) + columns, row)))
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0003_bid_approved_list_bid_quorum'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bidarhive',
+            name='bid_id',
+            field=models.UUIDField(),
+        ),
+        migrations.AlterField(
+            model_name='tenderarhive',
+            name='tender_id',
+            field=models.UUIDField(),
+        ),
+        # Ссылки на записи становятся внешними ключами без ограничения в
+        # БД: столбцы и их значения прежние, история уже удаленных
+        # записей сохраняется, а новая удаляется вместе с записью.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name='bidarhive',
+                    old_name='bid_id',
+                    new_name='bid',
+                ),
+                migrations.RenameField(
+                    model_name='tenderarhive',
+                    old_name='tender_id',
+                    new_name='tender',
+                ),
+                migrations.AlterField(
+                    model_name='bidarhive',
+                    name='bid',
+                    field=models.UUIDField(db_column='bid_id'),
+                ),
+                migrations.AlterField(
+                    model_name='tenderarhive',
+                    name='tender',
+                    field=models.UUIDField(db_column='tender_id'),
+                ),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='bidarhive',
+            name='bid',
+            field=models.ForeignKey(db_column='bid_id', db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='arhive', to='tenders.bid'),
+        ),
+        migrations.AlterField(
+            model_name='tenderarhive',
+            name='tender',
+            field=models.ForeignKey(db_column='tender_id', db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='arhive', to='tenders.tender'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['tender', 'status'], name='bid_tender_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['creator', 'createdAt', 'id'], name='bid_creator_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(condition=models.Q(('status', 'Published')), fields=['createdAt', 'id'], name='bid_published_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['status', 'service_type', 'name'], name='tender_status_type_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['creator', 'name', 'id'], name='tender_creator_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(condition=models.Q(('status', 'Published')), fields=['name', 'id'], name='tender_published_name_idx'),
+        ),
+        migrations.RunPython(
+            delete_duplicates(
+                'tenders_tenderarhive', ('tender_id', 'version')),
+            migrations.RunPython.noop,
+        ),
+        migrations.RunPython(
+            delete_duplicates('tenders_bidarhive', ('bid_id', 'version')),
+            migrations.RunPython.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='bidarhive',
+            constraint=models.UniqueConstraint(fields=('bid', 'version'), name='bid_arhive_version_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='tenderarhive',
+            constraint=models.UniqueConstraint(fields=('tender', 'version'), name='tender_arhive_version_uniq'),
+        ),
+        migrations.RunPython(
+            delete_duplicates(
+                'organization_responsible', ('organization_id', 'user_id')),
+            migrations.RunPython.noop,
+        ),
+        migrations.RunSQL(
+            sql=(
+                'CREATE UNIQUE INDEX IF NOT EXISTS '
+                'organization_responsible_uniq '
+                'ON organization_responsible (organization_id, user_id);',
+            ),
+            reverse_sql=(
+                'DROP INDEX IF EXISTS organization_responsible_uniq;'
+            ),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:57
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_TRIGGER = '''
+UPDATE {table} SET search_vector =
+    setweight(to_tsvector('russian', coalesce(name, '')), 'A')
+    || setweight(to_tsvector('russian', coalesce(description, '')), 'B');
+
+CREATE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+            AND NEW.name IS NOT DISTINCT FROM OLD.name
+            AND NEW.description IS NOT DISTINCT FROM OLD.description THEN
+        NEW.search_vector := OLD.search_vector;
+    ELSE
+        NEW.search_vector :=
+            setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A')
+            || setweight(
+                to_tsvector('russian', coalesce(NEW.description, '')), 'B');
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER {table}_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON {table}
+    FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update();
+'''
+
+DROP_SEARCH_TRIGGER = '''
+DROP TRIGGER IF EXISTS {table}_search_vector_trigger ON {table};
+DROP FUNCTION IF EXISTS {table}_search_vector_update();
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0004_indexes_and_archive_keys'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='bid',
+            options={'base_manager_name': 'objects'},
+        ),
+        migrations.AlterModelOptions(
+            name='tender',
+            options={'base_manager_name': 'objects', 'ordering': ('name',)},
+        ),
+        migrations.AddField(
+            model_name='bid',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tender',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            sql=SEARCH_TRIGGER.format(table='tenders_tender'),
+            reverse_sql=DROP_SEARCH_TRIGGER.format(table='tenders_tender'),
+        ),
+        migrations.RunSQL(
+            sql=SEARCH_TRIGGER.format(table='tenders_bid'),
+            reverse_sql=DROP_SEARCH_TRIGGER.format(table='tenders_bid'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='bid_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='tender_search_vector_idx'),
+        ),
+    ]
@@ -0,0 +1,170 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:58
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Должен совпадать с VERSION_CHECKPOINT_INTERVAL по умолчанию.
+CHECKPOINT_INTERVAL = 10
+BATCH_SIZE = 5000
+
+
+def copy_history(archive, version_model, owner_model, key, owner, fields):
+    """Переносит полные снимки из архивной таблицы в версии-разности."""
+
+    rows = archive.objects.filter(
+        **{key + '__in': owner_model.objects.values('pk')}
+    ).order_by(key, 'version').values_list(
+        key, 'version', *fields).iterator(chunk_size=BATCH_SIZE)
+    batch = []
+    current = None
+    previous = {}
+    chain = 0
+    for owner_id, version, *values in rows:
+        state = {
+            name: str(value) if isinstance(value, uuid.UUID) else value
+            for name, value in zip(fields, values)
+        }
+        if owner_id != current:
+            current = owner_id
+            chain = 0
+        if chain == 0 or chain >= CHECKPOINT_INTERVAL:
+            changes, checkpoint, chain = state, True, 1
+        else:
+            changes = {
+                name: value for name, value in state.items()
+                if previous.get(name) != value
+            }
+            checkpoint = False
+            chain += 1
+        previous = state
+        batch.append(version_model(
+            version=version, checkpoint=checkpoint, changes=changes,
+            **{owner + '_id': owner_id}))
+        if len(batch) >= BATCH_SIZE:
+            version_model.objects.bulk_create(batch)
+            batch = []
+    version_model.objects.bulk_create(batch)
+
+
+def copy_archives(apps, schema_editor):
+    copy_history(
+        apps.get_model('tenders', 'TenderArhive'),
+        apps.get_model('tenders', 'TenderVersion'),
+        apps.get_model('tenders', 'Tender'),
+        'tender_id', 'tender',
+        ('name', 'description', 'service_type', 'status',
+         'organization_id', 'creator_id'))
+    copy_history(
+        apps.get_model('tenders', 'BidArhive'),
+        apps.get_model('tenders', 'BidVersion'),
+        apps.get_model('tenders', 'Bid'),
+        'bid_id', 'bid',
+        ('name', 'description', 'tender_id', 'status',
+         'organization_id', 'creator_id', 'authorType'))
+
+
+def restore_history(archive, version_model, key, owner, fields):
+    """Собирает полные снимки архивной таблицы из версий-разностей.
+    Время изменения снимка - время создания версии, время создания -
+    время первой версии записи."""
+
+    rows = version_model.objects.order_by(owner, 'version').values_list(
+        owner + '_id', 'version', 'changes').iterator(chunk_size=BATCH_SIZE)
+    batch = []
+    current = None
+    state = {}
+    for owner_id, version, changes in rows:
+        if owner_id != current:
+            current, state = owner_id, {}
+        state.update(changes)
+        batch.append(archive(
+            version=version, **{key: owner_id},
+            **{name: state.get(name) for name in fields}))
+        if len(batch) >= BATCH_SIZE:
+            archive.objects.bulk_create(batch)
+            batch = []
+    archive.objects.bulk_create(batch)
+    return (
+        f'UPDATE {archive._meta.db_table} a '
+        f'SET "createdAt" = (SELECT min(f."createdAt") '
+        f'FROM {version_model._meta.db_table} f '
+        f'WHERE f.{owner}_id = a.{key}), "updatedAt" = v."createdAt" '
+        f'FROM {version_model._meta.db_table} v '
+        f'WHERE v.{owner}_id = a.{key} AND v.version = a.version')
+
+
+def restore_archives(apps, schema_editor):
+    schema_editor.execute(restore_history(
+        apps.get_model('tenders', 'TenderArhive'),
+        apps.get_model('tenders', 'TenderVersion'),
+        'tender_id', 'tender',
+        ('name', 'description', 'service_type', 'status',
+         'organization_id', 'creator_id')))
+    schema_editor.execute(restore_history(
+        apps.get_model('tenders', 'BidArhive'),
+        apps.get_model('tenders', 'BidVersion'),
+        'bid_id', 'bid',
+        ('name', 'description', 'tender_id', 'status',
+         'organization_id', 'creator_id', 'authorType')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0005_search_vectors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BidVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('checkpoint', models.BooleanField(default=False)),
+                ('changes', models.JSONField()),
+                ('createdAt', models.DateTimeField(auto_now_add=True)),
+                ('bid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='tenders.bid')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TenderVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('checkpoint', models.BooleanField(default=False)),
+                ('changes', models.JSONField()),
+                ('createdAt', models.DateTimeField(auto_now_add=True)),
+                ('tender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='tenders.tender')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='bidversion',
+            constraint=models.UniqueConstraint(fields=('bid', 'version'), name='bid_version_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='tenderversion',
+            constraint=models.UniqueConstraint(fields=('tender', 'version'), name='tender_version_uniq'),
+        ),
+        migrations.RunPython(copy_archives, restore_archives),
+        migrations.RunSQL(
+            sql=(
+                'UPDATE tenders_tenderversion v '
+                'SET "createdAt" = a."updatedAt" '
+                'FROM tenders_tenderarhive a '
+                'WHERE a.tender_id = v.tender_id AND a.version = v.version;',
+                'UPDATE tenders_bidversion v '
+                'SET "createdAt" = a."updatedAt" '
+                'FROM tenders_bidarhive a '
+                'WHERE a.bid_id = v.bid_id AND a.version = v.version;',
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.DeleteModel(
+            name='BidArhive',
+        ),
+        migrations.DeleteModel(
+            name='TenderArhive',
+        ),
+    ]
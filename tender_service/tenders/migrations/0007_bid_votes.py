@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0006_delta_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BidVote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('decision', models.CharField(choices=[('Approved', 'Approved'), ('Rejected', 'Rejected')], max_length=10)),
+                ('createdAt', models.DateTimeField(auto_now_add=True)),
+                ('bid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='tenders.bid')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bid_votes', to='tenders.employee')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('bid', 'employee'), name='bid_vote_uniq')],
+            },
+        ),
+        migrations.RunSQL(
+            sql=(
+                'INSERT INTO tenders_bidvote '
+                '(bid_id, employee_id, decision, "createdAt") '
+                "SELECT DISTINCT b.id, e.employee_id, 'Approved', "
+                'b."updatedAt" '
+                'FROM tenders_bid b '
+                'CROSS JOIN LATERAL unnest(b.approved_list) AS e(employee_id) '
+                'WHERE EXISTS (SELECT 1 FROM employee '
+                'WHERE employee.id = e.employee_id) '
+                'ON CONFLICT DO NOTHING;'
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RemoveField(
+            model_name='bid',
+            name='approved_list',
+        ),
+    ]
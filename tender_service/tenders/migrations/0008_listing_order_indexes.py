@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0007_bid_votes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['creator', 'name', 'id'], name='bid_creator_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['creator', 'updatedAt', 'id'], name='bid_creator_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(condition=models.Q(('status', 'Published')), fields=['name', 'id'], name='bid_published_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(condition=models.Q(('status', 'Published')), fields=['updatedAt', 'id'], name='bid_published_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['creator', 'createdAt', 'id'], name='tender_creator_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(fields=['creator', 'updatedAt', 'id'], name='tender_creator_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(condition=models.Q(('status', 'Published')), fields=['createdAt', 'id'], name='tender_published_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tender',
+            index=models.Index(condition=models.Q(('status', 'Published')), fields=['updatedAt', 'id'], name='tender_published_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:39
+
+from django.db import migrations, models
+
+
+# Опубликованные тендеры считаются в строках без автора, остальные - в
+# строках автора. У этих групп строк разные уникальные индексы, поэтому
+# каждая группа обновляется своим запросом.
+SCOPES = (
+    {'owner': 'NULL::uuid', 'scope': "status = 'Published'",
+     'nulls': 'NULL', 'conflict': 'service_type, status, organization_id'},
+    {'owner': 'creator_id', 'scope': "status <> 'Published'",
+     'nulls': 'NOT NULL',
+     'conflict': 'creator_id, service_type, status, organization_id'},
+)
+
+FILL_FACETS = """
+INSERT INTO tenders_tenderfacet
+    (creator_id, service_type, status, organization_id, count)
+SELECT {owner}, service_type, status, organization_id, count(*)
+FROM tenders_tender WHERE {scope} GROUP BY 1, 2, 3, 4;
+"""
+
+# Строки счетчиков обновляются в порядке ключа, чтобы параллельные
+# транзакции не блокировали друг друга крест-накрест.
+APPLY_DELTAS = """
+    INSERT INTO tenders_tenderfacet AS f
+        (creator_id, service_type, status, organization_id, count)
+    SELECT {owner}, service_type, status, organization_id, sum(delta)
+    FROM ({changes}) AS changes
+        (creator_id, service_type, status, organization_id, delta)
+    WHERE {scope}
+    GROUP BY 1, 2, 3, 4
+    HAVING sum(delta) <> 0
+    ORDER BY 1, 2, 3, 4
+    ON CONFLICT ({conflict}) WHERE creator_id IS {nulls}
+    DO UPDATE SET count = f.count + EXCLUDED.count;"""
+
+FACET_COLUMNS = 'creator_id, service_type, status, organization_id'
+CHANGES = {
+    'INSERT': f'SELECT {FACET_COLUMNS}, 1 FROM new_rows',
+    'DELETE': f'SELECT {FACET_COLUMNS}, -1 FROM old_rows',
+    'UPDATE': (f'SELECT {FACET_COLUMNS}, 1 FROM new_rows UNION ALL '
+               f'SELECT {FACET_COLUMNS}, -1 FROM old_rows'),
+}
+TRANSITION_TABLES = {
+    'INSERT': 'NEW TABLE AS new_rows',
+    'DELETE': 'OLD TABLE AS old_rows',
+    'UPDATE': 'OLD TABLE AS old_rows NEW TABLE AS new_rows',
+}
+
+# Триггеры уровня оператора с таблицами переходов: пакетная вставка
+# (COPY, bulk_create) меняет каждую строку счетчика один раз, а правки,
+# не затрагивающие тип, статус, организацию и автора, не пишут ничего.
+FACET_TRIGGER = """
+CREATE FUNCTION tenders_tender_facets_{op}() RETURNS trigger AS $$
+BEGIN{deltas}
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tenders_tender_facets_{op}
+    AFTER {event} ON tenders_tender
+    REFERENCING {tables}
+    FOR EACH STATEMENT EXECUTE FUNCTION tenders_tender_facets_{op}();
+"""
+
+DROP_FACET_TRIGGER = """
+DROP TRIGGER IF EXISTS tenders_tender_facets_{op} ON tenders_tender;
+DROP FUNCTION IF EXISTS tenders_tender_facets_{op}();
+"""
+
+
+def facet_trigger(event):
+    return FACET_TRIGGER.format(
+        op=event.lower(), event=event, tables=TRANSITION_TABLES[event],
+        deltas=''.join(
+            APPLY_DELTAS.format(changes=CHANGES[event], **scope)
+            for scope in SCOPES))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenders', '0008_listing_order_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenderFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creator_id', models.UUIDField(null=True)),
+                ('service_type', models.CharField(max_length=50)),
+                ('status', models.CharField(max_length=10)),
+                ('organization_id', models.UUIDField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('creator_id__isnull', True)), fields=('service_type', 'status', 'organization_id'), name='tender_facet_published_uniq'), models.UniqueConstraint(condition=models.Q(('creator_id__isnull', False)), fields=('creator_id', 'service_type', 'status', 'organization_id'), name='tender_facet_creator_uniq')],
+            },
+        ),
+        migrations.RunSQL(
+            sql=''.join(FILL_FACETS.format(**scope) for scope in SCOPES)
+            + ''.join(facet_trigger(event) for event in CHANGES),
+            reverse_sql=''.join(
+                DROP_FACET_TRIGGER.format(op=event.lower())
+                for event in CHANGES),
+        ),
+    ]
@@ -1,8 +1,18 @@
 import uuid
-from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
+class SearchVectorDeferredManager(models.Manager):
+    """Менеджер, не загружающий поле полнотекстового поиска.
+    Поле заполняется триггером в БД и нужно только в запросах поиска,
+    поэтому при обычном чтении и сохранении модели оно не передается."""
+
+    def get_queryset(self):
+        return super().get_queryset().defer('search_vector')
+
+
 class Organization(models.Model):
     """Класс моделей организаций.
     Настроен для исползования уже существующей таблицы в БД 'organization'
@@ -63,6 +73,8 @@ class OrganizationResponsible(models.Model):
     class Meta:
         db_table = 'organization_responsible'
         # managed = False
+        # Уникальный индекс (organization_id, user_id) создается миграцией
+        # 0004 через RunSQL, так как таблица в миграциях не управляется.
 
 
 class Tender(models.Model):
@@ -85,37 +97,85 @@ class Tender(models.Model):
     createdAt = models.DateTimeField(auto_now_add=True)
     updatedAt = models.DateTimeField(auto_now=True)
     version = models.PositiveIntegerField(default=1)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = SearchVectorDeferredManager()
 
     class Meta:
         ordering = ('name',)
+        base_manager_name = 'objects'
+        indexes = [
+            models.Index(fields=('status', 'service_type', 'name'),
+                         name='tender_status_type_name_idx'),
+            models.Index(fields=('creator', 'name', 'id'),
+                         name='tender_creator_name_idx'),
+            models.Index(fields=('name', 'id'),
+                         name='tender_published_name_idx',
+                         condition=models.Q(status='Published')),
+            # Порядок ordering=createdAt/updatedAt в обе стороны.
+            models.Index(fields=('creator', 'createdAt', 'id'),
+                         name='tender_creator_created_idx'),
+            models.Index(fields=('creator', 'updatedAt', 'id'),
+                         name='tender_creator_updated_idx'),
+            models.Index(fields=('createdAt', 'id'),
+                         name='tender_published_created_idx',
+                         condition=models.Q(status='Published')),
+            models.Index(fields=('updatedAt', 'id'),
+                         name='tender_published_updated_idx',
+                         condition=models.Q(status='Published')),
+            GinIndex(fields=('search_vector',),
+                     name='tender_search_vector_idx'),
+        ]
 
 
-class TenderArhive(models.Model):
-    """Класс архивных моделей тендеров.
-    Добавлено поле 'tender_id' для поиска тендера."""
+class TenderVersion(models.Model):
+    """Класс моделей версий тендеров.
+    В поле 'changes' хранятся только поля, изменившиеся относительно
+    предыдущей версии. Контрольная точка ('checkpoint') хранит все поля,
+    с нее начинается восстановление версии."""
 
-    STATUS_CHOICES = [
-        ('Created', 'Created'),
-        ('Published', 'Published'),
-        ('Closed', 'Closed'),
-    ]
-    id = models.UUIDField(primary_key=True,
-                          default=uuid.uuid4, editable=False)
-    name = models.CharField(max_length=100)
-    description = models.TextField(blank=True)
-    service_type = models.CharField(verbose_name='serviceType', max_length=50)
-    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
-    organization = models.ForeignKey(
-        Organization, on_delete=models.CASCADE, related_name='organization_rar')
-    creator = models.ForeignKey(
-        Employee, on_delete=models.CASCADE, related_name='created_tenders_rar')
+    tender = models.ForeignKey(
+        Tender, on_delete=models.CASCADE, related_name='versions')
+    version = models.PositiveIntegerField()
+    checkpoint = models.BooleanField(default=False)
+    changes = models.JSONField()
     createdAt = models.DateTimeField(auto_now_add=True)
-    updatedAt = models.DateTimeField(auto_now=True)
-    version = models.PositiveIntegerField(default=1)
-    tender_id = models.CharField(max_length=100)
 
     class Meta:
-        ordering = ('name',)
+        constraints = [
+            models.UniqueConstraint(fields=('tender', 'version'),
+                                    name='tender_version_uniq'),
+        ]
+
+
+class TenderFacet(models.Model):
+    """Класс моделей счетчиков тендеров по типу услуги, статусу и
+    организации для эндпоинта tenders/facets.
+    Опубликованные тендеры считаются в строках без автора, остальные - в
+    строках своего автора, поэтому пользователю видны строки без автора
+    и его собственные (см. visibility.tender_facets_for). Строки ведут
+    триггеры таблицы тендеров (миграция 0009), пересчитывает их команда
+    rebuild_tender_facets. Автор и организация хранятся без внешних
+    ключей: счетчики не мешают удалять сотрудников и организации."""
+
+    creator_id = models.UUIDField(null=True)
+    service_type = models.CharField(max_length=50)
+    status = models.CharField(max_length=10)
+    organization_id = models.UUIDField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('service_type', 'status', 'organization_id'),
+                condition=models.Q(creator_id__isnull=True),
+                name='tender_facet_published_uniq'),
+            models.UniqueConstraint(
+                fields=('creator_id', 'service_type', 'status',
+                        'organization_id'),
+                condition=models.Q(creator_id__isnull=False),
+                name='tender_facet_creator_uniq'),
+        ]
 
 
 class Bid(models.Model):
@@ -148,45 +208,74 @@ class Bid(models.Model):
     version = models.PositiveIntegerField(default=1)
     authorType = models.CharField(max_length=15, choices=AUTHOR_TYPE_CHOICES)
     quorum = models.PositiveIntegerField(default=0)
-    approved_list = ArrayField(
-        models.UUIDField(), blank=True, default=list)
+    search_vector = SearchVectorField(null=True, editable=False)
 
+    objects = SearchVectorDeferredManager()
 
-class BidArhive(models.Model):
-    """Класс архивных моделей предложений.
-    Добавлено поле 'bid_id' для поиска предложения."""
+    class Meta:
+        base_manager_name = 'objects'
+        indexes = [
+            models.Index(fields=('tender', 'status'),
+                         name='bid_tender_status_idx'),
+            models.Index(fields=('creator', 'createdAt', 'id'),
+                         name='bid_creator_created_idx'),
+            models.Index(fields=('createdAt', 'id'),
+                         name='bid_published_created_idx',
+                         condition=models.Q(status='Published')),
+            # Порядок ordering=name/updatedAt в обе стороны.
+            models.Index(fields=('creator', 'name', 'id'),
+                         name='bid_creator_name_idx'),
+            models.Index(fields=('creator', 'updatedAt', 'id'),
+                         name='bid_creator_updated_idx'),
+            models.Index(fields=('name', 'id'),
+                         name='bid_published_name_idx',
+                         condition=models.Q(status='Published')),
+            models.Index(fields=('updatedAt', 'id'),
+                         name='bid_published_updated_idx',
+                         condition=models.Q(status='Published')),
+            GinIndex(fields=('search_vector',),
+                     name='bid_search_vector_idx'),
+        ]
 
-    STATUS_CHOICES = [
-        ('Created', 'Created'),
-        ('Published', 'Published'),
-        ('Canceled', 'Canceled'),
+
+class BidVersion(models.Model):
+    """Класс моделей версий предложений.
+    Устроен так же, как версии тендеров."""
+
+    bid = models.ForeignKey(
+        Bid, on_delete=models.CASCADE, related_name='versions')
+    version = models.PositiveIntegerField()
+    checkpoint = models.BooleanField(default=False)
+    changes = models.JSONField()
+    createdAt = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=('bid', 'version'),
+                                    name='bid_version_uniq'),
+        ]
+
+
+class BidVote(models.Model):
+    """Класс моделей голосов ответственных за организацию по предложению.
+    Каждый сотрудник голосует по предложению один раз."""
+
+    DECISION_CHOICES = [
         ('Approved', 'Approved'),
         ('Rejected', 'Rejected'),
     ]
-    AUTHOR_TYPE_CHOICES = [
-        ('Organization', 'Organization'),
-        ('User', 'User'),
-    ]
-    id = models.UUIDField(primary_key=True,
-                          default=uuid.uuid4, editable=False)
-    name = models.CharField(max_length=100)
-    description = models.TextField(blank=True)
-    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
-    tender = models.ForeignKey(
-        Tender, on_delete=models.CASCADE, related_name='bids_rar')
-    organization = models.ForeignKey(
-        Organization,
-        on_delete=models.SET_NULL,
-        related_name='organization_bid_rar',
-        blank=True,
-        null=True)
-    creator = models.ForeignKey(
-        Employee, on_delete=models.CASCADE, related_name='created_bids_rar')
+    bid = models.ForeignKey(
+        Bid, on_delete=models.CASCADE, related_name='votes')
+    employee = models.ForeignKey(
+        Employee, on_delete=models.CASCADE, related_name='bid_votes')
+    decision = models.CharField(max_length=10, choices=DECISION_CHOICES)
     createdAt = models.DateTimeField(auto_now_add=True)
-    updatedAt = models.DateTimeField(auto_now=True)
-    version = models.PositiveIntegerField(default=1)
-    bid_id = models.CharField(max_length=100)
-    authorType = models.CharField(max_length=15, choices=AUTHOR_TYPE_CHOICES)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=('bid', 'employee'),
+                                    name='bid_vote_uniq'),
+        ]
 
 
 class Review(models.Model):
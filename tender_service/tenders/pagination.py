@@ -1,10 +1,253 @@
-from rest_framework.pagination import LimitOffsetPagination
+import base64
+import binascii
+import datetime
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
 from rest_framework.response import Response
 
 
+def ordering_keys(value, allowed):
+    """Порядок по полю из allowed ('поле' или '-поле'), дополненный id
+    в том же направлении, чтобы порядок был однозначным. None, если
+    поле не разрешено."""
+
+    field = value.lstrip('-')
+    if field not in allowed or value not in (field, '-' + field):
+        return None
+    if value.startswith('-'):
+        return ('-' + field, '-id')
+    return (field, 'id')
+
+
+class KeysetPagination(BasePagination):
+    """Курсорная (keyset) пагинация по составному ключу.
+    Позиция страницы задается значениями ключа последней записи, поэтому
+    запрос к любой странице - это поиск по индексу без OFFSET. Курсор
+    хранит и сортировку, поэтому не подходит к запросу с другой.
+    Ключ берется из параметра ordering, если поле есть в 'ordering_fields'
+    вьюсета, иначе из атрибута 'cursor_ordering'. Последним полем ключа
+    должен быть уникальный 'id'."""
+
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    estimate_query_param = 'estimate'
+    default_limit = 5
+    max_limit = 50
+    ordering_query_param = 'ordering'
+    ordering = ('name', 'id')
+
+    def get_ordering(self, view):
+        requested = ordering_keys(
+            self.request.query_params.get(self.ordering_query_param, ''),
+            getattr(view, 'ordering_fields', ()))
+        if requested is not None:
+            return requested
+        return tuple(getattr(view, 'cursor_ordering', self.ordering))
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        if limit <= 0:
+            return self.default_limit
+        return min(limit, self.max_limit)
+
+    @staticmethod
+    def encode_value(value):
+        # Время кодируется с микросекундами, иначе курсор теряет точность.
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        return str(value)
+
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps(
+            {'o': self.ordering_key, 'v': values, 'r': int(reverse)},
+            default=self.encode_value, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def key_field(self, queryset, name):
+        """Поле модели или аннотации, по которому идет сортировка."""
+
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    def decode_cursor(self, request, queryset):
+        """Значения ключа и направление из курсора. Курсор другой
+        сортировки или со значениями не того типа дает ошибку 400."""
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        error = ValidationError({'error': 'Некорректный курсор.'})
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            values, reverse = payload['v'], bool(payload['r'])
+            ordering = payload['o']
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise error
+        if (ordering != self.ordering_key or not isinstance(values, list)
+                or len(values) != len(self.keys)):
+            raise error
+        try:
+            return [
+                self.key_field(queryset, field).to_python(value)
+                for (field, _), value in zip(self.keys, values)
+            ], reverse
+        except (DjangoValidationError, TypeError, ValueError):
+            raise error
+
+    def keyset_filter(self, values, reverse):
+        """Строит условие (a, b) > (x, y) в виде, пригодном для поиска
+        по составному индексу: a >= x AND (a > x OR (a = x AND b > y))."""
+
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(self.keys, values):
+            forward = descending == reverse
+            lookup = '%s__%s' % (field, 'gt' if forward else 'lt')
+            condition |= equal & Q(**{lookup: value})
+            equal &= Q(**{field: value})
+        field, descending = self.keys[0]
+        lookup = '%s__%s' % (field, 'gte' if descending == reverse else 'lte')
+        return Q(**{lookup: values[0]}) & condition
+
+    def get_order_by(self, reverse):
+        order_by = []
+        for field, descending in self.keys:
+            descending = descending != reverse
+            order_by.append(('-' if descending else '') + field)
+        return order_by
+
+    @staticmethod
+    def get_value(row, field):
+        if isinstance(row, dict):
+            return row[field]
+        return getattr(row, field)
+
+    def prepare(self, queryset, request, view=None):
+        """Разбирает курсор и возвращает запрос одной страницы."""
+
+        self.request = request
+        ordering = self.get_ordering(view)
+        self.ordering_key = ','.join(ordering)
+        self.keys = [
+            (field.lstrip('-'), field.startswith('-')) for field in ordering
+        ]
+        self.limit = self.get_limit(request)
+        self.values, self.reverse = self.decode_cursor(request, queryset)
+        self.base_queryset = queryset
+        self.estimate = request.query_params.get(
+            self.estimate_query_param) in ('1', 'true')
+        self.estimated_total = None
+        if self.values is not None:
+            queryset = queryset.filter(
+                self.keyset_filter(self.values, self.reverse))
+        queryset = queryset.order_by(*self.get_order_by(self.reverse))
+        return queryset[:self.limit + 1]
+
+    def finish(self, rows):
+        """Обрезает лишнюю запись и строит курсоры соседних страниц."""
+
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if self.reverse:
+            rows.reverse()
+        self.next_cursor = self.previous_cursor = None
+        if rows:
+            first = [self.get_value(rows[0], f) for f, _ in self.keys]
+            last = [self.get_value(rows[-1], f) for f, _ in self.keys]
+            if has_more or self.reverse:
+                self.next_cursor = self.encode_cursor(last, False)
+            if self.values is not None and (has_more or not self.reverse):
+                self.previous_cursor = self.encode_cursor(first, True)
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        rows = list(self.prepare(queryset, request, view))
+        if self.estimate:
+            self.estimated_total = self.estimate_count(self.base_queryset)
+        return self.finish(rows)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Асинхронный вариант paginate_queryset для async-представлений."""
+
+        rows = [row async for row in self.prepare(queryset, request, view)]
+        if self.estimate:
+            self.estimated_total = await sync_to_async(self.estimate_count)(
+                self.base_queryset)
+        return self.finish(rows)
+
+    def estimate_count(self, queryset):
+        """Оценка общего числа записей по плану запроса, без COUNT(*)."""
+
+        queryset = queryset.order_by()
+        queryset.query.clear_limits()
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]['Plan']['Plan Rows']
+
+    def get_paginated_response(self, data):
+        response = {
+            'results': data,
+            'next': self.next_cursor,
+            'previous': self.previous_cursor,
+        }
+        if self.estimated_total is not None:
+            response['estimatedTotal'] = self.estimated_total
+        return Response(response)
+
+
 class MyPagination(LimitOffsetPagination):
-    """Переопределяет стандартный класс пагинации, 
-    убирает общий хэдер с навигацией."""
+    """Переопределяет стандартный класс пагинации,
+    убирает общий хэдер с навигацией.
+    Если в запросе передан параметр 'cursor' (пустой для первой страницы),
+    используется курсорная пагинация KeysetPagination."""
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if KeysetPagination.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Асинхронный вариант paginate_queryset. Общее число записей
+        не считается: в ответе без курсора оно не возвращается."""
+
+        self.keyset = None
+        if KeysetPagination.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return await self.keyset.apaginate_queryset(
+                queryset, request, view)
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        return [
+            row async for row in
+            queryset[self.offset:self.offset + self.limit]
+        ]
 
     def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
         return Response(data)
@@ -0,0 +1,144 @@
+import itertools
+import threading
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+PRIMARY = 'default'
+
+# Запрос закреплен за основной БД: это запись или клиент недавно писал.
+pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+
+
+class RoutingStats:
+    """Счетчики решений маршрутизатора: сколько чтений ушло на каждую
+    реплику и сколько и по какой причине осталось на основной БД."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def count(self, decision):
+        with self._lock:
+            self._counts[decision] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+routing_stats = RoutingStats()
+
+
+class ReplicaRouter:
+    """Маршрутизатор чтений на реплики.
+    Запись, чтение внутри транзакции и чтение в закрепленном за основной
+    БД запросе идут в default, остальные чтения - на реплики из
+    REPLICA_DATABASES по кругу. Миграции выполняются только на default."""
+
+    def __init__(self):
+        self._replicas = itertools.cycle(settings.REPLICA_DATABASES)
+
+    def db_for_read(self, model, **hints):
+        if pinned_to_primary.get():
+            routing_stats.count('primary:pinned')
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            routing_stats.count('primary:transaction')
+            return PRIMARY
+        replica = next(self._replicas)
+        routing_stats.count(replica)
+        return replica
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+PIN_COOKIE = 'pin_primary'
+PIN_PARAMS = ('username', 'requesterUsername', 'authorUsername')
+
+
+def pin_cache():
+    """Кэш для отметок о записи: общий, если настроен, чтобы закрепление
+    действовало во всех процессах, иначе локальный."""
+
+    return caches['shared' if 'shared' in settings.CACHES else 'default']
+
+
+def pin_key(username):
+    return f'replica-pin:{username}'
+
+
+def request_usernames(request):
+    return {request.GET[name] for name in PIN_PARAMS if request.GET.get(name)}
+
+
+def pin_keys(request):
+    """Ключи отметок о записи для пользователей запроса или None, если
+    запрос закреплен и без них: это запись или у клиента есть cookie."""
+
+    if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        return None
+    if PIN_COOKIE in request.COOKIES:
+        return None
+    return [pin_key(name) for name in request_usernames(request)]
+
+
+def is_pinned(request):
+    """Клиент недавно выполнял запись: есть cookie закрепления или
+    отметка для одного из пользователей запроса."""
+
+    keys = pin_keys(request)
+    if keys is None:
+        return True
+    return bool(keys) and bool(pin_cache().get_many(keys))
+
+
+async def ais_pinned(request):
+    """Асинхронный вариант is_pinned: отметки читаются через
+    асинхронный API кэша и не блокируют цикл событий."""
+
+    keys = pin_keys(request)
+    if keys is None:
+        return True
+    return bool(keys) and bool(await pin_cache().aget_many(keys))
+
+
+def pin_marks(request, response, usernames):
+    """Ставит клиенту cookie закрепления и возвращает отметки для
+    пользователей запроса."""
+
+    response.set_cookie(
+        PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+        httponly=True, samesite='Lax')
+    usernames = set(usernames) | request_usernames(request)
+    return {pin_key(name): True for name in usernames}
+
+
+def remember_write(request, response, usernames):
+    """После успешной записи закрепляет клиента за основной БД на
+    REPLICA_PIN_SECONDS: cookie для клиента и отметки для пользователей,
+    чтобы их следующие чтения увидели изменения, пока реплики догоняют."""
+
+    marks = pin_marks(request, response, usernames)
+    if marks:
+        pin_cache().set_many(marks, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+async def aremember_write(request, response, usernames):
+    """Асинхронный вариант remember_write."""
+
+    marks = pin_marks(request, response, usernames)
+    if marks:
+        await pin_cache().aset_many(
+            marks, timeout=settings.REPLICA_PIN_SECONDS)
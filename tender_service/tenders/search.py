@@ -0,0 +1,25 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+
+from .pagination import KeysetPagination
+
+# Конфигурация словаря должна совпадать с триггерами миграции 0005.
+SEARCH_CONFIG = 'russian'
+
+
+def search(queryset, text):
+    """Фильтрует кверисэт по полнотекстовому запросу (через GIN индекс
+    поля search_vector) и добавляет релевантность в аннотацию 'rank'."""
+
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    return queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query))
+
+
+class SearchPagination(KeysetPagination):
+    """Курсорная пагинация результатов поиска по убыванию релевантности."""
+
+    ordering = ('-rank', 'id')
+
+    def get_ordering(self, view):
+        return self.ordering
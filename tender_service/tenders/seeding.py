@@ -0,0 +1,300 @@
+import functools
+import io
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+
+from .models import (Bid, BidVersion, Employee, Organization,
+                     OrganizationResponsible, Review, Tender, TenderVersion)
+
+SEED_NAMESPACE = uuid.UUID('6f1d3c52-8a4e-4c1b-9d53-2f0a8b6e7c41')
+# Случайные значения генерируются блоками по BLOCK записей, границы
+# пакетов COPY кратны BLOCK, поэтому данные не зависят от размера пакета.
+BLOCK = 1000
+SERVICE_TYPES = ('Construction', 'Delivery', 'Manufacture')
+WORDS = ('доставка', 'монтаж', 'оборудование', 'ремонт', 'поставка',
+         'строительство', 'обслуживание', 'проектирование', 'материалы',
+         'логистика', 'склад', 'офис', 'сервер', 'кабель', 'бетон')
+
+
+class Layout:
+    """Детерминированная раскладка тестовых данных.
+    Идентификаторы и связи вычисляются по номеру записи, поэтому
+    seed_data и нагрузочный тест bench_http при одинаковых параметрах
+    согласованы без обращения к БД: тест знает, кто создал тендер и
+    какие предложения к нему относятся."""
+
+    def __init__(self, organizations=100, employees=1000, tenders=10000,
+                 bids_per_tender=3, responsibles=3):
+        self.organizations = organizations
+        self.employees = employees
+        self.tenders = tenders
+        self.bids_per_tender = bids_per_tender
+        self.responsibles = min(responsibles, employees)
+
+    @property
+    def bids(self):
+        return self.tenders * self.bids_per_tender
+
+    @property
+    def responsible_links(self):
+        return self.organizations * self.responsibles
+
+    @staticmethod
+    @functools.lru_cache(maxsize=65536)
+    def uuid(kind, number):
+        # Кэш нужен для ссылок на организации и сотрудников, которые
+        # повторяются в каждой строке тендеров и предложений.
+        return str(uuid.uuid5(SEED_NAMESPACE, f'{kind}-{number}'))
+
+    @staticmethod
+    def username(number):
+        return f'seed-user-{number}'
+
+    def responsible(self, organization, index):
+        return (organization * self.responsibles + index) % self.employees
+
+    def organization_of(self, tender):
+        return tender % self.organizations
+
+    def creator_of(self, tender):
+        return self.responsible(
+            self.organization_of(tender), tender % self.responsibles)
+
+    @staticmethod
+    def tender_status(tender):
+        return {0: 'Created', 1: 'Closed'}.get(tender % 10, 'Published')
+
+    def tender_of(self, bid):
+        return bid // self.bids_per_tender
+
+    def author_of(self, bid):
+        return (bid * 7919 + 13) % self.employees
+
+    @staticmethod
+    def bid_status(bid):
+        return 'Created' if bid % 5 == 0 else 'Published'
+
+
+def copy_value(value):
+    """Значение в текстовом формате COPY."""
+
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, dict):
+        value = json.dumps(value, ensure_ascii=False)
+    elif not isinstance(value, str):
+        value = str(value)
+    return (value.replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def copy_rows(cursor, model, columns, rows):
+    """Загружает строки в таблицу модели через COPY FROM STDIN.
+    columns - имена полей модели в порядке значений строк."""
+
+    return copy_into(
+        cursor, model._meta.db_table,
+        [model._meta.get_field(name).column for name in columns], rows)
+
+
+def copy_into(cursor, table, columns, rows):
+    """Загружает строки в таблицу через COPY FROM STDIN. Поддерживает
+    psycopg 3 (cursor.copy) и psycopg2 (copy_expert)."""
+
+    sql = 'COPY %s (%s) FROM STDIN' % (
+        cursor.db.ops.quote_name(table),
+        ', '.join(cursor.db.ops.quote_name(name) for name in columns))
+    buffer = io.StringIO()
+    count = 0
+    for row in rows:
+        buffer.write('\t'.join(copy_value(value) for value in row))
+        buffer.write('\n')
+        count += 1
+    raw = cursor.cursor
+    if hasattr(raw, 'copy'):
+        with raw.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+    else:
+        buffer.seek(0)
+        raw.copy_expert(sql, buffer)
+    return count
+
+
+class Generator:
+    """Строки тестовых данных для COPY. Тексты и даты берутся из
+    генератора случайных чисел с заданным seed, поэтому повторный запуск
+    с теми же параметрами дает те же данные."""
+
+    def __init__(self, layout, seed=0, versions=3, reviews_per_bid=0.1):
+        self.layout = layout
+        self.seed = seed
+        self.versions = versions
+        self.reviews_per_bid = reviews_per_bid
+        self.now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def stream(self, kind, start, stop):
+        """Номера записей с генератором случайных чисел их блока."""
+
+        rng = None
+        for number in range(start, stop):
+            if rng is None or number % BLOCK == 0:
+                rng = random.Random(f'{self.seed}-{kind}-{number // BLOCK}')
+            yield number, rng
+
+    def text(self, rng, words):
+        return ' '.join(rng.choices(WORDS, k=words))
+
+    def moment(self, rng):
+        return self.now - timedelta(seconds=rng.randrange(365 * 86400))
+
+    def version_count(self, rng):
+        return 1 + rng.randrange(self.versions) if self.versions else 1
+
+    def organizations(self, start, stop):
+        for number, rng in self.stream('organization', start, stop):
+            moment = self.moment(rng)
+            yield (self.layout.uuid('organization', number),
+                   f'Организация {number}', self.text(rng, 5),
+                   rng.choice(('IE', 'LLC', 'JSC')), moment, moment)
+
+    def employees(self, start, stop):
+        for number, rng in self.stream('employee', start, stop):
+            moment = self.moment(rng)
+            yield (self.layout.uuid('employee', number),
+                   self.layout.username(number), f'Имя {number}',
+                   f'Фамилия {number}', moment, moment)
+
+    def responsibles(self, start, stop):
+        layout = self.layout
+        for number in range(start, stop):
+            organization, index = divmod(number, layout.responsibles)
+            yield (layout.uuid('responsible', number),
+                   layout.uuid('organization', organization),
+                   layout.uuid('employee', layout.responsible(
+                       organization, index)))
+
+    def tender(self, number, rng):
+        """Поля тендера и история версий: версия 1 - полный снимок,
+        следующие меняют описание."""
+
+        layout = self.layout
+        created = self.moment(rng)
+        versions = self.version_count(rng)
+        state = {
+            'name': f'Тендер {number}: {self.text(rng, 2)}',
+            'description': self.text(rng, 12),
+            'service_type': SERVICE_TYPES[number % len(SERVICE_TYPES)],
+            'status': layout.tender_status(number),
+            'organization_id': layout.uuid(
+                'organization', layout.organization_of(number)),
+            'creator_id': layout.uuid('employee', layout.creator_of(number)),
+        }
+        history = list(self.history(rng, state, versions, created))
+        return state, created, history[-1][3], versions, history
+
+    def history(self, rng, state, versions, created):
+        interval = getattr(settings, 'VERSION_CHECKPOINT_INTERVAL', 10)
+        moment = created
+        for version in range(1, versions + 1):
+            if version > 1:
+                moment += timedelta(seconds=rng.randrange(1, 86400))
+                state['description'] = self.text(rng, 12)
+            checkpoint = (version - 1) % interval == 0
+            changes = (dict(state) if checkpoint
+                       else {'description': state['description']})
+            yield version, checkpoint, changes, moment
+
+    def tenders(self, start, stop):
+        layout = self.layout
+        for number, rng in self.stream('tender', start, stop):
+            state, created, updated, versions, _ = self.tender(number, rng)
+            yield (layout.uuid('tender', number), state['name'],
+                   state['description'], state['service_type'],
+                   state['status'], state['organization_id'],
+                   state['creator_id'], created, updated, versions)
+
+    def tender_versions(self, start, stop):
+        for number, rng in self.stream('tender', start, stop):
+            tender = self.layout.uuid('tender', number)
+            for version, checkpoint, changes, moment in self.tender(
+                    number, rng)[4]:
+                yield tender, version, checkpoint, changes, moment
+
+    def bid(self, number, rng):
+        layout = self.layout
+        created = self.moment(rng)
+        versions = self.version_count(rng)
+        state = {
+            'name': f'Предложение {number}: {self.text(rng, 2)}',
+            'description': self.text(rng, 12),
+            'tender_id': layout.uuid('tender', layout.tender_of(number)),
+            'status': layout.bid_status(number),
+            'organization_id': None,
+            'creator_id': layout.uuid('employee', layout.author_of(number)),
+            'authorType': 'User',
+        }
+        history = list(self.history(rng, state, versions, created))
+        return state, created, history[-1][3], versions, history
+
+    def bids(self, start, stop):
+        layout = self.layout
+        for number, rng in self.stream('bid', start, stop):
+            state, created, updated, versions, _ = self.bid(number, rng)
+            yield (layout.uuid('bid', number), state['name'],
+                   state['description'], state['status'], state['tender_id'],
+                   None, state['creator_id'], created, updated, versions,
+                   'User', 0)
+
+    def bid_versions(self, start, stop):
+        for number, rng in self.stream('bid', start, stop):
+            bid = self.layout.uuid('bid', number)
+            for version, checkpoint, changes, moment in self.bid(
+                    number, rng)[4]:
+                yield bid, version, checkpoint, changes, moment
+
+    def reviews(self, start, stop):
+        """Отзывы оставляют ответственные организации тендера на каждое
+        предложение с вероятностью reviews_per_bid."""
+
+        layout = self.layout
+        for number, rng in self.stream('review', start, stop):
+            if rng.random() >= self.reviews_per_bid:
+                continue
+            tender = layout.tender_of(number)
+            yield (layout.uuid('review', number),
+                   layout.uuid('bid', number),
+                   layout.uuid('employee', layout.creator_of(tender)),
+                   self.text(rng, 8), self.moment(rng),
+                   layout.uuid('employee', layout.author_of(number)))
+
+
+# Таблица, столбцы в порядке генератора, метод генератора и число
+# записей-источников (для версий и отзывов - число владельцев).
+TABLES = (
+    (Organization, ('id', 'name', 'description', 'type', 'created_at',
+                    'updated_at'), 'organizations', 'organizations'),
+    (Employee, ('id', 'username', 'first_name', 'last_name', 'created_at',
+                'updated_at'), 'employees', 'employees'),
+    (OrganizationResponsible, ('id', 'organization', 'user'),
+     'responsibles', 'responsible_links'),
+    (Tender, ('id', 'name', 'description', 'service_type', 'status',
+              'organization', 'creator', 'createdAt', 'updatedAt',
+              'version'), 'tenders', 'tenders'),
+    (TenderVersion, ('tender', 'version', 'checkpoint', 'changes',
+                     'createdAt'), 'tender_versions', 'tenders'),
+    (Bid, ('id', 'name', 'description', 'status', 'tender', 'organization',
+           'creator', 'createdAt', 'updatedAt', 'version', 'authorType',
+           'quorum'), 'bids', 'bids'),
+    (BidVersion, ('bid', 'version', 'checkpoint', 'changes', 'createdAt'),
+     'bid_versions', 'bids'),
+    (Review, ('id', 'bid', 'author_feedback', 'description', 'createdAt',
+              'user'), 'reviews', 'bids'),
+)
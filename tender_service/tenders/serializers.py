@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Organization, Employee, Tender, Bid, Review
+from .models import Organization, Employee, Tender, Bid, BidVote, Review
 
 
 class TenderSerializer(serializers.ModelSerializer):
@@ -13,7 +13,7 @@ class TenderSerializer(serializers.ModelSerializer):
     creatorUsername = serializers.PrimaryKeyRelatedField(
         queryset=Employee.objects.all(),
         write_only=True,
-        source='creator_id'
+        source='creator'
     )
 
     class Meta:
@@ -22,6 +22,21 @@ class TenderSerializer(serializers.ModelSerializer):
                   'version', 'createdAt', 'creatorUsername')
 
 
+class TenderBulkItemSerializer(serializers.Serializer):
+    """Сериализатор одного тендера в пакетном создании.
+    Проверяет только формат полей, без запросов к БД: пользователи,
+    организации и права проверяются для всего пакета сразу."""
+
+    name = serializers.CharField(max_length=100)
+    description = serializers.CharField(
+        allow_blank=True, required=False, default='')
+    serviceType = serializers.CharField(max_length=50)
+    status = serializers.ChoiceField(
+        choices=Tender.STATUS_CHOICES, default='Created')
+    organizationId = serializers.UUIDField()
+    creatorUsername = serializers.CharField(max_length=50)
+
+
 class BidSerializer(serializers.ModelSerializer):
     """Сериализатор для модели предложения.
     Переопределяет название некоторых полей, скрывает 
@@ -52,7 +67,129 @@ class BidSerializer(serializers.ModelSerializer):
                   'version', 'createdAt', 'creatorUsername', 'organizationId')
 
 
+def as_str(value):
+    return None if value is None else str(value)
+
+
+class Projection:
+    """Быстрая сериализация списков только для чтения.
+    Выбирает из БД только нужные столбцы через values() и строит ответ
+    из словарей, не создавая моделей и полей сериализатора для каждой
+    записи. Ответ совпадает с ответом соответствующего ModelSerializer,
+    дата создания форматируется тем же полем DRF.
+    fields - тройки (поле ответа, столбец, преобразование или None),
+    key_columns - столбцы, нужные только ключу курсорной пагинации
+    (параметр ordering): выбираются, но в ответ не попадают."""
+
+    fields = ()
+    key_columns = ()
+    datetime_field = serializers.DateTimeField()
+
+    def __init__(self, instance=None, many=False, context=None):
+        self.instance = instance
+        self.many = many
+
+    @classmethod
+    def project(cls, queryset):
+        columns = [column for _, column, _ in cls.fields]
+        return queryset.values(*columns, *(
+            column for column in cls.key_columns if column not in columns))
+
+    def to_representation(self, row):
+        data = {}
+        for name, column, convert in self.fields:
+            value = row[column]
+            data[name] = value if convert is None else convert(value)
+        return data
+
+    @property
+    def data(self):
+        if self.many:
+            return [self.to_representation(row) for row in self.instance]
+        return self.to_representation(self.instance)
+
+
+class TenderProjection(Projection):
+    """Тендеры в формате TenderSerializer."""
+
+    key_columns = ('updatedAt',)
+    fields = (
+        ('id', 'id', as_str),
+        ('name', 'name', None),
+        ('description', 'description', None),
+        ('serviceType', 'service_type', None),
+        ('status', 'status', None),
+        ('organizationId', 'organization_id', as_str),
+        ('version', 'version', None),
+        ('createdAt', 'createdAt',
+         Projection.datetime_field.to_representation),
+    )
+
+
+class BidProjection(Projection):
+    """Предложения в формате BidSerializer."""
+
+    key_columns = ('updatedAt',)
+    fields = (
+        ('id', 'id', as_str),
+        ('name', 'name', None),
+        ('description', 'description', None),
+        ('status', 'status', None),
+        ('tenderId', 'tender_id', as_str),
+        ('authorType', 'authorType', None),
+        ('authorId', 'creator_id', as_str),
+        ('version', 'version', None),
+        ('createdAt', 'createdAt',
+         Projection.datetime_field.to_representation),
+    )
+
+
+class TenderVersionProjection(Projection):
+    """Записи истории версий тендеров для выгрузки."""
+
+    fields = (
+        ('tenderId', 'tender_id', as_str),
+        ('version', 'version', None),
+        ('checkpoint', 'checkpoint', None),
+        ('changes', 'changes', None),
+        ('createdAt', 'createdAt',
+         Projection.datetime_field.to_representation),
+    )
+
+
+class BidVersionProjection(Projection):
+    """Записи истории версий предложений для выгрузки."""
+
+    fields = (
+        ('bidId', 'bid_id', as_str),
+        ('version', 'version', None),
+        ('checkpoint', 'checkpoint', None),
+        ('changes', 'changes', None),
+        ('createdAt', 'createdAt',
+         Projection.datetime_field.to_representation),
+    )
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = ('id', 'description', 'createdAt')
+
+
+class VersionSerializer(serializers.Serializer):
+    """Сериализатор записи истории версий тендера или предложения."""
+
+    version = serializers.IntegerField()
+    checkpoint = serializers.BooleanField()
+    changes = serializers.JSONField()
+    createdAt = serializers.DateTimeField()
+
+
+class BidVoteSerializer(serializers.ModelSerializer):
+    """Сериализатор голоса по предложению."""
+
+    username = serializers.CharField(source='employee.username')
+
+    class Meta:
+        model = BidVote
+        fields = ('username', 'decision', 'createdAt')
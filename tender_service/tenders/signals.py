@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import entity_cache
+from .directory import directory
+from .identity import employee_cache
+from .models import Bid, Employee, OrganizationResponsible, Tender
+
+
+@receiver((post_save, post_delete), sender=Employee)
+def invalidate_employee(sender, instance, **kwargs):
+    """Сбрасывает сотрудника в кэше после изменения или удаления."""
+
+    employee_cache.invalidate(instance)
+
+
+@receiver(post_save, sender=OrganizationResponsible)
+@receiver(post_delete, sender=OrganizationResponsible)
+def change_responsible(sender, instance, **kwargs):
+    """После фиксации транзакции увеличивает поколение справочников:
+    индекс ответственных сбрасывается в этом процессе сразу, в остальных -
+    при очередной сверке поколения. Правка только своего индекса оставила
+    бы другим процессам устаревшие права до перестроения по TTL."""
+
+    transaction.on_commit(directory.bump)
+
+
+@receiver(post_save, sender=Tender)
+@receiver(post_save, sender=Bid)
+def cache_entity(sender, instance, created, **kwargs):
+    """Записывает созданный тендер или предложение в кэш. Измененный
+    удаляется из кэша: save() мог сохранить только часть полей
+    экземпляра, взятого из кэша, и остальные поля в нем устаревшие."""
+
+    if created:
+        entity_cache.put(instance)
+    else:
+        entity_cache.invalidate(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=Tender)
+@receiver(post_delete, sender=Bid)
+def invalidate_entity(sender, instance, **kwargs):
+    entity_cache.invalidate(sender, [instance.pk])
@@ -0,0 +1,101 @@
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+from .routers import pinned_to_primary
+
+
+class Call:
+    """Выполняющийся запрос и ожидающие его результата потоки."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Объединение одинаковых одновременных чтений в одном процессе.
+    Первый поток с данным ключом выполняет запрос, остальные ждут его
+    результат вместо того, чтобы повторять тот же запрос к БД.
+    Ожидание ограничено: к одному запросу присоединяется не больше
+    SINGLE_FLIGHT_MAX_WAITERS потоков и каждый ждет не дольше
+    SINGLE_FLIGHT_TIMEOUT секунд, после чего выполняет запрос сам.
+    Результат общий для всех потоков, изменяемые объекты вызывающий
+    код должен копировать. Внутри транзакции запросы не объединяются:
+    поток должен видеть собственные незафиксированные изменения. Не
+    объединяются и запросы, закрепленные за основной БД: иначе клиент
+    после записи получил бы результат чтения с реплики, начатого другим
+    запросом, без своих изменений."""
+
+    def __init__(self):
+        self.leaders = 0
+        self.shared = 0
+        self.overflows = 0
+        self.timeouts = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    @property
+    def max_waiters(self):
+        return getattr(settings, 'SINGLE_FLIGHT_MAX_WAITERS', 100)
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'SINGLE_FLIGHT_TIMEOUT', 5)
+
+    def do(self, key, fetch):
+        """Возвращает (результат fetch(), получен ли он от другого потока).
+        Исключение из fetch получают все ожидавшие потоки."""
+
+        if connection.in_atomic_block or pinned_to_primary.get():
+            return fetch(), False
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = Call()
+                self.leaders += 1
+                leader = True
+            elif call.waiters >= self.max_waiters:
+                self.overflows += 1
+                call = None
+                leader = False
+            else:
+                call.waiters += 1
+                leader = False
+        if call is None:
+            return fetch(), False
+        if leader:
+            try:
+                call.result = fetch()
+            except Exception as error:
+                call.error = error
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        elif not call.done.wait(self.timeout):
+            with self._lock:
+                self.timeouts += 1
+            return fetch(), False
+        else:
+            with self._lock:
+                self.shared += 1
+        if call.error is not None:
+            raise call.error
+        return call.result, not leader
+
+    def stats(self):
+        with self._lock:
+            return {
+                'leaders': self.leaders,
+                'shared': self.shared,
+                'overflows': self.overflows,
+                'timeouts': self.timeouts,
+                'in_flight': len(self._calls),
+            }
+
+
+single_flight = SingleFlight()
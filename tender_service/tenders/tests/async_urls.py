@@ -0,0 +1,7 @@
+"""Маршруты с async-представлениями чтений, как при ASYNC_READ_VIEWS,
+для проверки бюджетов запросов этих представлений."""
+
+from tender_service.urls import urlpatterns as sync_urlpatterns
+from tenders.urls import async_read_patterns
+
+urlpatterns = async_read_patterns() + sync_urlpatterns
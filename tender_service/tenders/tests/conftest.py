@@ -0,0 +1,76 @@
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+
+from tenders.directory import directory
+from tenders.identity import employee_cache
+from tenders.membership import membership
+from tenders.models import (Bid, Employee, Organization,
+                            OrganizationResponsible, Tender)
+from tenders.versioning import tender_versions
+
+
+@pytest.fixture(autouse=True)
+def process_caches(settings):
+    """Кэши процесса не переживают откат БД после теста, поэтому
+    каждый тест начинается с пустых кэшей и без общего уровня."""
+
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests'}}
+    caches['default'].clear()
+    employee_cache.clear()
+    membership.invalidate()
+    yield
+    employee_cache.clear()
+    membership.invalidate()
+
+
+@pytest.fixture
+def organization(db):
+    return Organization.objects.create(name='Заказчик', type='LLC')
+
+
+@pytest.fixture
+def owner(organization):
+    employee = Employee.objects.create(username='owner')
+    OrganizationResponsible.objects.create(
+        organization=organization, user=employee)
+    return employee
+
+
+@pytest.fixture
+def tender(organization, owner):
+    tender = Tender.objects.create(
+        name='Тендер', description='Доставка', service_type='Delivery',
+        status='Published', organization=organization, creator=owner)
+    tender_versions.record_new([tender])
+    return tender
+
+
+@pytest.fixture
+def bidder(db):
+    return Employee.objects.create(username='bidder')
+
+
+@pytest.fixture
+def bid(tender, bidder):
+    return Bid.objects.create(
+        name='Предложение', description='Доставка за день',
+        status='Published', tender=tender, creator=bidder, authorType='User')
+
+
+@pytest.fixture
+def database_cache(settings, db):
+    """Общий кэш на DatabaseCache: синхронные обращения к нему из цикла
+    событий дают SynchronousOnlyOperation."""
+
+    settings.CACHES = {
+        **settings.CACHES,
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'test_shared_cache'}}
+    call_command('createcachetable', 'test_shared_cache')
+    directory._checked_at = directory._seen = None
+    yield caches['shared']
+    directory._checked_at = directory._seen = None
@@ -0,0 +1,94 @@
+import copy
+
+from django.db.models import F
+
+from tenders.cache import entity_cache, get_tender
+from tenders.concurrency import make_etag
+from tenders.models import Tender
+from tenders.versioning import tender_versions
+
+
+def edit(client, tender, etag, description='Новое описание'):
+    return client.patch(
+        f'/api/tenders/{tender.pk}/edit?username=owner',
+        {'description': description}, content_type='application/json',
+        headers={'If-Match': etag})
+
+
+def change_elsewhere(tender):
+    """Правка другим процессом: БД меняется, кэш этого процесса - нет."""
+
+    Tender.objects.filter(pk=tender.pk).update(
+        version=F('version') + 1, description='Чужая правка')
+    return Tender.objects.get(pk=tender.pk)
+
+
+def test_edit_with_current_etag_and_stale_cache(client, tender):
+    get_tender(tender.pk)
+    current = change_elsewhere(tender)
+    response = edit(client, tender, make_etag(current))
+    assert response.status_code == 200, response.content
+    assert response.json()['version'] == current.version + 1
+    assert response.json()['description'] == 'Новое описание'
+
+
+def test_edit_with_outdated_etag_returns_current_etag(client, tender):
+    outdated = make_etag(get_tender(tender.pk))
+    current = change_elsewhere(tender)
+    response = edit(client, tender, outdated)
+    assert response.status_code == 412
+    assert response['ETag'] == make_etag(current)
+    # Устаревшая запись удалена из кэша, статус читается из БД.
+    response = client.get(f'/api/tenders/{tender.pk}/status?username=owner')
+    assert response['ETag'] == make_etag(current)
+
+
+def test_edit_keeps_fields_changed_elsewhere(
+        client, tender, django_capture_on_commit_callbacks):
+    get_tender(tender.pk)
+    current = change_elsewhere(tender)
+    with django_capture_on_commit_callbacks(execute=True):
+        client.patch(
+            f'/api/tenders/{tender.pk}/edit?username=owner',
+            {'name': 'Новое название'}, content_type='application/json',
+            headers={'If-Match': make_etag(current)})
+    tender.refresh_from_db()
+    assert tender.name == 'Новое название'
+    assert tender.description == 'Чужая правка'
+    assert get_tender(tender.pk).description == 'Чужая правка'
+
+
+def test_edit_keeps_status_changed_elsewhere(
+        client, tender, django_capture_on_commit_callbacks):
+    get_tender(tender.pk)
+    # Смена статуса не увеличивает версию.
+    Tender.objects.filter(pk=tender.pk).update(status='Closed')
+    with django_capture_on_commit_callbacks(execute=True):
+        response = edit(client, tender, make_etag(tender))
+    assert response.status_code == 200, response.content
+    assert response.json()['status'] == 'Closed'
+    assert get_tender(tender.pk).status == 'Closed'
+    version = tender_versions.state(tender.pk, tender.version + 1)
+    assert version['status'] == 'Closed'
+
+
+def test_status_change_does_not_cache_stale_fields(
+        client, tender, django_capture_on_commit_callbacks):
+    get_tender(tender.pk)
+    current = change_elsewhere(tender)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.put(
+            f'/api/tenders/{tender.pk}/status?username=owner&status=Closed')
+    assert response.status_code == 200, response.content
+    cached = get_tender(tender.pk)
+    assert (cached.status, cached.version) == ('Closed', current.version)
+    assert cached.description == 'Чужая правка'
+
+
+def test_put_keeps_fresher_entry(tender, django_capture_on_commit_callbacks):
+    stale = copy.copy(get_tender(tender.pk))
+    current = change_elsewhere(tender)
+    with django_capture_on_commit_callbacks(execute=True):
+        entity_cache.put(current)
+        entity_cache.put(stale)
+    assert get_tender(tender.pk).version == current.version
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.utils.http import http_date
+
+from tenders.models import Tender
+
+
+def test_list_without_removed_tender_is_modified(client, tender):
+    older = Tender.objects.create(
+        name='Старый тендер', description='Доставка',
+        service_type='Delivery', status='Published',
+        organization=tender.organization, creator=tender.creator)
+    Tender.objects.filter(pk=older.pk).update(
+        updatedAt=tender.updatedAt - timedelta(days=1))
+    url = '/api/tenders/my?username=owner'
+    response = client.get(url)
+    assert len(response.json()) == 2
+    assert 'Last-Modified' not in response
+    etag = response['ETag']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    # Время последнего изменения выборки осталось прежним.
+    older.delete()
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    since = http_date(tender.updatedAt.timestamp())
+    response = client.get(url, headers={'If-Modified-Since': since})
+    assert response.status_code == 200
@@ -0,0 +1,21 @@
+from asgiref.sync import async_to_sync
+
+from tenders.directory import directory
+from tenders.identity import employee_cache
+from tenders.membership import membership
+
+
+def test_async_reads_check_generation_asynchronously(
+        database_cache, organization, owner):
+    employee = async_to_sync(employee_cache.aget)('owner')
+    assert employee.pk == owner.pk
+    assert async_to_sync(membership.ais_member)(organization.pk, owner.pk)
+
+
+def test_generation_change_resets_caches(database_cache, owner):
+    employee_cache.get('owner')
+    directory.check()
+    database_cache.set(directory.key, 1, None)
+    directory._checked_at = None
+    async_to_sync(directory.acheck)()
+    assert employee_cache.lookup('owner')[0] is False
@@ -0,0 +1,51 @@
+import csv
+import uuid
+
+import pytest
+
+from tenders.directory_sync import EMPLOYEES, sync
+from tenders.models import Employee
+
+
+def write_employees(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['id', 'username', 'first_name', 'last_name'])
+        writer.writerows(rows)
+    return str(path)
+
+
+@pytest.fixture
+def staff(db):
+    return Employee.objects.bulk_create([
+        Employee(username='anna'), Employee(username='boris')])
+
+
+def test_username_collisions_are_rejected(tmp_path, staff):
+    anna, boris = staff
+    twin = [str(uuid.uuid4()), str(uuid.uuid4())]
+    path = write_employees(tmp_path / 'employees.csv', [
+        (anna.pk, 'anna', 'Анна', ''),
+        # Занятый username под новым id и переименование в занятый.
+        (uuid.uuid4(), 'anna', '', ''),
+        (boris.pk, 'anna', '', ''),
+        # Один username у двух новых записей снимка.
+        (twin[0], 'twin', '', ''),
+        (twin[1], 'twin', '', ''),
+        (uuid.uuid4(), 'vera', '', ''),
+    ])
+    report = sync({EMPLOYEES: path}, delete=False)
+    assert report['employee'] == {
+        'loaded': 6, 'inserted': 1, 'updated': 1, 'rejected': 4}
+    assert dict(Employee.objects.values_list('username', 'first_name')) == {
+        'anna': 'Анна', 'boris': '', 'vera': ''}
+
+
+def test_username_of_deleted_employee_is_reused(tmp_path, staff):
+    anna, boris = staff
+    newcomer = uuid.uuid4()
+    path = write_employees(tmp_path / 'employees.csv', [
+        (anna.pk, 'anna', '', ''), (newcomer, 'boris', '', '')])
+    report = sync({EMPLOYEES: path}, max_delete_ratio=0.5)
+    assert report['employee']['rejected'] == 0
+    assert Employee.objects.get(username='boris').pk == newcomer
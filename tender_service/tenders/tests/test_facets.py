@@ -0,0 +1,50 @@
+from tenders import facets
+from tenders.models import Employee, Organization, Tender
+
+
+def assert_counters_match():
+    assert facets.stored() == facets.expected()
+
+
+def test_counters_follow_tenders(tender, owner):
+    assert_counters_match()
+    other = Organization.objects.create(name='Подрядчик', type='JSC')
+    author = Employee.objects.create(username='author')
+    drafts = Tender.objects.bulk_create([
+        Tender(name=f'Черновик {number}', description='Ремонт',
+               service_type='Construction', status='Created',
+               organization=other, creator=author)
+        for number in range(3)])
+    assert_counters_match()
+
+    # Смена статуса переносит тендер между публичными и личными счетчиками.
+    Tender.objects.filter(pk=drafts[0].pk).update(status='Published')
+    tender.status = 'Closed'
+    tender.save()
+    assert_counters_match()
+
+    # Правка полей счетчиков, в том числе нескольких сразу.
+    Tender.objects.filter(pk=drafts[1].pk).update(
+        service_type='Delivery', organization=tender.organization)
+    Tender.objects.filter(pk=tender.pk).update(description='Без изменений')
+    assert_counters_match()
+
+    Tender.objects.filter(pk__in=[drafts[2].pk, tender.pk]).delete()
+    assert_counters_match()
+    assert facets.stored() == {
+        (None, 'Construction', 'Published', other.pk): 1,
+        (author.pk, 'Delivery', 'Created', tender.organization_id): 1,
+    }
+
+
+def test_facets_endpoint(client, tender, owner):
+    Tender.objects.create(
+        name='Черновик', description='Ремонт', service_type='Construction',
+        status='Created', organization=tender.organization, creator=owner)
+    data = client.get('/api/tenders/facets?username=owner').json()
+    assert data['total'] == 2
+    assert data['status'] == [
+        {'value': 'Created', 'count': 1}, {'value': 'Published', 'count': 1}]
+    data = client.get('/api/tenders/facets').json()
+    assert data['total'] == 1
+    assert data['serviceType'] == [{'value': 'Delivery', 'count': 1}]
@@ -0,0 +1,17 @@
+import pytest
+
+USER_ERROR = {'error': 'Пользователь не существует или некорректен.'}
+
+
+@pytest.mark.parametrize('path, params', [
+    ('/api/tenders', {}),
+    ('/api/tenders', {'cursor': ''}),
+    ('/api/tenders/{tender}', {}),
+    ('/api/bids', {}),
+    ('/api/tenders/facets', {}),
+])
+def test_unknown_username(client, tender, path, params):
+    response = client.get(
+        path.format(tender=tender.pk), {**params, 'username': 'nobody'})
+    assert response.status_code == 401
+    assert response.json() == USER_ERROR
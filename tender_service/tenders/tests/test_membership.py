@@ -0,0 +1,51 @@
+from tenders.membership import membership
+from tenders.models import Employee, Review, Tender
+
+
+def stale_responsible(organization):
+    """Ответственный, уже удаленный другим процессом: индекс этого
+    процесса еще считает его ответственным."""
+
+    stranger = Employee.objects.create(username='stranger')
+    membership.rebuild()
+    membership.add(organization.pk, stranger.pk)
+    return stranger
+
+
+def test_confirm_rechecks_positive_in_db(organization, owner):
+    stranger = stale_responsible(organization)
+    assert membership.is_member(organization.pk, stranger.pk)
+    assert not membership.is_member(
+        organization.pk, stranger.pk, confirm=True)
+    # Устаревшая пара удалена из индекса и для чтений.
+    assert not membership.is_member(organization.pk, stranger.pk)
+    assert membership.is_member(organization.pk, owner.pk, confirm=True)
+
+
+def test_confirm_many_and_organizations(organization, owner):
+    stranger = stale_responsible(organization)
+    pairs = [(organization.pk, owner.pk), (organization.pk, stranger.pk)]
+    assert membership.members(pairs, confirm=True) == {
+        (organization.pk, owner.pk)}
+    membership.add(organization.pk, stranger.pk)
+    assert membership.organizations_of(stranger.pk, confirm=True) == set()
+    assert membership.organizations_of(stranger.pk) == set()
+
+
+def test_removed_responsible_cannot_create_tender(client, organization):
+    stranger = stale_responsible(organization)
+    response = client.post('/api/tenders/new', {
+        'name': 'Тендер', 'description': 'Доставка',
+        'serviceType': 'Delivery', 'organizationId': str(organization.pk),
+        'creatorUsername': stranger.username,
+    }, content_type='application/json')
+    assert response.status_code == 401
+    assert not Tender.objects.filter(creator=stranger).exists()
+
+
+def test_removed_responsible_cannot_leave_feedback(client, bid):
+    stranger = stale_responsible(bid.tender.organization)
+    response = client.put(
+        f'/api/bids/{bid.pk}/feedback?username=stranger&bidFeedback=ok')
+    assert response.status_code == 403
+    assert not Review.objects.exists()
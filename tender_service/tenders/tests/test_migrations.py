@@ -0,0 +1,75 @@
+import logging
+import uuid
+
+import pytest
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from tenders.concurrency import versioned_update
+from tenders.versioning import tender_versions
+
+BEFORE = [('tenders', '0005_search_vectors')]
+BEFORE_KEYS = [('tenders', '0003_bid_approved_list_bid_quorum')]
+ARCHIVE_KEYS = [('tenders', '0004_indexes_and_archive_keys')]
+
+
+def migrate(targets):
+    executor = MigrationExecutor(connection)
+    executor.loader.build_graph()
+    executor.migrate(targets)
+    return executor.loader.project_state(targets).apps
+
+
+def latest_migrations():
+    return [('tenders', leaf) for app, leaf in
+            MigrationExecutor(connection).loader.graph.leaf_nodes()
+            if app == 'tenders']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_archive_keys_report_duplicates(organization, owner, tender, caplog):
+    latest = latest_migrations()
+    try:
+        apps = migrate(BEFORE_KEYS)
+        archive = apps.get_model('tenders', 'TenderArhive')
+        fields = {'name': 'Тендер', 'service_type': 'Delivery',
+                  'status': 'Created', 'organization_id': organization.pk,
+                  'creator_id': owner.pk}
+        created = [archive.objects.create(
+            tender_id=tender.pk, version=1, **fields).pk for _ in range(2)]
+        # История удаленного тендера: без ограничения FK она сохраняется.
+        orphan = uuid.uuid4()
+        archive.objects.create(tender_id=orphan, version=1, **fields)
+        with caplog.at_level(logging.WARNING):
+            apps = migrate(ARCHIVE_KEYS)
+        archive = apps.get_model('tenders', 'TenderArhive')
+        assert sorted(map(str, archive.objects.values_list(
+            'tender_id', flat=True))) == sorted([str(tender.pk), str(orphan)])
+        # Из повторов остается строка с меньшим id.
+        assert f'id={max(created)}' in caplog.text
+        field = archive._meta.get_field('tender')
+        assert field.related_model._meta.label == 'tenders.Tender'
+        assert not field.db_constraint
+    finally:
+        migrate(latest)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_delta_versions_rollback(tender, settings):
+    settings.VERSION_CHECKPOINT_INTERVAL = 2
+    versioned_update(tender, {'description': 'Вторая'}, tender_versions)
+    versioned_update(tender, {'status': 'Closed'}, tender_versions)
+    latest = latest_migrations()
+    try:
+        apps = migrate(BEFORE)
+        archive = apps.get_model('tenders', 'TenderArhive')
+        rows = archive.objects.filter(tender_id=tender.pk).order_by(
+            'version').values_list('version', 'description', 'status')
+        assert list(rows) == [
+            (1, 'Доставка', 'Published'),
+            (2, 'Вторая', 'Published'),
+            (3, 'Вторая', 'Closed')]
+    finally:
+        migrate(latest)
+    state = tender_versions.state(tender.pk, 3)
+    assert (state['description'], state['status']) == ('Вторая', 'Closed')
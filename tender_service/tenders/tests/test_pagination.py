@@ -0,0 +1,53 @@
+import base64
+import json
+
+import pytest
+
+from tenders.models import Tender
+
+URL = '/api/tenders/my'
+
+
+def cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+@pytest.fixture
+def tenders(tender):
+    others = [
+        Tender.objects.create(
+            name=f'Тендер {number}', description='Доставка',
+            service_type='Delivery', status='Published',
+            organization=tender.organization, creator=tender.creator)
+        for number in range(2)]
+    return [tender, *others]
+
+
+def test_cursor_pages(client, tenders):
+    params = {'username': 'owner', 'limit': 2, 'ordering': '-createdAt'}
+    first = client.get(URL, {**params, 'cursor': ''}).json()
+    second = client.get(URL, {**params, 'cursor': first['next']}).json()
+    names = [row['name'] for row in first['results'] + second['results']]
+    assert names == ['Тендер 1', 'Тендер 0', 'Тендер']
+    assert second['next'] is None
+
+
+@pytest.mark.parametrize('payload', [
+    {'o': 'name,id', 'v': ['Тендер', 'notuuid'], 'r': 0},
+    {'o': 'name,id', 'v': [['Тендер'], {}], 'r': 0},
+    {'v': ['Тендер', '00000000-0000-0000-0000-000000000000'], 'r': 0},
+])
+def test_invalid_cursor(client, tenders, payload):
+    response = client.get(
+        URL, {'username': 'owner', 'cursor': cursor(payload)})
+    assert response.status_code == 400
+    assert response.json() == {'error': 'Некорректный курсор.'}
+
+
+def test_cursor_of_other_ordering(client, tenders):
+    params = {'username': 'owner', 'limit': 1}
+    page = client.get(URL, {**params, 'cursor': ''}).json()
+    response = client.get(
+        URL, {**params, 'cursor': page['next'], 'ordering': '-createdAt'})
+    assert response.status_code == 400
+    assert response.json() == {'error': 'Некорректный курсор.'}
@@ -0,0 +1,313 @@
+import json
+import uuid
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, resolve
+
+from tenders import async_views, urls
+
+from tenders.cache import entity_cache
+from tenders.concurrency import versioned_update
+from tenders.identity import employee_cache
+from tenders.membership import membership
+from tenders.models import (Bid, BidVote, Employee, Organization,
+                            OrganizationResponsible, Review, Tender)
+from tenders.versioning import bid_versions, tender_versions
+
+# Служебные команды транзакций не считаются: тест выполняется внутри
+# транзакции, и atomic в представлениях становятся точками сохранения.
+TRANSACTION_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT',
+                          'ROLLBACK TO SAVEPOINT')
+
+
+class Endpoint:
+    """Эндпоинт с бюджетом SQL-запросов.
+    path и значения params - шаблоны str.format по данным seed(),
+    body - функция от этих данных. status - ожидаемый код ответа:
+    бюджет имеет смысл только для успешного пути обработки."""
+
+    def __init__(self, name, method, path, budget, params=None, body=None,
+                 status=200):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.budget = budget
+        self.params = params or {}
+        self.body = body
+        self.status = status
+
+    def request(self, client, data):
+        path = self.path.format(**data)
+        params = {key: value.format(**data)
+                  for key, value in self.params.items()}
+        if params:
+            path += '?' + '&'.join(
+                f'{key}={value}' for key, value in params.items())
+        kwargs = {}
+        if self.body is not None:
+            kwargs = {'data': json.dumps(self.body(data)),
+                      'content_type': 'application/json'}
+        return getattr(client, self.method.lower())(path, **kwargs)
+
+
+OWNER = {'username': '{owner}'}
+BIDDER = {'username': '{bidder}'}
+
+# Бюджеты соответствуют числу запросов на холодном кэше процесса. Если
+# эндпоинт стал делать меньше запросов, бюджет стоит уменьшить.
+ENDPOINTS = (
+    Endpoint('tenders list', 'GET', '/api/tenders', 4,
+             {**OWNER, 'limit': '10'}),
+    Endpoint('tenders list by service type', 'GET', '/api/tenders', 2,
+             {'service_type': 'Delivery'}),
+    Endpoint('tenders my', 'GET', '/api/tenders/my', 4, OWNER),
+    Endpoint('tenders facets', 'GET', '/api/tenders/facets', 2, OWNER),
+    Endpoint('tenders search', 'GET', '/api/tenders/search', 2,
+             {**OWNER, 'q': 'доставка'}),
+    Endpoint('tenders new', 'POST', '/api/tenders/new', 6, body=lambda data: {
+        'name': 'Новый тендер', 'description': 'Доставка оборудования',
+        'serviceType': 'Delivery', 'organizationId': data['organization'],
+        'creatorUsername': data['owner']}),
+    Endpoint('tenders bulk', 'POST', '/api/tenders/bulk', 5,
+             body=lambda data: [{
+                 'name': f'Пакетный тендер {number}',
+                 'serviceType': 'Delivery',
+                 'organizationId': data['organization'],
+                 'creatorUsername': data['owner']} for number in range(20)]),
+    Endpoint('tender detail', 'GET', '/api/tenders/{tender}', 2, OWNER),
+    Endpoint('tender status', 'GET', '/api/tenders/{tender}/status', 2,
+             OWNER),
+    Endpoint('tender status change', 'PUT', '/api/tenders/{tender}/status',
+             4, {**OWNER, 'status': 'Closed'}),
+    Endpoint('tender edit', 'PATCH', '/api/tenders/{tender}/edit', 6, OWNER,
+             body=lambda data: {'description': 'Уточненное описание'}),
+    Endpoint('tender rollback', 'PUT', '/api/tenders/{tender}/rollback/1',
+             7, OWNER),
+    Endpoint('tender versions', 'GET', '/api/tenders/{tender}/versions', 3,
+             OWNER),
+    Endpoint('bids list', 'GET', '/api/bids/{tender}/list', 3, OWNER),
+    Endpoint('bids my', 'GET', '/api/bids/my', 3, BIDDER),
+    Endpoint('bids search', 'GET', '/api/bids/search', 2,
+             {**BIDDER, 'q': 'доставка'}),
+    Endpoint('bids new', 'POST', '/api/bids/new', 6, body=lambda data: {
+        'name': 'Новое предложение', 'description': 'Доставка за сутки',
+        'tenderId': data['tender'], 'authorType': 'User',
+        'authorId': data['bidder_id']}),
+    Endpoint('bid detail', 'GET', '/api/bids/{bid}', 2, BIDDER),
+    Endpoint('bid status', 'GET', '/api/bids/{bid}/status', 3, BIDDER),
+    Endpoint('bid status change', 'PUT', '/api/bids/{bid}/status', 5,
+             {**BIDDER, 'status': 'Canceled'}),
+    Endpoint('bid edit', 'PATCH', '/api/bids/{bid}/edit', 7, BIDDER,
+             body=lambda data: {'description': 'Уточненное предложение'}),
+    Endpoint('bid rollback', 'PUT', '/api/bids/{bid}/rollback/1', 8,
+             BIDDER),
+    Endpoint('bid versions', 'GET', '/api/bids/{bid}/versions', 4, BIDDER),
+    Endpoint('bid submit decision', 'PUT', '/api/bids/{bid}/submit_decision',
+             6, {**OWNER, 'decision': 'Approved'}),
+    Endpoint('bids bulk status', 'PUT', '/api/bids/bulk/status', 3,
+             {**BIDDER, 'status': 'Canceled'},
+             body=lambda data: data['bids']),
+    Endpoint('bids bulk submit decision', 'PUT',
+             '/api/bids/bulk/submit_decision', 6,
+             {**OWNER, 'decision': 'Rejected'},
+             body=lambda data: data['bids']),
+    Endpoint('bid votes', 'GET', '/api/bids/{bid}/votes', 3, OWNER),
+    Endpoint('bid feedback', 'PUT', '/api/bids/{bid}/feedback', 5,
+             {**OWNER, 'bidFeedback': 'Хорошее предложение'}),
+    Endpoint('bid reviews', 'GET', '/api/bids/{review_tender}/reviews', 5,
+             {'authorUsername': '{bidder}', 'requesterUsername': '{owner}'}),
+    Endpoint('tenders export', 'GET', '/api/tenders/export', 2,
+             {**OWNER, 'output': 'csv'}),
+    Endpoint('bids export', 'GET', '/api/bids/export', 2,
+             {**BIDDER, 'output': 'csv'}),
+    # Стандартные маршруты ModelViewSet.
+    Endpoint('tenders create', 'POST', '/api/tenders', 2,
+             body=lambda data: {
+                 'name': 'Тендер через API', 'description': 'Доставка',
+                 'serviceType': 'Delivery', 'status': 'Created',
+                 'organizationId': data['organization'],
+                 'creatorUsername': data['owner_id']},
+             status=201),
+    Endpoint('tender update', 'PUT', '/api/tenders/{tender}', 3,
+             body=lambda data: {
+                 'name': 'Тендер через API', 'description': 'Доставка',
+                 'serviceType': 'Delivery', 'status': 'Published',
+                 'organizationId': data['organization'],
+                 'creatorUsername': data['owner_id']}),
+    Endpoint('tender partial update', 'PATCH', '/api/tenders/{tender}', 2,
+             body=lambda data: {'description': 'Уточненное описание'}),
+    Endpoint('tender delete', 'DELETE', '/api/tenders/{review_tender}', 8,
+             status=204),
+    Endpoint('bids all', 'GET', '/api/bids', 2, BIDDER),
+    Endpoint('bids create', 'POST', '/api/bids', 4, body=lambda data: {
+        'name': 'Предложение через API', 'description': 'Доставка',
+        'status': 'Created', 'tenderId': data['tender'],
+        'authorType': 'User', 'authorId': data['bidder_id'],
+        'creatorUsername': data['bidder_id'],
+        'organizationId': data['supplier']}, status=201),
+    Endpoint('bid update', 'PUT', '/api/bids/{bid}', 5, body=lambda data: {
+        'name': 'Предложение через API', 'description': 'Доставка',
+        'status': 'Published', 'tenderId': data['tender'],
+        'authorType': 'User', 'authorId': data['bidder_id'],
+        'creatorUsername': data['bidder_id'],
+        'organizationId': data['supplier']}),
+    Endpoint('bid partial update', 'PATCH', '/api/bids/{bid}', 2,
+             body=lambda data: {'description': 'Уточненное предложение'}),
+    Endpoint('bid delete', 'DELETE', '/api/bids/{bid}', 5, status=204),
+    Endpoint('api root', 'GET', '/api/', 0),
+    Endpoint('ping', 'GET', '/api/ping', 0),
+    Endpoint('metrics', 'GET', '/api/metrics', 0),
+)
+
+
+def seed(tenders=30, bids=10, reviews=5):
+    """Данные, похожие на рабочие: две организации с ответственными,
+    опубликованные и черновые тендеры с историей версий, предложения,
+    голоса и отзывы. Возвращает значения для шаблонов эндпоинтов."""
+
+    customer = Organization.objects.create(name='Заказчик', type='LLC')
+    supplier = Organization.objects.create(name='Поставщик', type='JSC')
+    owner, colleague, bidder = Employee.objects.bulk_create([
+        Employee(username=f'budget-{role}')
+        for role in ('owner', 'colleague', 'bidder')])
+    for organization, employee in ((customer, owner),
+                                   (customer, colleague),
+                                   (supplier, bidder)):
+        OrganizationResponsible.objects.create(
+            organization=organization, user=employee)
+    created = Tender.objects.bulk_create([
+        Tender(name=f'Тендер {number:03}',
+               description='Доставка и монтаж оборудования',
+               service_type=('Delivery', 'Construction')[number % 2],
+               status='Published' if number % 5 else 'Created',
+               organization=customer, creator=owner)
+        for number in range(tenders)])
+    tender_versions.record_new(created)
+    tender, review_tender = created[1], created[2]
+    versioned_update(tender, {'description': 'Вторая версия'},
+                     tender_versions)
+    offered = Bid.objects.bulk_create([
+        Bid(name=f'Предложение {number:03}',
+            description='Доставка оборудования за сутки',
+            status='Published', tender=tender, creator=bidder,
+            authorType='User')
+        for number in range(bids)])
+    bid_versions.record_new(offered)
+    bid = offered[0]
+    versioned_update(bid, {'description': 'Вторая версия'}, bid_versions)
+    BidVote.objects.create(bid=offered[1], employee=colleague,
+                           decision='Approved')
+    reviewed = Bid.objects.create(
+        name='Предложение с отзывами', status='Published',
+        tender=review_tender, creator=bidder, authorType='User')
+    Review.objects.bulk_create([
+        Review(bid=reviewed, author_feedback=owner, user=bidder,
+               description=f'Отзыв {number}')
+        for number in range(reviews)])
+    return {
+        'owner': owner.username,
+        'owner_id': str(owner.pk),
+        'supplier': str(supplier.pk),
+        'bidder': bidder.username,
+        'bidder_id': str(bidder.pk),
+        'organization': str(customer.pk),
+        'tender': str(tender.pk),
+        'review_tender': str(review_tender.pk),
+        'bid': str(bid.pk),
+        'bids': [str(item.pk) for item in offered[2:]],
+    }
+
+
+def is_counted(query):
+    return not query['sql'].lstrip().upper().startswith(
+        TRANSACTION_STATEMENTS)
+
+
+@pytest.fixture
+def data(db):
+    return seed()
+
+
+def route(endpoint):
+    """Имя маршрута эндпоинта."""
+
+    pk = str(uuid.uuid4())
+    return resolve(endpoint.path.format(
+        tender=pk, bid=pk, review_tender=pk)).url_name
+
+
+def patterns(resolver_patterns):
+    for pattern in resolver_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from patterns(pattern.url_patterns)
+        else:
+            yield pattern
+
+
+def methods(pattern):
+    """HTTP-методы маршрута: действия вьюсета DRF или обработчики
+    APIView, для простой функции - GET."""
+
+    callback = pattern.callback
+    view = getattr(callback, 'cls', None)
+    if view is None:
+        return {'GET'}
+    handlers = getattr(callback, 'actions', None) or {
+        method: method for method in view.http_method_names
+        if hasattr(view, method)}
+    return {method.upper() for method in handlers
+            if method not in ('head', 'options')}
+
+
+ASYNC_ENDPOINTS = [
+    endpoint for endpoint in ENDPOINTS
+    if endpoint.method == 'GET'
+    and route(endpoint) in {name for _, _, name in async_views.routes}]
+
+
+def test_every_route_has_budget():
+    required = {
+        (pattern.name, method) for pattern in patterns(urls.urlpatterns)
+        for method in methods(pattern)}
+    covered = {(route(endpoint), endpoint.method) for endpoint in ENDPOINTS}
+    assert sorted(required - covered) == []
+
+
+def check_budget(endpoint, data, client):
+    """Бюджеты считаются на холодных кэшах сотрудников и записей, чтобы
+    не зависеть от порядка тестов. Индекс ответственных строится
+    заранее, как в работающем процессе."""
+
+    employee_cache.clear()
+    for cache, _ in entity_cache.tiers():
+        cache.clear()
+    membership.rebuild()
+    with CaptureQueriesContext(connection) as context:
+        response = endpoint.request(client, data)
+        if response.streaming:
+            # Выгрузка читает записи при отдаче ответа.
+            b''.join(response.streaming_content)
+    queries = [query['sql'] for query in context.captured_queries
+               if is_counted(query)]
+    assert response.status_code == endpoint.status, response.content
+    assert len(queries) <= endpoint.budget, '\n'.join(queries)
+    # Пустой список означал бы, что запросы выполнены мимо соединения.
+    assert queries or not endpoint.budget
+
+
+@pytest.mark.parametrize(
+    'endpoint', ENDPOINTS, ids=[endpoint.name for endpoint in ENDPOINTS])
+def test_query_budget(endpoint, data, client):
+    check_budget(endpoint, data, client)
+
+
+@pytest.mark.parametrize(
+    'endpoint', ASYNC_ENDPOINTS,
+    ids=[endpoint.name for endpoint in ASYNC_ENDPOINTS])
+def test_async_query_budget(endpoint, data, client, settings):
+    """Те же бюджеты для async-представлений чтений (ASYNC_READ_VIEWS)."""
+
+    settings.ROOT_URLCONF = 'tenders.tests.async_urls'
+    check_budget(endpoint, data, client)
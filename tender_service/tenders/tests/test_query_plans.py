@@ -0,0 +1,103 @@
+import json
+
+import pytest
+from django.db import connection
+
+from tenders import visibility
+from tenders.models import (Bid, Employee, Organization,
+                            OrganizationResponsible, Tender)
+from tenders.versioning import bid_versions, tender_versions
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'postgresql',
+    reason='Планы запросов проверяются только для PostgreSQL.')
+
+
+def hot_queries(employee, tender, bid):
+    """Запросы горячих путей TenderViewSet и BidViewSet в том виде,
+    в котором их строят вьюсеты."""
+
+    tenders = Tender.objects.all()
+    return {
+        'tenders_list': visibility.tenders_for(employee).order_by(
+            'name', 'id')[:50],
+        'tenders_by_service_type': tenders.filter(
+            status='Published', service_type=tender.service_type
+        ).order_by('name')[:50],
+        'tenders_my': tenders.filter(
+            creator=employee).order_by('name', 'id')[:50],
+        'bids_list': visibility.tender_bids(tender.pk, employee),
+        'bids_my': Bid.objects.filter(
+            creator=employee).order_by('createdAt', 'id')[:50],
+        'tenders_recent': visibility.tenders_for(employee).order_by(
+            '-updatedAt', '-id')[:50],
+        'tenders_my_recent': tenders.filter(
+            creator=employee).order_by('-createdAt', '-id')[:50],
+        'bids_my_by_name': Bid.objects.filter(
+            creator=employee).order_by('name', 'id')[:50],
+        'bids_recent': visibility.bids_for(employee).order_by(
+            '-updatedAt', '-id')[:50],
+        'tender_rollback': tender_versions.chain(tender.pk, tender.version),
+        'bid_rollback': bid_versions.chain(bid.pk, bid.version),
+        'organization_responsible': OrganizationResponsible.objects.filter(
+            organization=tender.organization_id, user=employee),
+    }
+
+
+def seq_scans(plan):
+    """Возвращает таблицы, которые план читает последовательным сканом."""
+
+    found = []
+    if plan.get('Node Type') == 'Seq Scan':
+        found.append(plan.get('Relation Name'))
+    for child in plan.get('Plans', ()):
+        found.extend(seq_scans(child))
+    return found
+
+
+@pytest.fixture
+def data(db):
+    """Заполненная база со статистикой планировщика."""
+
+    organizations = Organization.objects.bulk_create([
+        Organization(name=f'Организация {number}', type='LLC')
+        for number in range(20)])
+    employees = Employee.objects.bulk_create([
+        Employee(username=f'plan-{number}') for number in range(200)])
+    OrganizationResponsible.objects.bulk_create([
+        OrganizationResponsible(
+            organization=organizations[number % 20], user=employee)
+        for number, employee in enumerate(employees)])
+    tenders = Tender.objects.bulk_create([
+        Tender(name=f'Тендер {number:05}', description='Доставка',
+               service_type=('Delivery', 'Construction', 'Manufacture')[
+                   number % 3],
+               status=('Created', 'Published', 'Closed')[number % 3],
+               organization=organizations[number % 20],
+               creator=employees[number % 200])
+        for number in range(2000)])
+    tender_versions.record_new(tenders)
+    bids = Bid.objects.bulk_create([
+        Bid(name=f'Предложение {number:05}', description='Доставка',
+            status='Published', tender=tenders[number % 2000],
+            creator=employees[(number * 7) % 200], authorType='User')
+        for number in range(4000)])
+    bid_versions.record_new(bids)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return employees[0], tenders[0], bids[0]
+
+
+def test_hot_queries_use_indexes(data):
+    """На тестовой базе таблицы малы, и планировщик законно выбирает
+    последовательный скан. Поэтому он запрещен для проверки: Seq Scan
+    остается в плане, только если для запроса нет подходящего индекса."""
+
+    with connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+    failed = {}
+    for name, queryset in hot_queries(*data).items():
+        plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+        if seq_scans(plan):
+            failed[name] = seq_scans(plan)
+    assert not failed
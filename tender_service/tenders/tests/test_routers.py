@@ -0,0 +1,17 @@
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from tenders.routers import PIN_COOKIE, aremember_write, ais_pinned
+
+
+def test_async_pinning_uses_shared_cache(database_cache):
+    factory = RequestFactory()
+    response = HttpResponse()
+    async_to_sync(aremember_write)(
+        factory.post('/api/tenders/new'), response, ['owner'])
+    assert response.cookies[PIN_COOKIE].value == '1'
+    assert async_to_sync(ais_pinned)(
+        factory.get('/api/tenders/my', {'username': 'owner'}))
+    assert not async_to_sync(ais_pinned)(
+        factory.get('/api/tenders/my', {'username': 'other'}))
@@ -0,0 +1,17 @@
+from tenders.routers import pinned_to_primary
+from tenders.singleflight import Call, single_flight
+
+
+def test_pinned_request_does_not_join_replica_read(settings):
+    settings.SINGLE_FLIGHT_TIMEOUT = 0.01
+    timeouts = single_flight.stats()['timeouts']
+    # Чтение с реплики, начатое другим запросом и еще не завершенное.
+    single_flight._calls['key'] = Call()
+    token = pinned_to_primary.set(True)
+    try:
+        assert single_flight.do('key', lambda: 'primary') == (
+            'primary', False)
+        assert single_flight.stats()['timeouts'] == timeouts
+    finally:
+        pinned_to_primary.reset(token)
+        del single_flight._calls['key']
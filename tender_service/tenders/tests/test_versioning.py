@@ -0,0 +1,53 @@
+import pytest
+
+from tenders.concurrency import versioned_update
+from tenders.models import TenderVersion
+from tenders.versioning import tender_versions
+
+
+@pytest.fixture
+def history(settings, tender):
+    """Тендер с версиями 1-7, контрольная точка раз в 3 версии."""
+
+    settings.VERSION_CHECKPOINT_INTERVAL = 3
+    for version in range(2, 8):
+        values = {'description': f'Описание {version}'}
+        if version == 3:
+            values['name'] = 'Новое название'
+        versioned_update(tender, values, tender_versions)
+    return tender
+
+
+def test_checkpoints(history):
+    checkpoints = TenderVersion.objects.filter(
+        tender=history, checkpoint=True).values_list('version', flat=True)
+    assert sorted(checkpoints) == [1, 4, 7]
+    delta = TenderVersion.objects.get(tender=history, version=5)
+    assert delta.changes == {'description': 'Описание 5'}
+
+
+def test_state_across_checkpoint(history):
+    assert [row[0] for row in tender_versions.chain(history.pk, 5)] == [4, 5]
+    state = tender_versions.state(history.pk, 5)
+    assert state['description'] == 'Описание 5'
+    assert state['name'] == 'Новое название'
+    assert state['organization_id'] == str(history.organization_id)
+    # Версия до контрольной точки собирается из своей цепочки.
+    state = tender_versions.state(history.pk, 2)
+    assert (state['name'], state['description']) == ('Тендер', 'Описание 2')
+    assert tender_versions.state(history.pk, 8) is None
+
+
+def test_rollback_to_older_delta(client, history):
+    response = client.put(
+        f'/api/tenders/{history.pk}/rollback/2?username=owner')
+    assert response.status_code == 200, response.content
+    data = response.json()
+    assert (data['name'], data['description']) == ('Тендер', 'Описание 2')
+    assert data['version'] == 8
+    # Новая версия - разность относительно версии 7.
+    version = TenderVersion.objects.get(tender=history, version=8)
+    assert not version.checkpoint
+    assert version.changes == {'name': 'Тендер', 'description': 'Описание 2'}
+    state = tender_versions.state(history.pk, 8)
+    assert (state['name'], state['description']) == ('Тендер', 'Описание 2')
@@ -0,0 +1,154 @@
+import threading
+
+import pytest
+from django.db import connection
+
+from tenders.membership import membership
+from tenders.models import (Bid, BidVote, Employee, OrganizationResponsible,
+                            Tender)
+from tenders.voting import (ACCEPTED, ALREADY_REJECTED, ALREADY_VOTED,
+                            FORBIDDEN, submit_decision)
+
+
+@pytest.fixture
+def colleague(organization):
+    """Второй ответственный: кворум организации становится равен 2."""
+
+    employee = Employee.objects.create(username='colleague')
+    OrganizationResponsible.objects.create(
+        organization=organization, user=employee)
+    return employee
+
+
+def tender_status(tender):
+    return Tender.objects.get(pk=tender.pk).status
+
+
+def test_duplicate_vote(bid, owner, colleague):
+    assert submit_decision(owner, bid.pk, 'Approved')[0] == ACCEPTED
+    assert submit_decision(owner, bid.pk, 'Approved')[0] == ALREADY_VOTED
+    assert Bid.objects.get(pk=bid.pk).quorum == 1
+    assert BidVote.objects.filter(bid=bid).count() == 1
+
+
+def test_quorum_reached_closes_tender(tender, bid, owner, colleague):
+    outcome, result = submit_decision(owner, bid.pk, 'Approved')
+    assert (outcome, result.status) == (ACCEPTED, 'Published')
+    assert tender_status(tender) == 'Published'
+    outcome, result = submit_decision(colleague, bid.pk, 'Approved')
+    assert (outcome, result.status) == (ACCEPTED, 'Approved')
+    assert Bid.objects.get(pk=bid.pk).quorum == 2
+    assert tender_status(tender) == 'Closed'
+
+
+def test_rejection_stops_voting(tender, bid, owner, colleague):
+    outcome, result = submit_decision(owner, bid.pk, 'Rejected')
+    assert (outcome, result.status) == (ACCEPTED, 'Rejected')
+    assert submit_decision(colleague, bid.pk, 'Approved')[0] == (
+        ALREADY_REJECTED)
+    assert Bid.objects.get(pk=bid.pk).status == 'Rejected'
+    assert tender_status(tender) == 'Published'
+
+
+def test_rejection_after_approval_reopens_tender(tender, bid, owner):
+    submit_decision(owner, bid.pk, 'Approved')
+    assert tender_status(tender) == 'Closed'
+    colleague = Employee.objects.create(username='colleague')
+    OrganizationResponsible.objects.create(
+        organization=tender.organization, user=colleague)
+    outcome, result = submit_decision(colleague, bid.pk, 'Rejected')
+    assert (outcome, result.status) == (ACCEPTED, 'Rejected')
+    assert tender_status(tender) == 'Published'
+
+
+def vote_concurrently(votes):
+    """Голосует в отдельных потоках одновременно, каждый поток со своим
+    соединением с БД. Возвращает исходы в порядке голосов."""
+
+    barrier = threading.Barrier(len(votes))
+    outcomes = [None] * len(votes)
+
+    def vote(index, employee, bid):
+        try:
+            barrier.wait()
+            outcomes[index] = submit_decision(employee, bid.pk, 'Approved')[0]
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=vote, args=(index, *pair))
+        for index, pair in enumerate(votes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_votes_reach_quorum(tender, bid, owner, colleague):
+    outcomes = vote_concurrently([(owner, bid), (colleague, bid)])
+    assert outcomes == [ACCEPTED, ACCEPTED]
+    bid.refresh_from_db()
+    assert (bid.status, bid.quorum) == ('Approved', 2)
+    assert tender_status(tender) == 'Closed'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_duplicate_votes(bid, owner, colleague):
+    outcomes = vote_concurrently([(owner, bid), (owner, bid)])
+    assert sorted(outcomes) == sorted([ACCEPTED, ALREADY_VOTED])
+    assert Bid.objects.get(pk=bid.pk).quorum == 1
+    assert BidVote.objects.filter(bid=bid).count() == 1
+
+
+def test_vote_ignores_stale_positive_in_index(tender, bid):
+    stranger = Employee.objects.create(username='stranger')
+    membership.rebuild()
+    # Ответственный, уже удаленный другим процессом.
+    membership.add(tender.organization_id, stranger.pk)
+    assert submit_decision(stranger, bid.pk, 'Approved')[0] == FORBIDDEN
+
+
+def test_quorum_counts_responsibles_in_db(tender, bid, owner):
+    stranger = Employee.objects.create(username='stranger')
+    membership.rebuild()
+    membership.add(tender.organization_id, stranger.pk)
+    outcome, result = submit_decision(owner, bid.pk, 'Approved')
+    assert outcome == ACCEPTED
+    assert result.status == 'Approved'
+    assert Tender.objects.get(pk=tender.pk).status == 'Closed'
+
+
+def test_responsible_change_resets_index(
+        organization, owner, django_capture_on_commit_callbacks):
+    colleague = Employee.objects.create(username='colleague')
+    membership.rebuild()
+    with django_capture_on_commit_callbacks(execute=True):
+        OrganizationResponsible.objects.filter(user=owner).delete()
+        OrganizationResponsible.objects.create(
+            organization=organization, user=colleague)
+    assert not membership.is_member(organization.pk, owner.pk)
+    assert membership.member_count(organization.pk) == 1
+
+
+def test_bulk_decisions_follow_request_order(client, tender, bid, owner):
+    """Пакет дает те же результаты, что одиночные запросы по очереди:
+    повторный id получает ответ повторного голоса."""
+
+    second = Bid.objects.create(
+        name='Второе', description='Доставка', status='Published',
+        tender=tender, creator=bid.creator, authorType='User')
+    ids = [str(bid.pk), str(second.pk), str(bid.pk), 'missing']
+    response = client.put(
+        '/api/bids/bulk/submit_decision?username=owner&decision=Approved',
+        ids, content_type='application/json')
+    results = response.json()
+    assert [item['id'] for item in results] == ids
+    assert [item['status'] for item in results] == [200, 200, 403, 404]
+    assert [item['bid']['status'] for item in results[:2]] == [
+        'Approved', 'Approved']
+    assert results[2]['error'] == 'Вы уже голосовали за это предложение.'
+    assert set(Bid.objects.values_list('status', flat=True)) == {'Approved'}
+    assert BidVote.objects.count() == 2
+    assert tender_status(tender) == 'Closed'
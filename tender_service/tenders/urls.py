@@ -1,6 +1,8 @@
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
-from .views import TenderViewSet, BidViewSet, PingView
+from . import async_views
+from .views import TenderViewSet, BidViewSet, PingView, metrics
 
 router = DefaultRouter(trailing_slash=False)
 router.register(r'tenders', TenderViewSet)
@@ -8,5 +10,23 @@ router.register(r'bids', BidViewSet)
 router.register(r'ping', PingView, basename='ping')
 
 urlpatterns = [
+    path('api/metrics', metrics, name='metrics'),
     path('api/', include(router.urls)),
 ]
+
+
+def async_read_patterns():
+    """Маршруты async-представлений: чтения (GET, HEAD) обслуживают
+    они, остальные методы этих адресов - синхронные вьюсеты."""
+
+    sync_views = {url.name: url.callback for url in router.urls}
+    return [path('api/', include([
+        re_path(regex, async_views.with_sync_fallback(
+            view, sync_views[name]), name=name)
+        for regex, view, name in async_views.routes
+    ]))]
+
+
+if settings.ASYNC_READ_VIEWS:
+    # Все прочие эндпоинты обслуживают синхронные вьюсеты.
+    urlpatterns = async_read_patterns() + urlpatterns
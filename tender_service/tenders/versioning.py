@@ -0,0 +1,127 @@
+import uuid
+
+from django.conf import settings
+from django.db.models import Subquery
+
+from .models import BidVersion, TenderVersion
+from .pagination import KeysetPagination
+
+
+class VersionStore:
+    """Хранилище версий модели в виде разностей.
+    Каждая версия хранит только поля, изменившиеся относительно предыдущей,
+    а не реже чем раз в checkpoint_interval версий сохраняется полный
+    снимок. Любая версия восстанавливается одним запросом: последний
+    снимок не новее нужной версии и разности после него."""
+
+    def __init__(self, model, owner, fields):
+        self.model = model
+        self.owner = owner
+        self.fields = fields
+
+    @property
+    def checkpoint_interval(self):
+        return getattr(settings, 'VERSION_CHECKPOINT_INTERVAL', 10)
+
+    def snapshot(self, instance):
+        state = {}
+        for name in self.fields:
+            value = getattr(instance, name)
+            state[name] = str(value) if isinstance(value, uuid.UUID) else value
+        return state
+
+    def chain(self, owner_id, version, inclusive=True):
+        """Записи, нужные для восстановления версии: от последней
+        контрольной точки до самой версии включительно (или до последней
+        версии перед ней, если inclusive=False)."""
+
+        lookup = 'version__lte' if inclusive else 'version__lt'
+        rows = self.model.objects.filter(
+            **{self.owner: owner_id, lookup: version})
+        checkpoint = rows.filter(checkpoint=True).order_by(
+            '-version').values('version')[:1]
+        return rows.filter(version__gte=Subquery(checkpoint)).order_by(
+            'version').values_list('version', 'changes')
+
+    @staticmethod
+    def merge(rows):
+        state = {}
+        for _, changes in rows:
+            state.update(changes)
+        return state
+
+    def state(self, owner_id, version):
+        """Возвращает поля модели в указанной версии или None,
+        если такой версии нет."""
+
+        rows = list(self.chain(owner_id, version))
+        if not rows or rows[-1][0] != int(version):
+            return None
+        return self.merge(rows)
+
+    def values(self, state):
+        """Преобразует сохраненные в JSON значения к типам полей модели."""
+
+        meta = self.model._meta.get_field(self.owner).related_model._meta
+        return {
+            name: meta.get_field(name).to_python(value)
+            for name, value in state.items()
+        }
+
+    def apply(self, instance, state):
+        for name, value in self.values(state).items():
+            setattr(instance, name, value)
+
+    def build(self, instance, rows):
+        """Строит запись текущей версии экземпляра по цепочке предыдущих."""
+
+        snapshot = self.snapshot(instance)
+        if not rows or len(rows) >= self.checkpoint_interval:
+            changes, checkpoint = snapshot, True
+        else:
+            previous = self.merge(rows)
+            changes = {
+                name: value for name, value in snapshot.items()
+                if name not in previous or previous[name] != value
+            }
+            checkpoint = False
+        return self.model(
+            version=instance.version, checkpoint=checkpoint, changes=changes,
+            **{self.owner + '_id': instance.pk})
+
+    def record(self, instance):
+        """Сохраняет текущую версию экземпляра."""
+
+        rows = list(self.chain(instance.pk, instance.version, inclusive=False))
+        version = self.build(instance, rows)
+        version.save()
+        return version
+
+    def record_new(self, instances):
+        """Сохраняет первые версии новых записей одним запросом."""
+
+        return self.model.objects.bulk_create(
+            [self.build(instance, []) for instance in instances])
+
+    def history(self, owner_id):
+        return self.model.objects.filter(**{self.owner: owner_id})
+
+
+tender_versions = VersionStore(
+    TenderVersion, 'tender',
+    ('name', 'description', 'service_type', 'status', 'organization_id',
+     'creator_id'))
+
+bid_versions = VersionStore(
+    BidVersion, 'bid',
+    ('name', 'description', 'tender_id', 'status', 'organization_id',
+     'creator_id', 'authorType'))
+
+
+class VersionPagination(KeysetPagination):
+    """Курсорная пагинация истории версий, новые версии первыми."""
+
+    ordering = ('-version', 'id')
+
+    def get_ordering(self, view):
+        return self.ordering
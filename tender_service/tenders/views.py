@@ -1,15 +1,205 @@
+import uuid
+
 from rest_framework import viewsets
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework import status
-from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import ValidationError
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from .cache import entity_cache, get_bid, get_tender
+from .concurrency import (VersionConflict, make_etag, parse_if_match,
+                          update_values, versioned_update)
+from . import export
+from .facets import facets_for
+from .conditional import (detail_validators, fingerprint_validators,
+                          list_validators, not_modified, set_validators)
+from .filters import BidFilter, FilterBackend, TenderFilter
+from .health import health_report
+from . import metrics as metrics_registry
+from .identity import EmployeeResolverMixin
 from .pagination import MyPagination
-from .models import (Tender, Bid, Review, TenderArhive, BidArhive,
-                     OrganizationResponsible, Employee)
-from .serializers import TenderSerializer, BidSerializer, ReviewSerializer
+from .search import SearchPagination, search
+from .singleflight import single_flight
+from .membership import membership
+from . import voting
+from .models import (Tender, Bid, BidVote, Review, Employee,
+                     Organization)
+from .serializers import (TenderSerializer, BidSerializer, ReviewSerializer,
+                          VersionSerializer, BidVoteSerializer,
+                          TenderBulkItemSerializer, TenderProjection,
+                          BidProjection)
+from .versioning import VersionPagination, bid_versions, tender_versions
+from . import visibility
+
+
+class PaginatedActionsMixin:
+    """Примесь для пагинации списков в дополнительных действиях вьюсета
+    так же, как в стандартном list. Если задан projection_class, списки
+    сериализуются им по values() без создания моделей."""
+
+    projection_class = None
+
+    def paginated_response(self, queryset, serializer_class=None):
+        serializer_class = (serializer_class or self.projection_class
+                            or self.get_serializer_class())
+        if hasattr(serializer_class, 'project'):
+            queryset = serializer_class.project(queryset)
+        context = self.get_serializer_context()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = serializer_class(page, many=True, context=context)
+            return self.get_paginated_response(serializer.data)
+        serializer = serializer_class(queryset, many=True, context=context)
+        return Response(serializer.data)
+
+    def conditional_list(self, queryset, serializer_class=None,
+                         fingerprint=None):
+        """Список с ETag по агрегату выборки. Если у клиента
+        актуальные данные, возвращает 304 без сериализации.
+        Одновременные одинаковые запросы списка выполняются один раз.
+        fingerprint - уже посчитанный агрегат (count, last), если он
+        получен вместе с проверками доступа."""
+
+        key = ('list', self.request.get_full_path())
+        if fingerprint is None:
+            (etag, last_modified), _ = single_flight.do(
+                key, lambda: list_validators(self.request, queryset))
+        else:
+            etag, last_modified = fingerprint_validators(
+                self.request, fingerprint)
+        response = not_modified(self.request, etag, last_modified)
+        if response is None:
+            data, _ = single_flight.do(
+                key + (etag,),
+                lambda: self.paginated_response(
+                    queryset, serializer_class).data)
+            response = Response(data)
+        return set_validators(response, etag, last_modified)
+
+
+class ETagMixin:
+    """Примесь для оптимистичной блокировки: ответы с записью содержат
+    ETag по ее версии, а правки принимают заголовок If-Match."""
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return self.conditional_response(
+            instance, lambda: self.get_serializer(instance).data)
+
+    def conditional_response(self, instance, render):
+        """Ответ с валидаторами записи. Если If-None-Match или
+        If-Modified-Since совпадают с текущей версией, возвращает 304,
+        не вызывая render."""
+
+        etag, last_modified = detail_validators(instance)
+        response = not_modified(self.request, etag, last_modified)
+        if response is None:
+            response = Response(render())
+        return set_validators(response, etag, last_modified)
+
+    def versioned_response(self, instance):
+        serializer = self.get_serializer(instance)
+        return set_validators(
+            Response(serializer.data), *detail_validators(instance))
+
+    def precondition_failed(self, instance):
+        """Ответ 412 с ETag текущей версии. instance уже перечитан из БД
+        (см. conditional_update), а запись в кэше могла отстать от нее,
+        поэтому она удаляется."""
+
+        entity_cache.invalidate(type(instance), [instance.pk])
+        response = Response(
+            {'error': 'Запись изменена другим запросом, '
+                      'получите актуальную версию.'},
+            status=status.HTTP_412_PRECONDITION_FAILED
+        )
+        response['ETag'] = make_etag(instance)
+        return response
+
+
+class SearchActionMixin:
+    """Примесь с эндпоинтом полнотекстового поиска по названию и описанию.
+    Поиск выполняется по кверисэту get_queryset, поэтому учитывает
+    те же правила видимости, что и список."""
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Метод для обработки GET запросов к эндпоинту search
+        Возвращает записи, найденные по параметру q, по убыванию
+        релевантности с курсорной пагинацией."""
+
+        text = self.request.query_params.get('q', '').strip()
+        if not text:
+            return Response(
+                {'error': 'Неверный формат запроса или его параметры.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            queryset = self.get_queryset()
+        except:
+            return Response(
+                {'error': 'Пользователь не существует или некорректен.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(
+            search(queryset, text), request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class ExportActionMixin:
+    """Примесь с эндпоинтом потоковой выгрузки в NDJSON или CSV.
+    Выгружаются записи, доступные пользователю так же, как в списке,
+    с параметром history=1 - история версий записей, созданных
+    пользователем."""
+
+    export_records = None
+    export_history = None
 
+    @action(detail=False, methods=['get'], url_path='export',
+            url_name='export')
+    def export_data(self, request):
+        """Метод для обработки GET запросов к эндпоинту export
+        Выгружает записи с фильтрами status, organizationId и
+        updatedSince в формате output (ndjson или csv)."""
 
-class TenderViewSet(viewsets.ModelViewSet):
+        params = self.request.query_params
+        output = params.get('output', 'ndjson')
+        history = params.get('history', '').lower() in ('1', 'true', 'yes')
+        source = self.export_history if history else self.export_records
+        try:
+            filters = source.parse(
+                params.get('status'), params.get('organizationId'),
+                params.get('updatedSince'))
+        except ValueError:
+            filters = None
+        if filters is None or output not in export.FORMATS:
+            return Response(
+                {'error': 'Неверный формат запроса или его параметры.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            if history:
+                owners = self.queryset.filter(
+                    creator=self.get_employee(params.get('username')))
+            else:
+                owners = self.get_queryset()
+        except:
+            return Response(
+                {'error': 'Пользователь не существует или некорректен.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        return export.streaming_response(
+            request._request, source, source.rows(owners, **filters), output)
+
+
+class TenderViewSet(EmployeeResolverMixin, PaginatedActionsMixin,
+                    SearchActionMixin, ExportActionMixin, ETagMixin,
+                    viewsets.ModelViewSet):
     """Вьюсет для обработки корневого эндпоинта /tenders.
     В методах выполняются проверки на существование/корректность переданых 
     ползователей и тендеров, а также права доступа."""
@@ -17,21 +207,30 @@ class TenderViewSet(viewsets.ModelViewSet):
     queryset = Tender.objects.all()
     serializer_class = TenderSerializer
     pagination_class = MyPagination
-    filter_backends = (DjangoFilterBackend,)
-    filterset_fields = ('service_type',)
+    projection_class = TenderProjection
+    export_records = export.TENDERS
+    export_history = export.TENDER_HISTORY
+    cursor_ordering = ('name', 'id')
+    ordering_fields = TenderFilter.ordering_fields
+    filter_backends = (FilterBackend,)
+    filterset_class = TenderFilter
 
     def get_queryset(self):
         """Возвращает кверисэт предварительно отфильтрованный по пользователю 
         и статусу, автору тендера отдает с любым статусом, всем остальным 
-        только опубликованные."""
+        только опубликованные (см. visibility)."""
 
-        queryset = Tender.objects.all()
+        user = None
         username = self.request.query_params.get('username')
         if username:
-            username = Employee.objects.get(username=username)
-        queryset = queryset.filter(
-            creator=username) | queryset.filter(status='Published')
-        return queryset
+            user = self.get_employee(username)
+        return visibility.tenders_for(user)
+
+    def list(self, request, *args, **kwargs):
+        """Метод для обработки GET запросов к эндпоинту tenders
+        Возвращает список доступных пользователю тендеров."""
+
+        return self.conditional_list(self.filter_queryset(self.get_queryset()))
 
     @action(detail=False, methods=['get'])
     def my(self, request):
@@ -40,20 +239,40 @@ class TenderViewSet(viewsets.ModelViewSet):
 
         username = self.request.query_params.get('username')
         try:
-            username = Employee.objects.get(username=username)
+            username = self.get_employee(username)
         except:
             return Response(
                 {'error': 'Пользователь не существует или некорректен.'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
         tenders = Tender.objects.filter(creator=username)
-        if not tenders:
+        if not tenders.exists():
             return Response(
                 {'error': 'Пользователь не создал тендеры.'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
-        serializer = self.get_serializer(tenders, many=True)
-        return Response(serializer.data)
+        return self.conditional_list(self.filter_queryset(tenders))
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Метод для обработки GET запросов к эндпоинту tenders/facets
+        Возвращает число доступных пользователю тендеров по типу услуги,
+        статусу и организации. Числа берутся из счетчиков, которые ведут
+        триггеры БД, без группировки по таблице тендеров."""
+
+        user = None
+        username = self.request.query_params.get('username')
+        try:
+            if username:
+                user = self.get_employee(username)
+        except:
+            return Response(
+                {'error': 'Пользователь не существует или некорректен.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        data, _ = single_flight.do(
+            ('facets', user and user.pk), lambda: facets_for(user))
+        return Response(data)
 
     @action(detail=True, methods=['get', 'put'])
     def status(self, request, pk=None):
@@ -61,7 +280,7 @@ class TenderViewSet(viewsets.ModelViewSet):
         Возвращает/редактирует статус тендера."""
 
         try:
-            tender = Tender.objects.get(pk=pk)
+            tender = get_tender(pk)
         except:
             return Response(
                 {'error': 'Тендер не найден.'},
@@ -69,21 +288,22 @@ class TenderViewSet(viewsets.ModelViewSet):
             )
         username = self.request.query_params.get('username')
         try:
-            username = Employee.objects.get(username=username)
+            username = self.get_employee(username)
         except:
             return Response(
                 {'error': 'Пользователь не существует или некорректен.'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
         if self.request.method == 'GET':
-            if tender.status == 'Published' or tender.creator == username:
-                return Response({"status": tender.status})
+            if visibility.can_view_tender(tender, username):
+                return self.conditional_response(
+                    tender, lambda: {"status": tender.status})
             else:
                 return Response(
                     {'error': 'Недостаточно прав для выполнения действия.'},
                     status=status.HTTP_403_FORBIDDEN
                 )
-        if tender.creator != username:
+        if not visibility.owns(username, tender):
             return Response(
                 {'error': 'Недостаточно прав для выполнения действия.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -91,7 +311,8 @@ class TenderViewSet(viewsets.ModelViewSet):
         status_ = self.request.query_params.get('status')
         if status_ in dict(Tender.STATUS_CHOICES):
             tender.status = status_
-            tender.save()
+            tender.save(update_fields=('status', 'updatedAt'))
+            tender.refresh_from_db()
             serializer = self.get_serializer(tender, partial=True)
             return Response(serializer.data)
         return Response(
@@ -102,11 +323,11 @@ class TenderViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['patch'])
     def edit(self, request, pk=None):
         """Метод для обработки PATCH запросов к эндпоинту tenders/edit
-        Редактирует параметры тендера с сохранением текущей версии в 
-        архивную модель."""
+        Редактирует параметры тендера с сохранением новой версии в
+        историю версий."""
 
         try:
-            tender = Tender.objects.get(pk=pk)
+            tender = get_tender(pk)
         except:
             return Response(
                 {'error': 'Тендер не найден.'},
@@ -114,35 +335,39 @@ class TenderViewSet(viewsets.ModelViewSet):
             )
         username = self.request.query_params.get('username')
         try:
-            username = Employee.objects.get(username=username)
+            username = self.get_employee(username)
         except:
             return Response(
                 {'error': 'Пользователь не существует или некорректен.'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
-        if tender.creator != username:
+        if not visibility.owns(username, tender):
             return Response(
                 {'error': 'Недостаточно прав для выполнения действия.'},
                 status=status.HTTP_403_FORBIDDEN
             )
-        request.data['version'] = tender.version + 1
+        try:
+            expected_version = parse_if_match(request)
+        except ValueError:
+            return Response(
+                {'error': 'Неверный формат запроса или его параметры.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         serializer = self.get_serializer(
             tender, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
-            tender = Tender.objects.get(pk=serializer.data['id'])
-            tender_arhive = TenderArhive(
-                name=tender.name,
-                description=tender.description,
-                service_type=tender.service_type,
-                status=tender.status,
-                organization=tender.organization,
-                creator=tender.creator,
-                version=tender.version,
-                tender_id=tender.pk
-            )
-            tender_arhive.save()
-            return Response(serializer.data)
+            try:
+                versioned_update(
+                    tender, update_values(serializer.validated_data),
+                    tender_versions, expected_version)
+            except VersionConflict:
+                return self.precondition_failed(tender)
+            except Tender.DoesNotExist:
+                return Response(
+                    {'error': 'Тендер не найден.'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            return self.versioned_response(tender)
         return Response(
             {'error': 'Неверный формат запроса или его параметры.'},
             status=status.HTTP_400_BAD_REQUEST
@@ -154,8 +379,7 @@ class TenderViewSet(viewsets.ModelViewSet):
         Создает новый тендер с передаными параметрами."""
 
         try:
-            user = Employee.objects.get(
-                username=request.data['creatorUsername'])
+            user = self.get_employee(request.data['creatorUsername'])
         except:
             return Response(
                 {'error': 'Пользователь не существует или некорректен.'},
@@ -167,45 +391,99 @@ class TenderViewSet(viewsets.ModelViewSet):
         if 'status' not in request.data:
             request.data['status'] = 'Created'
         if serializer.is_valid():
-            try:
-                organizationresponsible = OrganizationResponsible.objects.get(
-                    organization=serializer.validated_data['organization_id'],
-                    user=user
-                )
-            except:
+            if not membership.is_member(
+                    serializer.validated_data['organization_id'], user.pk,
+                    confirm=True):
                 return Response(
                     {'error': 'Пользователь не существует или некорректен.'},
                     status=status.HTTP_401_UNAUTHORIZED
                 )
-            if user != organizationresponsible.user:
-                return Response(
-                    {'error': 'Недостаточно прав для выполнения действия.'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
             serializer.validated_data['creator_id'] = user.pk
             serializer.save()
-            tender = Tender.objects.get(pk=serializer.data['id'])
-            tender_arhive = TenderArhive(
-                name=tender.name,
-                description=tender.description,
-                service_type=tender.service_type,
-                status=tender.status,
-                organization=tender.organization,
-                creator=tender.creator,
-                version=tender.version,
-                tender_id=tender.pk
-            )
-            tender_arhive.save()
+            tender_versions.record(serializer.instance)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Метод для обработки POST запросов к эндпоинту tenders/bulk
+        Создает пакет тендеров. Пользователи, организации и права
+        проверяются для всего пакета несколькими запросами, тендеры и их
+        первые версии сохраняются в одной транзакции. Возвращает результат
+        для каждого элемента в порядке запроса: созданный тендер или
+        ошибку с ее статус-кодом."""
+
+        items = request.data
+        if isinstance(items, dict):
+            items = items.get('tenders')
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'Неверный формат запроса или его параметры.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > settings.BULK_MAX_ITEMS:
+            return Response(
+                {'error': 'Слишком много тендеров в одном запросе, '
+                          f'максимум {settings.BULK_MAX_ITEMS}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        results = [None] * len(items)
+        valid = {}
+        serializer = TenderBulkItemSerializer()
+        for index, item in enumerate(items):
+            try:
+                valid[index] = serializer.run_validation(item)
+            except ValidationError as error:
+                results[index] = {
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': error.detail}
+        users = dict(Employee.objects.filter(
+            username__in={data['creatorUsername'] for data in valid.values()}
+        ).values_list('username', 'id'))
+        organizations = set(Organization.objects.filter(
+            pk__in={data['organizationId'] for data in valid.values()}
+        ).values_list('pk', flat=True))
+        allowed = membership.members([
+            (data['organizationId'], users[data['creatorUsername']])
+            for data in valid.values() if data['creatorUsername'] in users
+        ], confirm=True)
+        tenders = {}
+        for index, data in valid.items():
+            user_id = users.get(data['creatorUsername'])
+            if (user_id is None
+                    or (data['organizationId'], user_id) not in allowed):
+                results[index] = {
+                    'status': status.HTTP_401_UNAUTHORIZED,
+                    'error': 'Пользователь не существует или некорректен.'}
+            elif data['organizationId'] not in organizations:
+                results[index] = {
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'error': 'Организация не найдена.'}
+            else:
+                tenders[index] = Tender(
+                    name=data['name'], description=data['description'],
+                    service_type=data['serviceType'], status=data['status'],
+                    organization_id=data['organizationId'],
+                    creator_id=user_id)
+        with transaction.atomic():
+            Tender.objects.bulk_create(tenders.values())
+            tender_versions.record_new(tenders.values())
+        created = TenderSerializer(tenders.values(), many=True).data
+        for index, data in zip(tenders, created):
+            results[index] = {'status': status.HTTP_200_OK, 'tender': data}
+        return Response({
+            'created': len(tenders),
+            'failed': len(items) - len(tenders),
+            'results': results,
+        })
+
     @action(detail=True, methods=['put'], url_path='rollback/(?P<rollback_id>\d+)')
     def rollback(self, request, pk=None, rollback_id=None):
         """Метод для обработки PUT запросов к эндпоинту tenders/rollback
         Откатывает версию тендера на переданую."""
 
         try:
-            tender = Tender.objects.get(pk=pk)
+            tender = get_tender(pk)
         except:
             return Response(
                 {'error': 'Тендер не найден.'},
@@ -213,49 +491,79 @@ class TenderViewSet(viewsets.ModelViewSet):
             )
         username = self.request.query_params.get('username')
         try:
-            username = Employee.objects.get(username=username)
+            username = self.get_employee(username)
         except:
             return Response(
                 {'error': 'Пользователь не существует или некорректен.'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
-        if tender.creator != username:
+        if not visibility.owns(username, tender):
             return Response(
                 {'error': 'Недостаточно прав для выполнения действия.'},
                 status=status.HTTP_403_FORBIDDEN
             )
         try:
-            tender_arhive = TenderArhive.objects.get(
-                version=rollback_id, tender_id=pk)
-        except:
+            expected_version = parse_if_match(request)
+        except ValueError:
+            return Response(
+                {'error': 'Неверный формат запроса или его параметры.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        state = tender_versions.state(tender.pk, rollback_id)
+        if state is None:
             return Response(
                 {'error': 'Версия не найдена.'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        tender.name = tender_arhive.name
-        tender.description = tender_arhive.description
-        tender.service_type = tender_arhive.service_type
-        tender.status = tender_arhive.status
-        tender.organization = tender_arhive.organization
-        tender.creator = tender_arhive.creator
-        tender.version = tender.version + 1
-        tender.save()
-        tender_arhive = TenderArhive(
-            name=tender.name,
-            description=tender.description,
-            service_type=tender.service_type,
-            status=tender.status,
-            organization=tender.organization,
-            creator=tender.creator,
-            version=tender.version,
-            tender_id=tender.pk
-        )
-        tender_arhive.save()
-        serializer = self.get_serializer(tender, partial=True)
-        return Response(serializer.data)
+        try:
+            versioned_update(
+                tender, tender_versions.values(state), tender_versions,
+                expected_version)
+        except VersionConflict:
+            return self.precondition_failed(tender)
+        except Tender.DoesNotExist:
+            return Response(
+                {'error': 'Тендер не найден.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return self.versioned_response(tender)
 
 
-class BidViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def versions(self, request, pk=None):
+        """Метод для обработки GET запросов к эндпоинту tenders/versions
+        Возвращает историю версий тендера с курсорной пагинацией."""
+
+        try:
+            tender = get_tender(pk)
+        except:
+            return Response(
+                {'error': 'Тендер не найден.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        username = self.request.query_params.get('username')
+        try:
+            username = self.get_employee(username)
+        except:
+            return Response(
+                {'error': 'Пользователь не существует или некорректен.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        if not visibility.owns(username, tender):
+            return Response(
+                {'error': 'Недостаточно прав для выполнения действия.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        paginator = VersionPagination()
+        page = paginator.paginate_queryset(
+            tender_versions.history(tender.pk), request, view=self)
+        serializer = VersionSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class BidViewSet(EmployeeResolverMixin, PaginatedActionsMixin,
+                 SearchActionMixin, ExportActionMixin, ETagMixin,
+                 viewsets.ModelViewSet):
     """Вьюсет для обработки корневого эндпоинта /bids.
     В методах выполняются проверки на существование/корректность переданых 
     ползователей, тендеров и предложений, а также права доступа."""
@@ -263,21 +571,55 @@ class BidViewSet(viewsets.ModelViewSet):
     queryset = Bid.objects.all()
     serializer_class = BidSerializer
     pagination_class = MyPagination
+    projection_class = BidProjection
+    export_records = export.BIDS
+    export_history = export.BID_HISTORY
+    cursor_ordering = ('createdAt', 'id')
+    ordering_fields = BidFilter.ordering_fields
+    filter_backends = (FilterBackend,)
+    filterset_class = BidFilter
 
     STATUS_DISABLE = ['Approved', 'Rejected']
+    DECISION_ERRORS = {
+        voting.NOT_FOUND: (
+            {'error': 'Предложение не найдено.'},
+            status.HTTP_404_NOT_FOUND),
+        voting.FORBIDDEN: (
+            {'error': 'Недостаточно прав для выполнения действия.'},
+            status.HTTP_403_FORBIDDEN),
+        voting.ALREADY_VOTED: (
+            {'error': 'Вы уже голосовали за это предложение.'},
+            status.HTTP_403_FORBIDDEN),
+        voting.ALREADY_REJECTED: (
+            {'error': 'Предложение уже отклонено другим сотрудником.'},
+            status.HTTP_403_FORBIDDEN),
+    }
+
+    def get_bulk_ids(self, request):
+        """Список id предложений из тела пакетного запроса: список или
+        объект {"bids": [...]}. Повторы сохраняются: результат по ним тот
+        же, что у повторного одиночного запроса.
+        Возвращает None, если формат неверный или список слишком длинный."""
+
+        ids = request.data
+        if isinstance(ids, dict):
+            ids = ids.get('bids')
+        if (not isinstance(ids, list) or not ids
+                or len(ids) > settings.BULK_MAX_ITEMS
+                or not all(isinstance(pk, str) for pk in ids)):
+            return None
+        return ids
 
     def get_queryset(self):
         """Возвращает кверисэт предварительно отфильтрованный по пользователю 
-        и статусу, автору тендера отдает с любым статусом, всем остальным 
-        только опубликованные."""
+        и статусу, автору предложения отдает с любым статусом, всем
+        остальным только опубликованные (см. visibility)."""
 
-        queryset = Bid.objects.all()
+        user = None
         username = self.request.query_params.get('username')
         if username:
-            username = Employee.objects.get(username=username)
-        queryset = queryset.filter(
-            creator=username) | queryset.filter(status='Published')
-        return queryset
+            user = self.get_employee(username)
+        return visibility.bids_for(user)
 
     @action(detail=False, url_path='new', methods=['post'])
     def new(self, request, pk=None):
@@ -293,7 +635,7 @@ class BidViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         try:
-            tender = Tender.objects.get(pk=request.data['tenderId'])
+            tender = get_tender(request.data['tenderId'])
         except:
             return Response(
                 {'error': 'Тендер не найден.'},
@@ -306,34 +648,20 @@ class BidViewSet(viewsets.ModelViewSet):
             )
         request.data['status'] = 'Created'
         if request.data.get('authorType') == "Organization":
-            try:
-                organizationresponsible = OrganizationResponsible.objects.get(
-                    user=user)
-            except:
+            organizations = membership.organizations_of(user.pk, confirm=True)
+            if len(organizations) != 1:
                 return Response(
                     {'error': 'Пользователь не существует или некорректен.'},
                     status=status.HTTP_401_UNAUTHORIZED
                 )
-            request.data['organizationId'] = organizationresponsible.organization.pk
+            request.data['organizationId'] = next(iter(organizations))
         else:
             request.data['authorType'] = 'User'
         serializer = self.get_serializer(
             data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
-            bid = Bid.objects.get(pk=serializer.data['id'])
-            bid_arhive = BidArhive(
-                name=bid.name,
-                description=bid.description,
-                tender=bid.tender,
-                status=bid.status,
-                organization=bid.organization,
-                creator=bid.creator,
-                version=bid.version,
-                bid_id=bid.pk,
-                authorType=bid.authorType
-            )
-            bid_arhive.save()
+            bid_versions.record(serializer.instance)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -346,47 +674,51 @@ class BidViewSet(viewsets.ModelViewSet):
 
         username = self.request.query_params.get('username')
         try:
-            username = Employee.objects.get(username=username)
+            username = self.get_employee(username)
         except:
             return Response(
                 {'error': 'Пользователь не существует или некорректен.'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
         try:
-            bids = Bid.objects.filter(tender=pk)
-        except:
+            pk = uuid.UUID(pk)
+        except ValueError:
             return Response(
                 {'error': 'Тендер не найден.'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        if not bids:
+        # Наличие предложений, доступ к ним и отпечаток списка для ETag
+        # считаются одним запросом. Отпечаток берется по всем видимым
+        # предложениям тендера, а не по отфильтрованным: любое изменение
+        # в выборке меняет и его, лишний раз сбрасывается только кэш.
+        bids, aggregates = visibility.tender_bids_summary(pk, username)
+        summary = bids.aggregate(**aggregates)
+        if not summary['total']:
             return Response(
                 {'error': 'Предложений не найдено.'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        bids = bids.filter(
-            tender__creator=username, status='Published') | bids.filter(creator=username)
-        if not bids:
+        if not summary['count']:
             return Response(
                 {'error': 'Недостаточно прав для выполнения действия.'},
                 status=status.HTTP_403_FORBIDDEN
             )
-        serializer = self.get_serializer(bids, many=True)
-        return Response(serializer.data)
+        return self.conditional_list(
+            self.filter_queryset(visibility.tender_bids(pk, username)),
+            fingerprint=summary)
 
     @action(detail=False, methods=['get'])
     def my(self, request):
         username = self.request.query_params.get('username')
         try:
-            username = Employee.objects.get(username=username)
+            username = self.get_employee(username)
         except:
             return Response(
                 {'error': 'Пользователь не существует или некорректен.'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
         bids = Bid.objects.filter(creator=username)
-        serializer = self.get_serializer(bids, many=True)
-        return Response(serializer.data)
+        return self.conditional_list(self.filter_queryset(bids))
 
     @action(detail=True, methods=['get', 'put'])
     def status(self, request, pk=None):
@@ -395,40 +727,36 @@ class BidViewSet(viewsets.ModelViewSet):
 
         username = self.request.query_params.get('username')
         try:
-            username = Employee.objects.get(username=username)
+            username = self.get_employee(username)
         except:
             return Response(
                 {'error': 'Пользователь не существует или некорректен.'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
         try:
-            bid = Bid.objects.get(pk=pk)
+            bid = get_bid(pk)
         except:
             return Response(
                 {'error': 'Предложение не найдено.'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        tender = bid.tender
         if self.request.method == 'GET':
-            if (
-                (tender.creator == username
-                 and bid.status not in ('Created', 'Canceled'))
-                or (bid.creator == username)
-            ):
-                return Response(bid.status)
+            if visibility.can_view_bid(bid, username):
+                return self.conditional_response(bid, lambda: bid.status)
             return Response(
                 {'error': 'Недостаточно прав для выполнения действия.'},
                 status=status.HTTP_403_FORBIDDEN
             )
         status_ = self.request.query_params.get('status')
-        if bid.creator != username:
+        if not visibility.owns(username, bid):
             return Response(
                 {'error': 'Недостаточно прав для выполнения действия.'},
                 status=status.HTTP_403_FORBIDDEN
             )
         if status_ not in self.STATUS_DISABLE:
             bid.status = status_
-            bid.save()
+            bid.save(update_fields=('status', 'updatedAt'))
+            bid.refresh_from_db()
             serializer = self.get_serializer(
                 bid, data=request.data, partial=True)
             serializer.is_valid()
@@ -441,11 +769,11 @@ class BidViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['patch'])
     def edit(self, request, pk=None):
         """Метод для обработки PATCH запросов к эндпоинту bids/edit
-        Редактирует параметры предложения с сохранением текущей версии в 
-        архивную модель."""
+        Редактирует параметры предложения с сохранением новой версии в
+        историю версий."""
 
         try:
-            bid = Bid.objects.get(pk=pk)
+            bid = get_bid(pk)
         except:
             return Response(
                 {'error': 'Предложение не найдено.'},
@@ -453,36 +781,39 @@ class BidViewSet(viewsets.ModelViewSet):
             )
         username = self.request.query_params.get('username')
         try:
-            username = Employee.objects.get(username=username)
+            username = self.get_employee(username)
         except:
             return Response(
                 {'error': 'Пользователь не существует или некорректен.'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
-        if bid.creator != username:
+        if not visibility.owns(username, bid):
             return Response(
                 {'error': 'Недостаточно прав для выполнения действия.'},
                 status=status.HTTP_403_FORBIDDEN
             )
-        request.data['version'] = bid.version + 1
+        try:
+            expected_version = parse_if_match(request)
+        except ValueError:
+            return Response(
+                {'error': 'Неверный формат запроса или его параметры.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         serializer = self.get_serializer(
             bid, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
-            bid = Bid.objects.get(pk=serializer.data['id'])
-            bid_arhive = BidArhive(
-                name=bid.name,
-                description=bid.description,
-                tender=bid.tender,
-                status=bid.status,
-                organization=bid.organization,
-                creator=bid.creator,
-                version=bid.version,
-                bid_id=bid.pk,
-                authorType=bid.authorType
-            )
-            bid_arhive.save()
-            return Response(serializer.data)
+            try:
+                versioned_update(
+                    bid, update_values(serializer.validated_data),
+                    bid_versions, expected_version)
+            except VersionConflict:
+                return self.precondition_failed(bid)
+            except Bid.DoesNotExist:
+                return Response(
+                    {'error': 'Предложение не найдено.'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            return self.versioned_response(bid)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['put'])
@@ -493,59 +824,144 @@ class BidViewSet(viewsets.ModelViewSet):
         username = self.request.query_params.get('username')
         status_ = self.request.query_params.get('decision')
         try:
-            username = Employee.objects.get(username=username)
+            username = self.get_employee(username)
         except:
             return Response(
                 {'error': 'Пользователь не существует или некорректен.'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
+        if status_ not in voting.DECISIONS:
+            return Response(
+                {'error': 'Неверный формат запроса или его параметры.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        outcome, bid = voting.submit_decision(username, pk, status_)
+        if outcome != voting.ACCEPTED:
+            error, code = self.DECISION_ERRORS[outcome]
+            return Response(error, status=code)
+        serializer = self.get_serializer(bid, partial=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['put'], url_path='bulk/status')
+    def bulk_status(self, request):
+        """Метод для обработки PUT запросов к эндпоинту bids/bulk/status
+        Меняет статус списка предложений. Права проверяются для всего
+        списка сразу, статус меняется одним запросом. Возвращает результат
+        по каждому предложению в порядке запроса."""
+
         try:
-            bid = Bid.objects.get(pk=pk)
+            username = self.get_employee(
+                self.request.query_params.get('username'))
         except:
             return Response(
-                {'error': 'Предложение не найдено.'},
-                status=status.HTTP_404_NOT_FOUND
+                {'error': 'Пользователь не существует или некорректен.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        status_ = self.request.query_params.get('status')
+        ids = self.get_bulk_ids(request)
+        if (ids is None or status_ not in dict(Bid.STATUS_CHOICES)
+                or status_ in self.STATUS_DISABLE):
+            return Response(
+                {'error': 'Неверный формат запроса или его параметры.'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        keys = {}
+        for pk in ids:
+            try:
+                keys[pk] = uuid.UUID(pk)
+            except ValueError:
+                keys[pk] = None
+        now = timezone.now()
+        with transaction.atomic():
+            bids = Bid.objects.select_for_update().in_bulk(
+                [key for key in keys.values() if key])
+            allowed = [
+                bid.pk for bid in bids.values()
+                if bid.creator_id == username.pk]
+            if allowed:
+                Bid.objects.filter(pk__in=allowed).update(
+                    status=status_, updatedAt=now)
+                entity_cache.invalidate(Bid, allowed)
+        results = []
+        for pk in ids:
+            bid = bids.get(keys[pk])
+            if bid is None:
+                error, code = self.DECISION_ERRORS[voting.NOT_FOUND]
+            elif bid.creator_id != username.pk:
+                error, code = self.DECISION_ERRORS[voting.FORBIDDEN]
+            else:
+                bid.status, bid.updatedAt = status_, now
+                results.append({
+                    'id': pk, 'status': status.HTTP_200_OK,
+                    'bid': self.get_serializer(bid).data})
+                continue
+            results.append({'id': pk, 'status': code, **error})
+        return Response(results)
+
+    @action(detail=False, methods=['put'], url_path='bulk/submit_decision')
+    def bulk_submit_decision(self, request):
+        """Метод для обработки PUT запросов к эндпоинту
+        bids/bulk/submit_decision
+        Принимает одно решение сотрудника по списку предложений в одной
+        транзакции. Предложения обрабатываются в порядке запроса, правила
+        кворума и закрытия тендера те же, что у bids/submit_decision.
+        Возвращает результат по каждому предложению в порядке запроса."""
+
         try:
-            OrganizationResponsible.objects.get(
-                organization=bid.tender.organization, user=username)
+            username = self.get_employee(
+                self.request.query_params.get('username'))
         except:
             return Response(
-                {'error': 'Недостаточно прав для выполнения действия.'},
-                status=status.HTTP_403_FORBIDDEN
+                {'error': 'Пользователь не существует или некорректен.'},
+                status=status.HTTP_401_UNAUTHORIZED
             )
-        if username.pk in bid.approved_list:
+        status_ = self.request.query_params.get('decision')
+        ids = self.get_bulk_ids(request)
+        if ids is None or status_ not in voting.DECISIONS:
             return Response(
-                {'error': 'Вы уже голосовали за это предложение.'},
-                status=status.HTTP_403_FORBIDDEN
+                {'error': 'Неверный формат запроса или его параметры.'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        if status_ == 'Approved' and bid.status != 'Rejected':
-            quorum = min(3, len(OrganizationResponsible.objects.filter(
-                organization=bid.tender.organization)))
-            bid.quorum += 1
-            bid.approved_list.append(username.pk)
-            if bid.quorum >= quorum:
-                bid.tender.status = 'Closed'
-                bid.tender.save()
-                bid.status = status_
-            bid.save()
-        elif bid.status == 'Rejected':
-            return Response(
-                {'error': 'Предложение уже отклонено другим сотрудником.'},
+        outcomes = voting.submit_decisions(username, ids, status_)
+        results = []
+        for pk, (outcome, bid) in zip(ids, outcomes):
+            if outcome == voting.ACCEPTED:
+                results.append({
+                    'id': pk, 'status': status.HTTP_200_OK,
+                    'bid': self.get_serializer(bid).data})
+            else:
+                error, code = self.DECISION_ERRORS[outcome]
+                results.append({'id': pk, 'status': code, **error})
+        return Response(results)
+
+    @action(detail=True, methods=['get'])
+    def votes(self, request, pk=None):
+        """Метод для обработки GET запросов к эндпоинту bids/votes
+        Возвращает историю голосования по предложению ответственным
+        за организацию тендера."""
+
+        username = self.request.query_params.get('username')
+        try:
+            username = self.get_employee(username)
+        except:
+            return Response(
+                {'error': 'Пользователь не существует или некорректен.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        try:
+            bid = Bid.objects.select_related('tender').get(pk=pk)
+        except:
+            return Response(
+                {'error': 'Предложение не найдено.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if not membership.is_member(bid.tender.organization_id, username.pk):
+            return Response(
+                {'error': 'Недостаточно прав для выполнения действия.'},
                 status=status.HTTP_403_FORBIDDEN
             )
-        elif status_ == 'Rejected' and bid.status == 'Approved':
-            bid.approved_list.append(username.pk)
-            bid.status = status_
-            bid.tender.status = 'Published'
-            bid.tender.save()
-            bid.save()
-        else:
-            bid.status = status_
-            bid.tender.save()
-            bid.save()
-        serializer = self.get_serializer(bid, partial=True)
-        return Response(serializer.data)
+        votes = BidVote.objects.filter(bid=bid).select_related('employee')
+        return self.paginated_response(votes, BidVoteSerializer)
 
     @action(detail=True, methods=['put'])
     def feedback(self, request, pk=None):
@@ -554,23 +970,21 @@ class BidViewSet(viewsets.ModelViewSet):
 
         username = self.request.query_params.get('username')
         try:
-            username = Employee.objects.get(username=username)
+            username = self.get_employee(username)
         except:
             return Response(
                 {'error': 'Пользователь не существует.'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
         try:
-            bid = Bid.objects.get(pk=pk)
+            bid = get_bid(pk)
         except:
             return Response(
                 {'error': 'Предложение не найдено.'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        try:
-            OrganizationResponsible.objects.get(
-                organization=bid.tender.organization, user=username)
-        except:
+        if not membership.is_member(
+                bid.tender.organization_id, username.pk, confirm=True):
             return Response(
                 {'error': 'Недостаточно прав для выполнения действия.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -580,7 +994,7 @@ class BidViewSet(viewsets.ModelViewSet):
             bid=bid,
             author_feedback=username,
             description=bidFeedback,
-            user=bid.creator,
+            user_id=bid.creator_id,
         )
         feedback.save()
         serializer = BidSerializer(bid, many=False)
@@ -592,7 +1006,7 @@ class BidViewSet(viewsets.ModelViewSet):
         Откатывает версию предложения на переданую."""
 
         try:
-            bid = Bid.objects.get(pk=pk)
+            bid = get_bid(pk)
         except:
             return Response(
                 {'error': 'Предложение не найдено.'},
@@ -600,48 +1014,73 @@ class BidViewSet(viewsets.ModelViewSet):
             )
         username = self.request.query_params.get('username')
         try:
-            username = Employee.objects.get(username=username)
+            username = self.get_employee(username)
         except:
             return Response(
                 {'error': 'Пользователь не существует или некорректен.'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
-        if bid.creator != username:
+        if not visibility.owns(username, bid):
             return Response(
                 {'error': 'Недостаточно прав для выполнения действия.'},
                 status=status.HTTP_403_FORBIDDEN
             )
         try:
-            bid_arhive = BidArhive.objects.get(
-                version=rollback_id, bid_id=pk)
-        except:
+            expected_version = parse_if_match(request)
+        except ValueError:
+            return Response(
+                {'error': 'Неверный формат запроса или его параметры.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        state = bid_versions.state(bid.pk, rollback_id)
+        if state is None:
             return Response(
                 {'error': 'Версия не найдена.'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        bid.name = bid_arhive.name
-        bid.description = bid_arhive.description
-        bid.tender = bid_arhive.tender
-        bid.status = bid_arhive.status
-        bid.organization = bid_arhive.organization
-        bid.creator = bid_arhive.creator
-        bid.authorType = bid_arhive.authorType
-        bid.version = bid.version + 1
-        bid.save()
-        bid_arhive = BidArhive(
-            name=bid.name,
-            description=bid.description,
-            tender=bid.tender,
-            status=bid.status,
-            organization=bid.organization,
-            creator=bid.creator,
-            version=bid.version,
-            bid_id=bid.pk,
-            authorType=bid.authorType
-        )
-        bid_arhive.save()
-        serializer = self.get_serializer(bid, partial=True)
-        return Response(serializer.data)
+        try:
+            versioned_update(
+                bid, bid_versions.values(state), bid_versions,
+                expected_version)
+        except VersionConflict:
+            return self.precondition_failed(bid)
+        except Bid.DoesNotExist:
+            return Response(
+                {'error': 'Предложение не найдено.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return self.versioned_response(bid)
+
+    @action(detail=True, methods=['get'])
+    def versions(self, request, pk=None):
+        """Метод для обработки GET запросов к эндпоинту bids/versions
+        Возвращает историю версий предложения с курсорной пагинацией."""
+
+        try:
+            bid = get_bid(pk)
+        except:
+            return Response(
+                {'error': 'Предложение не найдено.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        username = self.request.query_params.get('username')
+        try:
+            username = self.get_employee(username)
+        except:
+            return Response(
+                {'error': 'Пользователь не существует или некорректен.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        if not visibility.owns(username, bid):
+            return Response(
+                {'error': 'Недостаточно прав для выполнения действия.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        paginator = VersionPagination()
+        page = paginator.paginate_queryset(
+            bid_versions.history(bid.pk), request, view=self)
+        serializer = VersionSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['get'])
     def reviews(self, request, pk=None):
@@ -652,7 +1091,7 @@ class BidViewSet(viewsets.ModelViewSet):
         requesterUsername = self.request.query_params.get(
             'requesterUsername')
         try:
-            tender = Tender.objects.get(pk=pk)
+            tender = get_tender(pk)
         except:
             return Response(
                 {'error': 'Тендер не найден.'},
@@ -666,24 +1105,20 @@ class BidViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         try:
-            requesterUsername = Employee.objects.get(
-                username=requesterUsername)
+            requesterUsername = self.get_employee(requesterUsername)
         except:
             return Response(
                 {'error': 'Пользователь не существует или некорректен.'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
         try:
-            authorUsername = Employee.objects.get(username=authorUsername)
+            authorUsername = self.get_employee(authorUsername)
         except:
             return Response(
                 {'error': 'Пользователь не существует или некорректен.'},
                 status=status.HTTP_403_FORBIDDEN
             )
-        try:
-            OrganizationResponsible.objects.get(
-                organization=tender.organization, user=requesterUsername)
-        except:
+        if not membership.is_member(tender.organization_id, requesterUsername.pk):
             return Response(
                 {'error': 'Недостаточно прав для выполнения действия.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -695,7 +1130,7 @@ class BidViewSet(viewsets.ModelViewSet):
                 {'error': 'Пользователь не делал предложений по указанному тендеру.'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        if authorUsername != bid.creator:
+        if not visibility.owns(authorUsername, bid):
             return Response(
                 {'error': 'Пользователь не существует или некорректен.'},
                 status=status.HTTP_401_UNAUTHORIZED
@@ -706,7 +1141,22 @@ class BidViewSet(viewsets.ModelViewSet):
 
 class PingView(viewsets.ViewSet):
     """Вьюсет для обработки корневого эндпоинта /pind.
-    Просто возвращает ок."""
+    Просто возвращает ок, с параметром verbose=1 - состояние соединений
+    с БД и пула соединений."""
 
     def list(self, request):
-        return Response("ok")
+        if request.query_params.get('verbose') not in ('1', 'true'):
+            return Response("ok")
+        report = health_report()
+        if report['status'] != 'ok':
+            return Response(
+                report, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(report)
+
+
+def metrics(request):
+    """Эндпоинт /api/metrics: метрики процесса в формате Prometheus."""
+
+    return HttpResponse(
+        metrics_registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,97 @@
+from django.db.models import Count, Exists, Max, Q
+
+from .models import Bid, Tender, TenderFacet
+
+PUBLISHED = 'Published'
+# Предложения в этих статусах автор тендера не видит.
+HIDDEN_BID_STATUSES = ('Created', 'Canceled')
+
+
+def owns(user, instance):
+    """Пользователь создал тендер или предложение. Сравниваются id,
+    поэтому автор записи не загружается из БД."""
+
+    return user is not None and instance.creator_id == user.pk
+
+
+def published_or_own(user):
+    """Условие «опубликовано или создано пользователем» одним WHERE без
+    соединений: обе ветви покрыты индексами по статусу и по автору, и
+    PostgreSQL объединяет их сканированием по битовой карте. Без
+    пользователя остаются только опубликованные записи."""
+
+    condition = Q(status=PUBLISHED)
+    if user is not None:
+        condition |= Q(creator_id=user.pk)
+    return condition
+
+
+def tenders_for(user, queryset=None):
+    """Тендеры, доступные пользователю в списках и карточке."""
+
+    if queryset is None:
+        queryset = Tender.objects.all()
+    return queryset.filter(published_or_own(user))
+
+
+def tender_facets_for(user):
+    """Счетчики тендеров, доступных пользователю: строки опубликованных
+    тендеров (без автора) и строки его собственных тендеров. Условие то
+    же, что в published_or_own, но по таблице счетчиков."""
+
+    condition = Q(creator_id__isnull=True)
+    if user is not None:
+        condition |= Q(creator_id=user.pk)
+    return TenderFacet.objects.filter(condition)
+
+
+def bids_for(user, queryset=None):
+    """Предложения, доступные пользователю в списках и карточке."""
+
+    if queryset is None:
+        queryset = Bid.objects.all()
+    return queryset.filter(published_or_own(user))
+
+
+def tender_bids_condition(tender_id, user):
+    """Предложения тендера, которые видит пользователь: свои, а автору
+    тендера - еще и опубликованные. Авторство тендера проверяется
+    некоррелированным EXISTS, который выполняется один раз на запрос,
+    а не соединением с таблицей тендеров."""
+
+    return Q(creator_id=user.pk) | Q(
+        Exists(Tender.objects.filter(pk=tender_id, creator_id=user.pk)),
+        status=PUBLISHED)
+
+
+def tender_bids(tender_id, user):
+    return Bid.objects.filter(tender_id=tender_id).filter(
+        tender_bids_condition(tender_id, user))
+
+
+def tender_bids_summary(tender_id, user):
+    """Агрегаты для проверок доступа к списку предложений тендера одним
+    запросом: всего предложений (total), видимых пользователю (count) и
+    время последнего изменения видимых (last). count и last - тот же
+    отпечаток списка, что строит conditional.list_validators.
+    Возвращает кверисет и аргументы aggregate, чтобы агрегат можно было
+    выполнить и синхронно, и асинхронно."""
+
+    condition = tender_bids_condition(tender_id, user)
+    return Bid.objects.filter(tender_id=tender_id).order_by(), {
+        'total': Count('pk'),
+        'count': Count('pk', filter=condition),
+        'last': Max('updatedAt', filter=condition),
+    }
+
+
+def can_view_tender(tender, user):
+    return tender.status == PUBLISHED or owns(user, tender)
+
+
+def can_view_bid(bid, user):
+    """Статус предложения видят его автор и автор тендера, если
+    предложение уже подано."""
+
+    return owns(user, bid) or (
+        owns(user, bid.tender) and bid.status not in HIDDEN_BID_STATUSES)
@@ -0,0 +1,143 @@
+import uuid
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .cache import entity_cache
+from .models import Bid, BidVote, OrganizationResponsible, Tender
+
+DECISIONS = ('Approved', 'Rejected')
+MAX_QUORUM = 3
+
+# Исходы голосования по одному предложению.
+ACCEPTED = 'accepted'
+NOT_FOUND = 'not_found'
+FORBIDDEN = 'forbidden'
+ALREADY_VOTED = 'already_voted'
+ALREADY_REJECTED = 'already_rejected'
+
+
+def required_quorum(responsible_count):
+    """Кворум = min(3, количество ответственных за организацию)."""
+
+    return min(MAX_QUORUM, responsible_count)
+
+
+def responsibility(employee, organization_ids):
+    """Права сотрудника и число ответственных по организациям одним
+    запросом к БД: (организации сотрудника, {организация: число})."""
+
+    rows = OrganizationResponsible.objects.filter(
+        organization__in=organization_ids).order_by().values(
+        'organization_id').annotate(
+        total=Count('pk'), own=Count('pk', filter=Q(user=employee)))
+    allowed, counts = set(), {}
+    for row in rows:
+        counts[row['organization_id']] = row['total']
+        if row['own']:
+            allowed.add(row['organization_id'])
+    return allowed, counts
+
+
+def grouped(statuses):
+    """{pk: итоговый статус} -> {статус: [pk]} для пакетных UPDATE."""
+
+    groups = {}
+    for pk, status in statuses.items():
+        groups.setdefault(status, []).append(pk)
+    return groups
+
+
+def submit_decisions(employee, bid_ids, decision):
+    """Принимает решение сотрудника по списку предложений.
+
+    Все изменения выполняются в одной транзакции под блокировкой строк
+    голосуемых предложений (SELECT ... FOR UPDATE), без глобальной
+    блокировки: голоса по разным предложениям не ждут друг друга, а
+    одновременные голоса по одному предложению учитываются по очереди,
+    и кворум считается по уже зафиксированным голосам. Права и число
+    ответственных читаются из БД, а не из индекса процесса. Число запросов
+    не зависит от количества предложений.
+
+    Предложения обрабатываются в порядке bid_ids, как последовательными
+    вызовами submit_decision: повторный id получает ALREADY_VOTED, а в БД
+    записываются статусы предложений и тендеров, выставленные последними.
+
+    Возвращает список (исход, предложение или None) в порядке bid_ids."""
+
+    now = timezone.now()
+    results = []
+    keys = {}
+    for bid_id in bid_ids:
+        try:
+            keys[bid_id] = uuid.UUID(str(bid_id))
+        except ValueError:
+            keys[bid_id] = None
+    with transaction.atomic():
+        bids = {
+            bid.pk: bid for bid in Bid.objects.select_for_update(
+                of=('self',)).select_related('tender').filter(
+                pk__in=[key for key in keys.values() if key]).order_by('pk')
+        }
+        allowed, counts = responsibility(
+            employee, {bid.tender.organization_id for bid in bids.values()})
+        voted = set(BidVote.objects.filter(
+            bid__in=list(bids), employee=employee
+        ).values_list('bid_id', flat=True))
+        votes = []
+        counted = []
+        changes = {}
+        tenders = {}
+        for pk in bid_ids:
+            bid = bids.get(keys[pk])
+            if bid is None:
+                results.append((NOT_FOUND, None))
+                continue
+            organization_id = bid.tender.organization_id
+            if organization_id not in allowed:
+                results.append((FORBIDDEN, bid))
+            elif bid.pk in voted:
+                results.append((ALREADY_VOTED, bid))
+            elif bid.status == 'Rejected':
+                results.append((ALREADY_REJECTED, bid))
+            else:
+                voted.add(bid.pk)
+                votes.append(
+                    BidVote(bid=bid, employee=employee, decision=decision))
+                if decision == 'Approved':
+                    counted.append(bid.pk)
+                    bid.quorum += 1
+                    if bid.quorum >= required_quorum(
+                            counts[organization_id]):
+                        bid.status = 'Approved'
+                        changes[bid.pk] = 'Approved'
+                        bid.tender.status = 'Closed'
+                        tenders[bid.tender_id] = 'Closed'
+                else:
+                    if bid.status == 'Approved':
+                        bid.tender.status = 'Published'
+                        tenders[bid.tender_id] = 'Published'
+                    bid.status = 'Rejected'
+                    changes[bid.pk] = 'Rejected'
+                bid.updatedAt = now
+                results.append((ACCEPTED, bid))
+        BidVote.objects.bulk_create(votes)
+        if counted:
+            Bid.objects.filter(pk__in=counted).update(
+                quorum=F('quorum') + 1, updatedAt=now)
+        for status, pks in grouped(changes).items():
+            Bid.objects.filter(pk__in=pks).update(
+                status=status, updatedAt=now)
+        for status, pks in grouped(tenders).items():
+            Tender.objects.filter(pk__in=pks).update(
+                status=status, updatedAt=now)
+        entity_cache.invalidate(Bid, [vote.bid_id for vote in votes])
+        entity_cache.invalidate(Tender, list(tenders))
+    return results
+
+
+def submit_decision(employee, bid_id, decision):
+    """Решение по одному предложению, см. submit_decisions."""
+
+    return submit_decisions(employee, [bid_id], decision)[0]